@@ -0,0 +1,129 @@
+import heapq
+import json
+import os
+import pickle
+from typing import List, Dict, Iterable
+
+from archive_sources import open_archive_source
+from data_models import Message, Conversation, SlackArchiveManager
+
+
+def _newer(current: Message, candidate: Message) -> Message:
+    """
+    같은 (대화, ts) 메시지 중 남길 것을 고른다.
+    수정 시각(edited.ts)이 더 최근인 쪽이 이기고, 같으면 나중에 병합된 내보내기(candidate)가 이긴다.
+    스레드 답글은 양쪽을 합친다.
+    """
+    if (candidate.edited_ts or 0) >= (current.edited_ts or 0):
+        winner, loser = candidate, current
+    else:
+        winner, loser = current, candidate
+    if loser.replies:
+        winner.replies = merge_message_lists([
+            sorted(loser.replies, key=lambda msg: msg.ts),
+            sorted(winner.replies, key=lambda msg: msg.ts),
+        ])
+    return winner
+
+
+def merge_message_lists(sorted_lists: Iterable[List[Message]]) -> List[Message]:
+    """
+    ts로 정렬된 메시지 목록들을 k-way merge하고 ts 기준으로 중복 제거.
+    heapq.merge는 같은 ts에 대해 입력 순서를 유지하므로, 뒤에 오는 목록이 더 새로운 내보내기로 취급된다.
+    """
+    merged: List[Message] = []
+    for msg in heapq.merge(*sorted_lists, key=lambda m: m.ts):
+        if merged and merged[-1].ts == msg.ts:
+            merged[-1] = _newer(merged[-1], msg)
+        else:
+            merged.append(msg)
+    return merged
+
+
+class ArchiveMerger:
+    """
+    여러 아카이브 루트(폴더 또는 내보내기 zip)를 하나의 논리 아카이브로 병합.
+
+    병합 결과는 state_dir의 스냅샷(merged_snapshot.pkl)에, 병합한 day-file과 그 fingerprint는
+    manifest(merge_manifest.json)에 기록한다. 다음 실행에서는 manifest에 없거나 바뀐 파일만 읽어 병합한다.
+    """
+    SNAPSHOT_FILE = "merged_snapshot.pkl"
+    MANIFEST_FILE = "merge_manifest.json"
+
+    def __init__(self, state_dir):
+        self.state_dir = state_dir
+        self.snapshot_path = os.path.join(state_dir, self.SNAPSHOT_FILE)
+        self.manifest_path = os.path.join(state_dir, self.MANIFEST_FILE)
+
+    def _load_state(self):
+        # 스냅샷 없이 manifest만 있으면 manifest를 믿을 수 없으므로 처음부터 병합
+        if not (os.path.exists(self.snapshot_path) and os.path.exists(self.manifest_path)):
+            return {}, {}, {}
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                snapshot = pickle.load(f)
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except Exception as e:
+            print(f"경고: 병합 상태 로드 오류, 처음부터 다시 병합합니다: {e}")
+            return {}, {}, {}
+        return snapshot["channels"], snapshot["dms"], manifest
+
+    def _save_state(self, channels, dms, manifest):
+        os.makedirs(self.state_dir, exist_ok=True)
+        # 임시 파일에 쓴 뒤 교체하여 중간에 중단되어도 이전 상태가 유지되도록 함
+        tmp_snapshot = self.snapshot_path + ".tmp"
+        with open(tmp_snapshot, 'wb') as f:
+            pickle.dump({"channels": channels, "dms": dms}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_snapshot, self.snapshot_path)
+        tmp_manifest = self.manifest_path + ".tmp"
+        with open(tmp_manifest, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_manifest, self.manifest_path)
+
+    def merge(self, manager: SlackArchiveManager, archive_roots: List[str], max_workers=None) -> Dict[str, int]:
+        """
+        archive_roots를 오래된 것부터 순서대로 병합하여 manager.channels/dms를 채운다.
+        반환값: 루트별로 새로 병합한 파일 수
+        """
+        channels, dms, manifest = self._load_state()
+        merged_counts = {}
+
+        for root in archive_roots:
+            root_key = os.path.abspath(root)
+            if not os.path.exists(root):
+                print(f"경고: 아카이브 경로를 찾을 수 없습니다: {root}")
+                continue
+            seen = manifest.setdefault(root_key, {})
+            with open_archive_source(root) as source:
+                manager.user_mapping.update_mappings(source.user_names())
+                manager.dm_mapping.update_mappings(source.dm_names(manager.user_mapping.mapping))
+
+                # 이미 같은 내용으로 병합한 파일은 건너뛰고 변경분(delta)만 읽음
+                delta_files, fingerprints = {}, {}
+                for key, members in source.conversation_files().items():
+                    for member in members:
+                        fingerprint = source.fingerprint(member)
+                        if seen.get(member) != fingerprint:
+                            delta_files.setdefault(key, []).append(member)
+                            fingerprints[member] = fingerprint
+
+                parsed = manager._parse_source_files(source, delta_files, max_workers)
+
+            for (kind, conv_name, conv_type), messages in parsed.items():
+                target = channels if kind == "channel" else dms
+                conv = target.get(conv_name)
+                if conv is None:
+                    conv = target[conv_name] = Conversation(name=conv_name, conv_type=conv_type)
+                conv.messages = merge_message_lists([conv.messages, messages])
+            # 격리된(파싱 실패) 파일은 병합 기록에 남기지 않아 다음 병합에서 다시 읽도록 함
+            fingerprints = {member: fingerprint for member, fingerprint in fingerprints.items()
+                            if member not in manager.load_diagnostics.quarantine}
+            seen.update(fingerprints)
+            merged_counts[root] = len(fingerprints)
+
+        if any(merged_counts.values()) or not os.path.exists(self.snapshot_path):
+            self._save_state(channels, dms, manifest)
+        manager.channels.update(channels)
+        manager.dms.update(dms)
+        return merged_counts
@@ -0,0 +1,191 @@
+import glob
+import json
+import os
+import posixpath
+import zipfile
+from typing import Dict, List, Tuple, Any, Optional
+
+# 공식 Slack 내보내기 zip의 메타데이터 파일
+_METADATA_FILES = ("users.json", "channels.json", "groups.json", "dms.json", "mpims.json")
+# dms/<DM ID>.json 레이아웃에서 그룹 DM(mpim)의 ID 접두어 (공식 내보내기의 mpim은 G로, 이 앱의 그룹 DM은 C로 시작)
+_GROUP_DM_PREFIXES = ("C", "G")
+
+
+def dm_conv_type(dm_id: str) -> str:
+    """메타데이터 없이 DM ID만 있을 때의 conv_type"""
+    return "dm_group" if dm_id.startswith(_GROUP_DM_PREFIXES) else "dm_1to1"
+
+
+class ZipArchiveSource:
+    """
+    압축을 풀지 않고 Slack 내보내기 zip에서 직접 day-file을 읽는 소스 어댑터.
+
+    두 가지 레이아웃을 지원한다.
+    - 공식 내보내기: <채널 이름>/YYYY-MM-DD.json, <DM ID>/..., <mpim 이름>/... + users.json 등 메타데이터
+    - 이 앱의 data/ 구조: channels/<채널 이름>/YYYY-MM-DD.json, dms/<DM ID>.json
+
+    멤버는 read_json() 호출 시점에만 압축 해제하므로 여러 스레드에서 동시에 읽을 수 있다.
+    """
+    def __init__(self, zip_path):
+        self.zip_path = zip_path
+        self.spec = ("zip", zip_path)  # 다시 열기 위한 정보 (source_from_spec)
+        self.zip_file = zipfile.ZipFile(zip_path)
+        self.prefix = self._detect_prefix()
+
+    def close(self):
+        self.zip_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _detect_prefix(self) -> str:
+        """zip 안에 최상위 폴더가 한 겹 더 있는 경우 그 경로를 찾는다"""
+        members = self.zip_file.namelist()
+        for member in members:
+            if posixpath.basename(member) in _METADATA_FILES and member.count("/") <= 1:
+                root = posixpath.dirname(member)
+                return root + "/" if root else ""
+        for member in members:
+            parts = member.split("/")
+            for depth, part in enumerate(parts[:2]):
+                if part in ("channels", "dms") and len(parts) > depth + 1:
+                    return "/".join(parts[:depth]) + "/" if depth else ""
+        return ""
+
+    def read_json(self, member: str) -> Any:
+        with self.zip_file.open(member) as f:
+            return json.load(f)
+
+    def read_bytes(self, member: str) -> bytes:
+        """압축 해제한 원본 바이트 (파싱은 호출자가 따로 하므로 읽기와 파싱을 나눠 겹칠 수 있음)"""
+        return self.zip_file.read(member)
+
+    def fingerprint(self, member: str) -> List[int]:
+        """멤버 내용이 바뀌었는지 판단하기 위한 값 (크기, CRC)"""
+        info = self.zip_file.getinfo(member)
+        return [info.file_size, info.CRC]
+
+    def _read_metadata(self, file_name: str) -> List[Dict[str, Any]]:
+        member = self.prefix + file_name
+        try:
+            return self.read_json(member)
+        except KeyError:
+            return []
+
+    def conversation_files(self) -> Dict[Tuple[str, str, str], List[str]]:
+        """
+        (kind, 대화 키, conv_type) -> day-file 멤버 목록.
+        kind: "channel" 또는 "dm"
+        """
+        # 공식 내보내기의 폴더 이름 -> (kind, 대화 키, conv_type)
+        folder_info = {}
+        for channel in self._read_metadata("channels.json") + self._read_metadata("groups.json"):
+            folder_info[channel["name"]] = ("channel", channel["name"], "channel")
+        for dm in self._read_metadata("dms.json"):
+            folder_info[dm["id"]] = ("dm", dm["id"], "dm_1to1")
+        for mpim in self._read_metadata("mpims.json"):
+            folder_info[mpim["name"]] = ("dm", mpim["id"], "dm_group")
+
+        files = {}
+        for member in self.zip_file.namelist():
+            if not member.startswith(self.prefix) or not member.endswith(".json"):
+                continue
+            parts = member[len(self.prefix):].split("/")
+            if len(parts) == 3 and parts[0] == "channels":
+                key = ("channel", parts[1], "channel")
+            elif len(parts) == 2 and parts[0] == "dms":
+                dm_id = posixpath.splitext(parts[1])[0]
+                key = ("dm", dm_id, dm_conv_type(dm_id))
+            elif len(parts) == 2 and parts[1] not in _METADATA_FILES:
+                key = folder_info.get(parts[0], ("channel", parts[0], "channel"))
+            else:
+                continue
+            files.setdefault(key, []).append(member)
+        return files
+
+    def user_names(self) -> Dict[str, str]:
+        """users.json에서 사용자 ID -> 표시 이름"""
+        names = {}
+        for user in self._read_metadata("users.json"):
+            profile = user.get("profile", {})
+            name = profile.get("display_name") or profile.get("real_name") or user.get("real_name") or user.get("name")
+            if user.get("id") and name:
+                names[user["id"]] = name
+        return names
+
+    def dm_names(self, user_names: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """dms.json/mpims.json에서 DM ID -> 참여자 이름으로 만든 표시 이름"""
+        user_names = user_names or {}
+        names = {}
+        for dm in self._read_metadata("dms.json") + self._read_metadata("mpims.json"):
+            members = [user_names.get(uid, uid) for uid in dm.get("members", [])]
+            if dm.get("id") and members:
+                names[dm["id"]] = ", ".join(sorted(members))
+        return names
+
+
+class DirectoryArchiveSource:
+    """
+    압축 해제된 data/ 구조(channels/<채널 이름>/*.json, dms/<DM ID>.json)를 읽는 소스 어댑터.
+    ZipArchiveSource와 같은 인터페이스를 제공한다.
+    """
+    def __init__(self, channel_root, dm_root):
+        self.channel_root = channel_root
+        self.dm_root = dm_root
+        self.spec = ("directory", channel_root, dm_root)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def read_json(self, member: str) -> Any:
+        with open(member, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def read_bytes(self, member: str) -> bytes:
+        with open(member, 'rb') as f:
+            return f.read()
+
+    def fingerprint(self, member: str) -> List[int]:
+        """파일 내용이 바뀌었는지 판단하기 위한 값 (크기, 수정 시각)"""
+        stat = os.stat(member)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def conversation_files(self) -> Dict[Tuple[str, str, str], List[str]]:
+        files = {}
+        for channel_dir in glob.glob(os.path.join(self.channel_root, '*')):
+            if os.path.isdir(channel_dir):
+                channel_name = os.path.basename(channel_dir)
+                files[("channel", channel_name, "channel")] = glob.glob(os.path.join(channel_dir, '*.json'))
+        for json_file in glob.glob(os.path.join(self.dm_root, '*.json')):
+            dm_id = os.path.splitext(os.path.basename(json_file))[0]
+            files[("dm", dm_id, dm_conv_type(dm_id))] = [json_file]
+        return files
+
+    def user_names(self) -> Dict[str, str]:
+        return {}
+
+    def dm_names(self, user_names: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        return {}
+
+
+def open_archive_source(root):
+    """아카이브 루트를 소스로 연다. .zip이면 내보내기 zip, 아니면 channels/와 dms/를 가진 폴더"""
+    if root.lower().endswith(".zip"):
+        return ZipArchiveSource(root)
+    return DirectoryArchiveSource(os.path.join(root, "channels"), os.path.join(root, "dms"))
+
+
+def source_from_spec(spec):
+    """소스의 spec 값으로 같은 소스를 다시 연다 (격리된 파일 재시도 등)"""
+    if spec[0] == "zip":
+        return ZipArchiveSource(spec[1])
+    return DirectoryArchiveSource(spec[1], spec[2])
@@ -0,0 +1,147 @@
+import threading
+import time
+import weakref
+from typing import Callable, Dict, Optional, Tuple
+
+from archive_merge import merge_message_lists
+from archive_sources import DirectoryArchiveSource
+from data_models import Conversation, SlackArchiveManager
+
+
+class ArchiveWatcher:
+    """
+    channel_root/dm_root를 주기적으로 확인하여 새로 생기거나 바뀐 day-file만 백그라운드에서 파싱하고
+    SlackArchiveManager에 반영하는 감시 스레드.
+
+    변경이 감지되면 debounce_seconds 동안 추가 변경이 없을 때까지 기다린 뒤 한 번에 반영한다.
+    (동기화 작업이 파일을 여러 개 쓰는 도중에 반쯤 쓰인 파일을 읽지 않도록)
+    매니저는 약한 참조로만 들고 있으므로 캐시에서 매니저가 사라지면 스레드도 종료된다.
+    """
+    def __init__(self, manager: SlackArchiveManager, poll_seconds=2.0, debounce_seconds=1.0,
+                 on_publish: Optional[Callable[[SlackArchiveManager], None]] = None):
+        self._manager_ref = weakref.ref(manager)
+        self.load_id = manager.load_id
+        self.source = DirectoryArchiveSource(manager.channel_root, manager.dm_root)
+        self.poll_seconds = poll_seconds
+        self.debounce_seconds = debounce_seconds
+        self.on_publish = on_publish  # 새 버전을 반영한 뒤 감시 스레드에서 부름 (예: 인덱스를 미리 다시 만듦)
+        self._known = self._loaded_files(manager)
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="archive-watcher", daemon=True)
+        self.last_update = None  # 마지막으로 반영한 시각과 파일 수
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _loaded_files(self, manager) -> Dict[str, Tuple[tuple, list]]:
+        """
+        로드할 때 읽은 파일들의 멤버 -> (대화 키, fingerprint).
+        감시를 시작하는 시점에 다시 스캔하면 긴 로드 도중에 동기화 작업이 쓴 파일이 읽지 않았는데도 알려진 파일이 되므로,
+        로드 시점에 기록한 fingerprint를 기준으로 삼아 그 사이에 생기거나 바뀐 파일을 첫 확인에서 반영한다.
+        """
+        return {
+            member: (record.key, record.fingerprint)
+            for member, record in manager.load_diagnostics.records.items()
+            if record.source_spec == self.source.spec and record.fingerprint is not None
+        }
+
+    def _scan(self) -> Dict[str, Tuple[tuple, list]]:
+        """멤버 -> (대화 키, fingerprint)"""
+        snapshot = {}
+        for key, members in self.source.conversation_files().items():
+            for member in members:
+                try:
+                    snapshot[member] = (key, self.source.fingerprint(member))
+                except OSError:  # 스캔 도중 삭제/이동된 파일
+                    continue
+        return snapshot
+
+    def _changed_files(self, snapshot) -> Dict[tuple, list]:
+        changed = {}
+        for member, (key, fingerprint) in snapshot.items():
+            known = self._known.get(member)
+            if known is None or known[1] != fingerprint:
+                changed.setdefault(key, []).append(member)
+        return changed
+
+    def _run(self):
+        pending_since = None
+        pending_snapshot = None
+        while not self._stop_event.wait(self.poll_seconds if pending_since is None else min(self.poll_seconds, self.debounce_seconds)):
+            manager = self._manager_ref()
+            if manager is None:
+                return
+            try:
+                snapshot = self._scan()
+                if not self._changed_files(snapshot):
+                    pending_since = pending_snapshot = None
+                    continue
+                # 직전 확인 이후에도 계속 바뀌고 있으면 debounce 시간을 다시 잰다
+                if snapshot != pending_snapshot:
+                    pending_since, pending_snapshot = time.monotonic(), snapshot
+                    continue
+                if time.monotonic() - pending_since < self.debounce_seconds:
+                    continue
+                self.apply_changes(manager, snapshot)
+                pending_since = pending_snapshot = None
+                if self.on_publish is not None:
+                    self.on_publish(manager)
+            except Exception as e:
+                print(f"경고: 아카이브 감시 중 오류: {e}")
+            finally:
+                del manager
+
+    def apply_changes(self, manager: SlackArchiveManager, snapshot=None):
+        """바뀐 파일만 파싱하여 기존 대화와 ts 기준으로 병합하고 새 버전으로 반영"""
+        snapshot = snapshot if snapshot is not None else self._scan()
+        changed_files = self._changed_files(snapshot)
+        if not changed_files:
+            return 0
+        parsed = manager._parse_source_files(self.source, changed_files)
+        changed = {}
+        for (kind, conv_name, conv_type), messages in parsed.items():
+            existing = manager.get_conversation(kind, conv_name)
+            conv = Conversation(name=conv_name, conv_type=conv_type)
+            # 기존 대화 객체는 읽는 중인 세션이 있을 수 있으므로 수정하지 않고 새 객체를 만든다
+            conv.messages = merge_message_lists([list(existing.messages) if existing else [], messages])
+            manager.prepare_conversation(conv)
+            changed[(kind, conv_name)] = conv
+        manager.publish_conversations(changed)
+        self._known = snapshot
+        file_count = sum(len(members) for members in changed_files.values())
+        self.last_update = (time.time(), file_count)
+        return file_count
+
+
+class WatcherRegistry:
+    """
+    워크스페이스별로 실행 중인 감시 스레드를 하나만 유지.
+    아카이브를 다시 로드하여 매니저(load_id)가 바뀌면 이전 감시 스레드를 멈춘 뒤 새 매니저로 교체한다.
+    (매니저 캐시가 만료되어도 이전 매니저를 잡고 있는 세션이 있으면 약한 참조가 살아 있어 두 스레드가 함께 감시하게 되므로)
+    """
+    def __init__(self):
+        self._watchers: Dict[str, ArchiveWatcher] = {}
+        self._lock = threading.Lock()
+
+    def ensure(self, manager: SlackArchiveManager, workspace_name, poll_seconds=2.0, debounce_seconds=1.0,
+               on_publish: Optional[Callable[[SlackArchiveManager], None]] = None) -> ArchiveWatcher:
+        with self._lock:
+            watcher = self._watchers.get(workspace_name)
+            if watcher is not None and watcher.load_id == manager.load_id:
+                return watcher
+            if watcher is not None:
+                watcher.stop()
+            watcher = ArchiveWatcher(manager, poll_seconds=poll_seconds, debounce_seconds=debounce_seconds,
+                                     on_publish=on_publish).start()
+            self._watchers[workspace_name] = watcher
+            return watcher
+
+    def stop_all(self):
+        with self._lock:
+            for watcher in self._watchers.values():
+                watcher.stop()
+            self._watchers.clear()
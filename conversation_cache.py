@@ -0,0 +1,225 @@
+import hashlib
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Callable, Optional, Dict, Any
+
+
+def deep_sizeof(obj, seen: Optional[set] = None) -> int:
+    """
+    객체가 참조하는 dict/list/tuple/str/숫자 및 일반 객체의 __dict__까지 따라가며 메모리 사용량을 추정.
+    seen을 넘기면 이미 센 객체는 건너뛰고 이번에 센 객체를 추가하므로, 여러 부분을 나눠 재도 중복되지 않는다.
+    """
+    seen = set() if seen is None else seen
+    stack = [obj]
+    total = 0
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif hasattr(current, "__dict__") and not isinstance(current, type):
+            stack.append(current.__dict__)
+    return total
+
+
+class ConversationStore(MutableMapping):
+    """
+    메모리 예산을 가진 대화 저장소. 키는 (kind, 대화 이름)이며 SlackArchiveManager.channels/dms는
+    이 저장소의 kind별 뷰(ConversationStoreView)로 dict처럼 사용한다.
+
+    예산을 넘으면 가장 오래 사용하지 않은 대화부터(측정한 크기만큼) 메모리에서 내보내고,
+    내보낸 대화는 spill_dir에 스냅샷으로 저장해 두었다가 다시 접근하면 투명하게 불러온다.
+    budget_bytes가 0이면 예산 없이 일반 dict처럼 동작한다.
+    """
+    def __init__(self, budget_bytes: int = 0, spill_dir: Optional[str] = None,
+                 on_load: Optional[Callable[[Any], None]] = None):
+        self.budget_bytes = budget_bytes
+        self.spill_dir = spill_dir
+        self.on_load = on_load  # 스냅샷에서 다시 불러온 대화에 적용할 후처리 (예: 표시 이름 갱신)
+        self._resident: 'OrderedDict[Any, Any]' = OrderedDict()
+        self._sizes: Dict[Any, int] = {}
+        self._spilled = set()  # 스냅샷이 최신인 대화
+        self._resident_bytes = 0
+        self._retired = []  # 더 이상 어떤 스냅샷도 가리키지 않아 지울 키 (다음 저장 때 정리)
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def _spill_path(self, name):
+        digest = hashlib.sha1(repr(name).encode("utf-8")).hexdigest()
+        return os.path.join(self.spill_dir, f"{digest}.pkl")
+
+    def _evict(self, keep=None):
+        while self._resident_bytes > self.budget_bytes and len(self._resident) > 1:
+            name = next(iter(self._resident))
+            if name == keep:
+                self._resident.move_to_end(name)
+                name = next(iter(self._resident))
+            conv = self._resident.pop(name)
+            self._resident_bytes -= self._sizes[name]
+            if name not in self._spilled:
+                os.makedirs(self.spill_dir, exist_ok=True)
+                with open(self._spill_path(name), 'wb') as f:
+                    pickle.dump(conv, f, protocol=pickle.HIGHEST_PROTOCOL)
+                self._spilled.add(name)
+            self.evictions += 1
+
+    def __getitem__(self, name):
+        with self._lock:
+            conv = self._resident.get(name)
+            if conv is not None:
+                self.hits += 1
+                self._resident.move_to_end(name)
+                return conv
+            if name not in self._sizes:
+                raise KeyError(name)
+            self.misses += 1
+            with open(self._spill_path(name), 'rb') as f:
+                conv = pickle.load(f)
+            if self.on_load is not None:
+                self.on_load(conv)
+            self._resident[name] = conv
+            self._resident_bytes += self._sizes[name]
+            self._evict(keep=name)
+            return conv
+
+    def retire(self, names):
+        """
+        지울 키를 예약. 가비지 컬렉터의 finalizer에서도 부를 수 있도록 잠금 없이 목록에 추가만 하고,
+        실제 삭제는 다음 저장(__setitem__) 때 잠금을 잡고 한다.
+        """
+        self._retired.extend(names)
+
+    def _drain_retired(self):
+        while self._retired:
+            name = self._retired.pop()
+            if name in self._sizes:
+                del self[name]
+
+    def __setitem__(self, name, conv):
+        with self._lock:
+            self._drain_retired()
+            # 내용이 바뀌었을 수 있으므로 크기를 다시 재고 기존 스냅샷은 버림
+            if name in self._resident:
+                self._resident_bytes -= self._sizes[name]
+            self._sizes[name] = deep_sizeof(conv) if self.budget_bytes else 0
+            self._spilled.discard(name)
+            self._resident[name] = conv
+            self._resident_bytes += self._sizes[name]
+            self._resident.move_to_end(name)
+            if self.budget_bytes:
+                self._evict(keep=name)
+
+    def __delitem__(self, name):
+        with self._lock:
+            if self._resident.pop(name, None) is not None:
+                self._resident_bytes -= self._sizes[name]
+            del self._sizes[name]
+            if name in self._spilled:
+                self._spilled.discard(name)
+                os.remove(self._spill_path(name))
+
+    def read_spill_files(self) -> Dict[Any, bytes]:
+        """
+        메모리에서 내보낸 대화들의 스냅샷 바이트 (대화 키 -> 바이트).
+        저장소를 pickle하면 메모리에 있는 대화만 담기므로, 다른 호스트에서 쓸 산출물에는 이 값을 함께 저장한다.
+        """
+        with self._lock:
+            files = {}
+            for name in self._sizes:
+                if name not in self._resident:
+                    with open(self._spill_path(name), 'rb') as f:
+                        files[name] = f.read()
+            return files
+
+    def restore_spill_files(self, files: Dict[Any, bytes]):
+        """read_spill_files로 저장한 스냅샷을 이 호스트의 spill_dir에 다시 쓴다 (다른 호스트에서 만든 산출물을 불러올 때)"""
+        with self._lock:
+            if files:
+                os.makedirs(self.spill_dir, exist_ok=True)
+            for name, data in files.items():
+                with open(self._spill_path(name), 'wb') as f:
+                    f.write(data)
+            # 메모리에 있는 대화의 스냅샷은 이 호스트에 없으므로 다음에 내보낼 때 다시 쓰도록 함
+            self._spilled = set(files)
+
+    def __iter__(self):
+        return iter(list(self._sizes.keys()))
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def __contains__(self, name):
+        return name in self._sizes
+
+    def is_resident(self, name):
+        return name in self._resident
+
+    def get_stats(self) -> Dict[str, int]:
+        """예산 산정을 위한 캐시 통계"""
+        with self._lock:
+            return {
+                "budget_bytes": self.budget_bytes,
+                "resident_bytes": self._resident_bytes,
+                "total_bytes": sum(self._sizes.values()),
+                "resident_conversations": len(self._resident),
+                "total_conversations": len(self._sizes),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class ConversationStoreView(MutableMapping):
+    """
+    ConversationStore 중 한 종류(kind)의 대화만 보여주는 dict 형태의 뷰.
+    store_keys((kind, 대화 이름) -> 저장소 키)는 아카이브 스냅샷의 것이라, 새 버전을 반영해도 이 뷰는 자기 버전의 대화를 가리킨다.
+    대화를 넣으면(로드 중) store_keys에 없는 대화는 (kind, 대화 이름)을 저장소 키로 쓴다.
+    """
+    def __init__(self, store: ConversationStore, kind: str, store_keys: Dict[tuple, Any]):
+        self.store = store
+        self.kind = kind
+        self.store_keys = store_keys
+
+    def __getitem__(self, name):
+        return self.store[self.store_keys[(self.kind, name)]]
+
+    def __setitem__(self, name, conv):
+        key = self.store_keys.setdefault((self.kind, name), (self.kind, name))
+        self.store[key] = conv
+
+    def __delitem__(self, name):
+        del self.store[self.store_keys.pop((self.kind, name))]
+
+    def __iter__(self):
+        return (name for kind, name in list(self.store_keys) if kind == self.kind)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, name):
+        return (self.kind, name) in self.store_keys
+
+    def is_resident(self, name):
+        key = self.store_keys.get((self.kind, name))
+        return key is not None and self.store.is_resident(key)
@@ -1,22 +1,105 @@
+import bisect
 import datetime
+import itertools
 import json
 import os
-import glob
+import sys
+import time
+import uuid
+import weakref
+import zipfile
+from collections.abc import Sequence
 from typing import List, Optional, Dict, Any
 
+import numpy as np
+
+from archive_sources import ZipArchiveSource, DirectoryArchiveSource, source_from_spec
+from conversation_cache import ConversationStore, ConversationStoreView
+from file_index import FileIndex
+from load_diagnostics import FileLoadRecord, LoadDiagnostics
+from memory_footprint import ConversationFootprint, measure_conversation
+from message_kinds import MessageKindIndex
+from query_cache import QueryResultCache
+from read_ahead import read_ahead
+from reaction_index import ReactionIndex
+from text_store import compress_messages
+from timeline_index import TimelineIndex
+
 class Message:
-    def __init__(self, ts, user_id, text, thread_ts=None, blocks=None, reactions=None, replies: Optional[List['Message']] = None):
+    def __init__(self, ts, user_id, text, thread_ts=None, blocks=None, reactions=None, replies: Optional[List['Message']] = None, edited_ts=None,
+                 files: Optional[List[tuple]] = None, subtype=None, bot_id=None):
         self.ts = float(ts)
         self.user_id = user_id
-        self.text = text
+        self._text = text
+        self._text_ref = None  # 텍스트를 압축 저장소로 옮긴 경우 (CompressedTextStore, 슬롯)
         self.thread_ts = thread_ts
         self.blocks = blocks
         self.reactions = reactions
         self.replies = replies if replies is not None else []
+        self.edited_ts = float(edited_ts) if edited_ts else None  # 마지막 수정 시각 (수정되지 않았으면 None)
+        self.files = files  # 첨부 파일 메타데이터 (이름, 제목, 종류, 크기) 튜플 목록. 없으면 None
+        self.subtype = subtype  # channel_join, bot_message 등 (일반 메시지는 None)
+        self.bot_id = bot_id  # 봇/연동이 올린 메시지면 봇 ID
+        # 화면 표시용 필드. 대화 로드 후 Conversation.precompute_display_fields()에서 일괄 계산
+        self.display_time = None
+        self.display_name = None
+
+    def __setstate__(self, state):
+        # 압축 저장소 도입 전에 저장된 스냅샷은 text를 그대로 가지고 있음
+        if "text" in state:
+            state["_text"] = state.pop("text")
+            state.setdefault("_text_ref", None)
+        state.setdefault("files", None)
+        state.setdefault("subtype", None)
+        state.setdefault("bot_id", None)
+        self.__dict__.update(state)
+
+    @property
+    def text(self):
+        if self._text_ref is not None:
+            store, slot = self._text_ref
+            return store.get(slot)
+        return self._text
+
+    @text.setter
+    def text(self, value):
+        self._text = value
+        self._text_ref = None
+
+    def set_text_ref(self, store, slot):
+        """텍스트를 압축 저장소의 슬롯으로 옮기고 메시지에는 남기지 않음"""
+        self._text = None
+        self._text_ref = (store, slot)
 
     def get_datetime(self):
         return datetime.datetime.fromtimestamp(self.ts)
 
+def format_local_times(timestamps) -> List[str]:
+    """
+    ts 목록을 로컬 시각 'YYYY-MM-DD HH:MM:SS' 문자열로 일괄 변환.
+    UTC 오프셋(서머타임 포함)은 메시지마다가 아니라 서로 다른 시간(hour) 단위로만 계산한다.
+    """
+    ts = np.asarray(timestamps, dtype=np.float64)
+    if ts.size == 0:
+        return []
+    seconds = np.floor(ts).astype(np.int64)
+    unique_hours, inverse = np.unique(seconds // 3600, return_inverse=True)
+    offsets = np.array([time.localtime(hour * 3600).tm_gmtoff for hour in unique_hours.tolist()], dtype=np.int64)
+    local = (seconds + offsets[inverse]).astype('datetime64[s]')
+    return np.char.replace(np.datetime_as_string(local, unit='s'), 'T', ' ').tolist()
+
+class TimestampView(Sequence):
+    """ts 순으로 정렬된 목록(메시지, 검색 결과 등)의 ts만 보는 읽기 전용 뷰 (ts 목록을 새로 만들지 않고 bisect에 넘김)"""
+    def __init__(self, items, ts=lambda item: item.ts):
+        self.items = items
+        self.ts = ts
+
+    def __getitem__(self, index):
+        return self.ts(self.items[index])
+
+    def __len__(self):
+        return len(self.items)
+
 class Conversation:
     """
     채널과 DM 대화 모두를 표현하는 클래스.
@@ -26,6 +109,7 @@ class Conversation:
         self.name = name
         self.conv_type = conv_type
         self.messages = []
+        self.text_store = None  # compress_text() 후의 CompressedTextStore
 
     def add_message(self, message):
         self.messages.append(message)
@@ -36,11 +120,44 @@ class Conversation:
     def search_messages(self, keyword):
         return [msg for msg in self.messages if keyword.lower() in msg.text.lower()]
 
+    def bisect_ts(self, ts, right=False):
+        """ts 순으로 정렬된 messages에서 ts가 들어갈 위치 (bisect_left/bisect_right와 동일)"""
+        lo, hi = 0, len(self.messages)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.messages[mid].ts < ts or (right and self.messages[mid].ts == ts):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def iter_all_messages(self):
+        """메인 메시지와 스레드 답글을 모두 순회"""
+        for msg in self.messages:
+            yield msg
+            yield from msg.replies
+
+    def precompute_display_fields(self, user_mapping: 'UserMapping'):
+        """표시용 시각 문자열과 사용자 이름을 미리 계산하여 렌더링 시 datetime 생성을 없앰"""
+        all_messages = list(self.iter_all_messages())
+        for msg, time_str in zip(all_messages, format_local_times([msg.ts for msg in all_messages])):
+            msg.display_time = time_str
+        self.refresh_display_names(user_mapping, all_messages)
+
+    def refresh_display_names(self, user_mapping: 'UserMapping', messages=None):
+        for msg in (messages if messages is not None else self.iter_all_messages()):
+            msg.display_name = user_mapping.get_name(msg.user_id)
+
+    def compress_text(self, block_size=64, level=6):
+        """메시지(스레드 답글 포함) 텍스트를 연속된 block_size개씩 압축한 저장소로 옮김"""
+        self.text_store = compress_messages(list(self.iter_all_messages()), block_size=block_size, level=level)
+
 class UserMapping:
     def __init__(self, mapping_file):
         self.mapping_file = mapping_file
         self.mapping = self.load_mapping()
         self.user_stats = {} # 사용자 통계 저장
+        self.version = 0 # 매핑이 바뀔 때마다 증가 (렌더링 캐시 무효화용)
 
     def load_mapping(self):
         if os.path.exists(self.mapping_file):
@@ -52,13 +169,28 @@ class UserMapping:
         with open(self.mapping_file, 'w', encoding='utf-8') as f:
             json.dump(self.mapping, f, ensure_ascii=False, indent=4)
 
+    def reload(self):
+        """파일에서 매핑을 다시 읽음 (저장해 둔 매핑 이후에 파일이 바뀐 경우)"""
+        self.mapping = self.load_mapping()
+        self.version += 1
+
     def get_name(self, user_id):
         return self.mapping.get(user_id, user_id)
 
     def update_mapping(self, user_id, new_name):
         self.mapping[user_id] = new_name
+        self.version += 1
         self.save_mapping()
 
+    def update_mappings(self, new_mapping: Dict[str, str], overwrite=False):
+        """여러 매핑을 한 번에 반영하고 파일은 한 번만 저장. 기존(사용자가 지정한) 이름은 기본적으로 유지"""
+        added = {key: name for key, name in new_mapping.items() if overwrite or key not in self.mapping}
+        if added:
+            self.mapping.update(added)
+            self.version += 1
+            self.save_mapping()
+        return len(added)
+
     def collect_user_stats(self, channels: Dict[str, 'Conversation'], dms: Dict[str, 'Conversation']):
         user_message_counts = {}
         user_channel_participation = {}
@@ -109,18 +241,290 @@ class UserMapping:
             'dm_count': 0
         })
 
+class UserPostingIndex:
+    """
+    사용자별 posting list: user_id -> ts 순으로 정렬된 (ts, source, 대화 이름, 메시지 인덱스, 답글 인덱스).
+    답글 인덱스는 메인 메시지면 -1. 기간 조회는 ts 목록에 대한 이진 탐색으로 처리한다.
+    """
+    def __init__(self):
+        self.postings: Dict[str, List[tuple]] = {}
+        self.timestamps: Dict[str, List[float]] = {}
+
+    @staticmethod
+    def _conversation_postings(source, conv_name, conv):
+        for msg_index, msg in enumerate(conv.messages):
+            yield msg.user_id, (msg.ts, source, conv_name, msg_index, -1)
+            for reply_index, reply_msg in enumerate(msg.replies):
+                yield reply_msg.user_id, (reply_msg.ts, source, conv_name, msg_index, reply_index)
+
+    def _set_postings(self, postings):
+        for posting_list in postings.values():
+            posting_list.sort()
+        self.postings = postings
+        self.timestamps = {user_id: [posting[0] for posting in posting_list] for user_id, posting_list in postings.items()}
+        return self
+
+    def build(self, channels: Dict[str, 'Conversation'], dms: Dict[str, 'Conversation']):
+        postings = {}
+        for source, conversations in (("channel", channels), ("dm", dms)):
+            for conv_name in list(conversations):
+                for user_id, posting in self._conversation_postings(source, conv_name, conversations[conv_name]):
+                    postings.setdefault(user_id, []).append(posting)
+        return self._set_postings(postings)
+
+    def updated(self, changed: Dict[tuple, 'Conversation']) -> 'UserPostingIndex':
+        """
+        일부 대화가 바뀐 새 인덱스를 만들어 반환 (기존 인덱스는 그대로 두므로 교체를 원자적으로 할 수 있음).
+        changed: (source, 대화 이름) -> 새 Conversation
+        """
+        postings = {
+            user_id: [posting for posting in posting_list if (posting[1], posting[2]) not in changed]
+            for user_id, posting_list in self.postings.items()
+        }
+        for (source, conv_name), conv in changed.items():
+            for user_id, posting in self._conversation_postings(source, conv_name, conv):
+                postings.setdefault(user_id, []).append(posting)
+        return UserPostingIndex()._set_postings({user_id: posting_list for user_id, posting_list in postings.items() if posting_list})
+
+    def get_user_ids(self):
+        return sorted(self.postings.keys())
+
+    def get_range(self, user_id, start_ts=None, end_ts=None):
+        """[start_ts, end_ts) 구간에 해당하는 posting list의 (시작, 끝) 위치"""
+        timestamps = self.timestamps.get(user_id, [])
+        lo = 0 if start_ts is None else bisect.bisect_left(timestamps, start_ts)
+        hi = len(timestamps) if end_ts is None else bisect.bisect_left(timestamps, end_ts)
+        return lo, max(lo, hi)
+
+    def count(self, user_id, start_ts=None, end_ts=None):
+        lo, hi = self.get_range(user_id, start_ts, end_ts)
+        return hi - lo
+
+    def get_page(self, user_id, page, page_size, start_ts=None, end_ts=None):
+        """기간 내 posting 중 page번째(0부터) 페이지"""
+        lo, hi = self.get_range(user_id, start_ts, end_ts)
+        start = lo + page * page_size
+        return self.postings.get(user_id, [])[start:min(start + page_size, hi)]
+
 class DMChannelMapping(UserMapping): # UserMapping을 상속받아 파일 로드/저장 기능 재활용
     def __init__(self, mapping_file):
         super().__init__(mapping_file)
 
+class DMInfo:
+    """DM 하나의 메타데이터: 참여자 ID, 메시지 수(메인 메시지), 첫/마지막 ts와 해석된 표시 이름"""
+    def __init__(self, dm_id, participants, message_count, first_ts=None, last_ts=None, conv_type="dm_1to1"):
+        self.dm_id = dm_id
+        self.conv_type = conv_type  # 로드할 때 소스가 정한 종류 ("dm_1to1" 또는 "dm_group")
+        self.participants = participants  # 메시지(스레드 답글 포함)를 남긴 사용자 ID의 frozenset
+        self.message_count = message_count
+        self.first_ts = first_ts
+        self.last_ts = last_ts
+        self.display_name = dm_id
+        self.participant_names: List[str] = []
+
+class DMMetadataIndex:
+    """
+    DM별 메타데이터 인덱스. 로드 시 한 번 만들고 새 메시지가 반영되면 바뀐 DM만 다시 계산한다.
+    표시 이름과 참여자 이름은 사용자/DM 매핑 버전이 바뀐 경우에만 다시 해석한다.
+    """
+    def __init__(self, user_mapping: UserMapping, dm_mapping: DMChannelMapping):
+        self.user_mapping = user_mapping
+        self.dm_mapping = dm_mapping
+        self.entries: Dict[str, DMInfo] = {}
+        self._display_to_key: Dict[str, str] = {}
+        self._names_version = None
+
+    @staticmethod
+    def _conversation_info(dm_id, conv) -> DMInfo:
+        participants = set()
+        for msg in conv.iter_all_messages():
+            participants.add(msg.user_id)
+        messages = conv.messages
+        return DMInfo(
+            dm_id,
+            frozenset(participants),
+            len(messages),
+            first_ts=messages[0].ts if messages else None,
+            last_ts=messages[-1].ts if messages else None,
+            conv_type=conv.conv_type,
+        )
+
+    def build(self, dms: Dict[str, 'Conversation']):
+        self.entries = {dm_id: self._conversation_info(dm_id, dms[dm_id]) for dm_id in list(dms)}
+        self._names_version = None
+        return self
+
+    def updated(self, changed: Dict[tuple, 'Conversation']) -> 'DMMetadataIndex':
+        """바뀐 DM만 다시 계산한 새 인덱스를 반환 (changed: (source, 대화 이름) -> 새 Conversation)"""
+        index = DMMetadataIndex(self.user_mapping, self.dm_mapping)
+        index.entries = dict(self.entries)
+        for (source, conv_name), conv in changed.items():
+            if source == "dm":
+                index.entries[conv_name] = self._conversation_info(conv_name, conv)
+        return index
+
+    def _refresh_names(self):
+        names_version = (self.user_mapping.version, self.dm_mapping.version)
+        if self._names_version == names_version:
+            return
+        display_to_key = {}
+        for dm_id, info in sorted(self.entries.items()):
+            if info.conv_type == "dm_group" or dm_id in self.dm_mapping.mapping:
+                # 그룹 DM이거나 DM 매핑에 이름이 있는 경우 (zip의 dms.json/mpims.json으로 만든 참여자 이름 포함)
+                info.display_name = self.dm_mapping.get_name(dm_id)
+            else:  # 1:1 DM인 경우
+                info.display_name = dm_id.split('_')[0] if '_' in dm_id else dm_id
+            info.participant_names = sorted(self.user_mapping.get_name(user_id) for user_id in info.participants)
+            display_to_key[info.display_name] = dm_id
+        self._display_to_key = display_to_key
+        self._names_version = names_version
+
+    def get(self, dm_id) -> Optional[DMInfo]:
+        self._refresh_names()
+        return self.entries.get(dm_id)
+
+    def get_display_to_key(self) -> Dict[str, str]:
+        """표시 이름 -> DM 키"""
+        self._refresh_names()
+        return self._display_to_key
+
+    def get_group_dms(self) -> List[DMInfo]:
+        """그룹 DM(conv_type이 dm_group)의 메타데이터 목록"""
+        self._refresh_names()
+        return [info for _, info in sorted(self.entries.items()) if info.conv_type == "dm_group"]
+
+class ArchiveSnapshot:
+    """
+    아카이브 한 버전의 대화 목록과 조회용 인덱스. 새 메시지를 반영할 때마다 새 스냅샷을 만들어 매니저의 참조 하나만 바꾸므로,
+    스냅샷 하나로 읽으면 대화와 인덱스(posting의 메시지 위치, 종류 비트맵, ts 열)가 항상 같은 버전으로 맞는다.
+    대화는 ConversationStore에 (kind, 대화 이름[, 반영 버전]) 키로 두고 스냅샷은 그 키만 가지므로, 메모리 예산으로 spill된 대화도 같다.
+    공개(publish)한 뒤에는 바꾸지 않는다 (로드 중에는 매니저가 채운다).
+    """
+    def __init__(self, store: ConversationStore, query_cache: QueryResultCache, store_keys: Dict[tuple, Any], user_postings: 'UserPostingIndex',
+                 dm_index: 'DMMetadataIndex', reaction_index: ReactionIndex, file_index: FileIndex, message_kinds: MessageKindIndex,
+                 timeline_index: TimelineIndex, version=0):
+        self.store_keys = store_keys  # (kind, 대화 이름) -> 저장소 키
+        self.channels = ConversationStoreView(store, "channel", store_keys)
+        self.dms = ConversationStoreView(store, "dm", store_keys)
+        self.query_cache = query_cache  # 매니저와 공유 (키에 버전이 있으므로 스냅샷 사이에서 섞이지 않음)
+        self.user_postings = user_postings
+        self.dm_index = dm_index
+        self.reaction_index = reaction_index  # 이모지별 posting list와 메시지별 리액션 수 열
+        self.file_index = file_index  # 첨부 파일 메타데이터 옆 테이블 (종류/이름 토큰/기간으로 필터)
+        self.message_kinds = message_kinds  # 대화별 subtype 열과 사람/봇/시스템 비트맵
+        self.timeline_index = timeline_index  # 대화별 메인 메시지 ts 열 (전체 타임라인을 대화를 불러오지 않고 합침)
+        self.version = version  # 새 메시지가 반영될 때마다 증가 (버전별 캐시 무효화용)
+
+    def get_conversation_store(self, source):
+        return self.channels if source == "channel" else self.dms
+
+    def get_conversation(self, source, conv_name):
+        return self.get_conversation_store(source).get(conv_name)
+
+    def query_conversation(self, source, conv_name, keyword=None, start_ts=None, end_ts=None, categories=None) -> List[Message]:
+        """
+        대화의 메인 메시지 중 키워드를 포함하고 [start_ts, end_ts) 기간에 속하는 메시지 목록.
+        categories(예: ("human",))를 주면 그 분류의 메시지만, 종류 비트맵으로 먼저 거른 뒤 키워드를 확인한다.
+        결과는 메시지 인덱스 목록으로 (아카이브 버전, 대화, 검색어, 기간, 분류) 키에 캐시하므로
+        같은 조회를 반복하면 다시 훑지 않고, 새 메시지가 반영되면 자동으로 새로 계산된다.
+        """
+        conv = self.get_conversation(source, conv_name)
+        if conv is None:
+            return []
+
+        def compute():
+            lo = 0 if start_ts is None else conv.bisect_ts(start_ts)
+            hi = len(conv.messages) if end_ts is None else conv.bisect_ts(end_ts)
+            if categories is None:
+                candidates = range(lo, max(lo, hi))
+            else:
+                candidates = self.message_kinds.get(source, conv_name, conv).select(lo, hi, categories).tolist()
+            if not keyword:
+                return candidates
+            lowered = keyword.lower()
+            return [i for i in candidates if lowered in conv.messages[i].text.lower()]
+
+        categories = tuple(sorted(categories)) if categories is not None else None
+        indexes = self.query_cache.get_or_compute((self.version, source, conv_name, keyword or "", start_ts, end_ts, categories), compute)
+        messages = conv.messages
+        return [messages[i] for i in indexes]
+
+    def iter_timeline(self, start_ts=None, reverse=False, categories=None):
+        """
+        모든 채널/DM의 메인 메시지를 ts 순으로 합친 타임라인을 posting으로 하나씩 생성.
+        항상 메모리에 있는 대화별 ts 열(timeline_index)을 이진 탐색으로 시작 위치부터 읽어 heap으로 k-way merge하므로
+        전체 목록을 만들지 않고 대화도 불러오지 않는다 (메모리 예산으로 spill된 대화는 페이지에 들어갈 때만 불러옴).
+        reverse=False면 start_ts 이상을 오름차순, True면 start_ts 이하를 내림차순으로.
+        categories를 주면 대화별 종류 비트맵으로 그 분류의 메시지만 남긴다.
+        """
+        return self.timeline_index.iter_postings(start_ts, reverse=reverse, categories=categories, message_kinds=self.message_kinds)
+
+    def get_timeline_page(self, cursor, page_size, reverse=False, categories=None):
+        """
+        cursor(posting 또는 ts)의 다음(reverse면 이전) page_size개 posting.
+        cursor가 posting이면 그 posting 자체는 제외하여 같은 ts의 메시지가 페이지 경계에서 빠지거나 겹치지 않게 한다.
+        반환 목록은 항상 ts 오름차순.
+        """
+        if isinstance(cursor, tuple):
+            stream = self.iter_timeline(cursor[0], reverse=reverse, categories=categories)
+            stream = (posting for posting in stream if (posting < cursor if reverse else posting > cursor))
+        else:
+            stream = self.iter_timeline(cursor, reverse=reverse, categories=categories)
+        page = list(itertools.islice(stream, page_size))
+        return page[::-1] if reverse else page
+
+    def resolve_posting(self, posting) -> Message:
+        """posting (ts, source, 대화 이름, 메시지 인덱스, 답글 인덱스)에 해당하는 메시지"""
+        _, source, conv_name, msg_index, reply_index = posting
+        msg = self.get_conversation(source, conv_name).messages[msg_index]
+        return msg if reply_index < 0 else msg.replies[reply_index]
+
+    def get_channel_names(self):
+        return sorted(list(self.channels.keys()))
+
+    def get_dm_names(self):
+        return sorted(list(self.dms.keys()))
+
+
 class SlackArchiveManager:
-    def __init__(self, channel_root, dm_root, user_mapping: UserMapping, dm_mapping: Optional['DMChannelMapping'] = None):
+    def __init__(self, channel_root, dm_root, user_mapping: UserMapping, dm_mapping: Optional['DMChannelMapping'] = None,
+                 memory_budget_bytes=0, spill_dir=None, query_cache_entries=256, text_block_size=0, track_footprint=True,
+                 read_workers=16, read_ahead_files=64):
         self.channel_root = channel_root
         self.dm_root = dm_root
         self.user_mapping = user_mapping
         self.dm_mapping = dm_mapping if dm_mapping is not None else DMChannelMapping(os.path.join(os.path.dirname(user_mapping.mapping_file), "dm_mapping.json"))
-        self.channels: Dict[str, Conversation] = {}
-        self.dms: Dict[str, Conversation] = {}
+        # memory_budget_bytes가 0이 아니면 예산을 넘는 대화는 LRU로 spill_dir에 내보냈다가 접근 시 다시 불러옴
+        self.conversation_store = ConversationStore(memory_budget_bytes, spill_dir, on_load=self._on_conversation_load)
+        self.load_diagnostics = LoadDiagnostics()  # 파일별 로드 시간/크기/오류와 격리 목록
+        self.query_cache = QueryResultCache(query_cache_entries)  # (버전, 대화, 검색어, 기간) -> 메시지 인덱스 목록
+        # 대화 목록, 인덱스, 버전은 현재 스냅샷 하나에 두고 반영할 때 이 참조만 바꾼다 (channels, user_postings 등은 스냅샷의 것)
+        self.snapshot = ArchiveSnapshot(self.conversation_store, self.query_cache, {}, UserPostingIndex(),
+                                        DMMetadataIndex(self.user_mapping, self.dm_mapping), ReactionIndex(), FileIndex(),
+                                        MessageKindIndex(), TimelineIndex())
+        self.text_block_size = text_block_size  # 0이 아니면 메시지 텍스트를 이 개수 단위 블록으로 압축해 보관
+        self.track_footprint = track_footprint
+        self.read_workers = read_workers  # day-file을 동시에 읽을 스레드 수
+        self.read_ahead_files = read_ahead_files  # 읽는 중이거나 읽었지만 아직 파싱하지 않은 day-file 수 상한
+        self.footprints: Dict[tuple, ConversationFootprint] = {}  # (kind, 대화 이름) -> 로드 시 잰 메모리 사용량
+        self.user_stats_version = None  # user_mapping.user_stats를 계산한 아카이브 버전
+        # 로드마다 다른 값. 아카이브를 다시 로드하면 version이 0부터 다시 시작하므로 (load_id, version)으로 캐시를 구분
+        self.load_id = uuid.uuid4().hex
+
+    def __setstate__(self, state):
+        # warm-up 산출물이나 작업 프로세스에서 받은 매니저도 새로 로드한 것으로 취급
+        self.__dict__.update(state)
+        self.load_id = uuid.uuid4().hex
+
+    channels = property(lambda self: self.snapshot.channels)
+    dms = property(lambda self: self.snapshot.dms)
+    user_postings = property(lambda self: self.snapshot.user_postings)
+    dm_index = property(lambda self: self.snapshot.dm_index)
+    reaction_index = property(lambda self: self.snapshot.reaction_index)
+    file_index = property(lambda self: self.snapshot.file_index)
+    message_kinds = property(lambda self: self.snapshot.message_kinds)
+    timeline_index = property(lambda self: self.snapshot.timeline_index)
+    version = property(lambda self: self.snapshot.version)
 
     def _parse_message(self, msg_data: Dict[str, Any]) -> Optional[Message]:
         if 'ts' not in msg_data:
@@ -140,57 +544,271 @@ class SlackArchiveManager:
             thread_ts=msg_data.get('thread_ts'),
             blocks=msg_data.get('blocks'),
             reactions=msg_data.get('reactions'),
-            replies=replies
+            replies=replies,
+            edited_ts=(msg_data.get('edited') or {}).get('ts'),
+            files=self._parse_files(msg_data.get('files')),
+            # 종류가 많지 않으므로 같은 문자열 객체를 공유
+            subtype=sys.intern(msg_data['subtype']) if isinstance(msg_data.get('subtype'), str) else None,
+            bot_id=sys.intern(msg_data['bot_id']) if isinstance(msg_data.get('bot_id'), str) else None
         )
 
-    def load_channels(self):
+    @staticmethod
+    def _parse_files(files_data) -> Optional[List[tuple]]:
+        """첨부 파일에서 목록/검색에 필요한 메타데이터만 (이름, 제목, 종류, 크기)로 남김"""
+        if not isinstance(files_data, list):
+            return None
+        files = []
+        for file_data in files_data:
+            if not isinstance(file_data, dict) or file_data.get('mode') == 'tombstone':  # 삭제된 파일
+                continue
+            name = file_data.get('name') or file_data.get('title') or file_data.get('id') or ''
+            filetype = file_data.get('filetype') or os.path.splitext(name)[1][1:].lower() or 'unknown'
+            files.append((name, file_data.get('title') or '', filetype, int(file_data.get('size') or 0)))
+        return files or None
+
+    def _parse_messages(self, messages_data: List[Dict[str, Any]]) -> List[Message]:
+        messages = []
+        for msg_data in messages_data:
+            message = self._parse_message(msg_data)
+            if message:
+                messages.append(message)
+        return messages
+
+    def load_channels(self, max_workers=None):
         if not os.path.isdir(self.channel_root):
             print(f"경고: 채널 데이터 경로를 찾을 수 없습니다: {self.channel_root}")
             return
+        self._load_directory("channel", max_workers)
 
-        for channel_dir in glob.glob(os.path.join(self.channel_root, '*')):
-            if os.path.isdir(channel_dir):
-                channel_name = os.path.basename(channel_dir)
-                conv = Conversation(name=channel_name, conv_type="channel")
-                for json_file in glob.glob(os.path.join(channel_dir, '*.json')):
-                    try:
-                        with open(json_file, 'r', encoding='utf-8') as f:
-                            messages_data = json.load(f)
-                            for msg_data in messages_data:
-                                message = self._parse_message(msg_data)
-                                if message:
-                                    conv.add_message(message)
-                    except json.JSONDecodeError as e:
-                        print(f"경고: {json_file} 파일 파싱 오류: {e}")
-                    except Exception as e:
-                        print(f"경고: {json_file} 파일 읽기 오류: {e}")
-                conv.sort_messages()
-                self.channels[channel_name] = conv
-
-    def load_dms(self):
+    def load_dms(self, max_workers=None):
         if not os.path.isdir(self.dm_root):
             print(f"경고: DM 데이터 경로를 찾을 수 없습니다: {self.dm_root}")
             return
+        self._load_directory("dm", max_workers)
 
-        for json_file in glob.glob(os.path.join(self.dm_root, '*.json')):
-            dm_id = os.path.splitext(os.path.basename(json_file))[0]
-            conv = Conversation(name=dm_id, conv_type="dm_group" if dm_id.startswith('C') else "dm_1to1")
-            try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    messages_data = json.load(f)
-                    for msg_data in messages_data:
-                        message = self._parse_message(msg_data)
-                        if message:
-                            conv.add_message(message)
-            except json.JSONDecodeError as e:
-                print(f"경고: {json_file} 파일 파싱 오류: {e}")
-            except Exception as e:
-                print(f"경고: {json_file} 파일 읽기 오류: {e}")
-            conv.sort_messages()
-            self.dms[dm_id] = conv
+    def _load_directory(self, kind, max_workers=None):
+        """channel_root/dm_root에서 한 종류(kind)의 대화를 파일 단위로 미리 읽으며 로드 (파일별 진단 기록 포함)"""
+        source = DirectoryArchiveSource(self.channel_root, self.dm_root)
+        conversation_files = {key: members for key, members in source.conversation_files().items() if key[0] == kind}
+        for (_, conv_name, conv_type), messages in self._parse_source_files(source, conversation_files, max_workers).items():
+            conv = Conversation(name=conv_name, conv_type=conv_type)
+            conv.messages = messages
+            self.get_conversation_store(kind)[conv_name] = conv
+
+    def _on_conversation_load(self, conv):
+        # 메모리에서 내보낸 동안 매핑이 바뀌었을 수 있으므로 다시 불러올 때 표시 이름을 갱신
+        conv.refresh_display_names(self.user_mapping)
+
+    def prepare_conversation(self, conv: Conversation):
+        """새로 로드/병합한 대화에 표시 필드를 계산하고, 설정된 경우 텍스트를 압축하고 메모리 사용량을 잰다"""
+        conv.precompute_display_fields(self.user_mapping)
+        if self.text_block_size:
+            conv.compress_text(block_size=self.text_block_size)
+        if self.track_footprint:
+            kind = "channel" if conv.conv_type == "channel" else "dm"
+            self.footprints[(kind, conv.name)] = measure_conversation(kind, conv)
+
+    def build_indexes(self):
+        """로드가 끝난 뒤 조회용 인덱스를 한 번에 생성"""
+        for conversations in (self.channels, self.dms):
+            for conv_name in list(conversations):
+                conv = conversations[conv_name]
+                self.prepare_conversation(conv)
+                conversations[conv_name] = conv  # 표시 필드/압축이 반영된 크기로 다시 측정
+        self.user_postings.build(self.channels, self.dms)
+        self.dm_index.build(self.dms)
+        self.reaction_index.build(self.channels, self.dms)
+        self.file_index.build(self.channels, self.dms)
+        self.message_kinds.build(self.channels, self.dms)
+        self.timeline_index.build(self.channels, self.dms)
+
+    def build_user_stats(self):
+        """사용자별 메시지 수/참여 대화 통계를 현재 아카이브 버전 기준으로 계산 (이미 계산한 버전이면 건너뜀)"""
+        version = self.version
+        if self.user_stats_version != version:
+            self.user_mapping.collect_user_stats(self.channels, self.dms)
+            self.user_stats_version = version
+
+    def publish_conversations(self, changed: Dict[tuple, Conversation]):
+        """
+        새로 파싱/병합한 대화들을 한 번에 반영하고 아카이브 버전을 올린다.
+        changed: (source, 대화 이름) -> 표시 필드까지 계산된 새 Conversation
+        바뀐 대화는 새 저장소 키로 넣고 인덱스와 함께 새 스냅샷을 만든 뒤 스냅샷 참조 하나만 바꾸므로, 읽는 쪽은
+        이전 버전 전체나 새 버전 전체만 본다. 교체된 대화는 이전 스냅샷을 잡고 있던 읽기가 끝나(스냅샷이 사라지면) 저장소에서 지운다.
+        """
+        snapshot = self.snapshot
+        version = snapshot.version + 1
+        store_keys = dict(snapshot.store_keys)
+        for (source, conv_name), conv in changed.items():
+            store_keys[(source, conv_name)] = (source, conv_name, version)
+            self.conversation_store[store_keys[(source, conv_name)]] = conv
+        self.snapshot = ArchiveSnapshot(
+            self.conversation_store, self.query_cache, store_keys,
+            snapshot.user_postings.updated(changed),
+            snapshot.dm_index.updated(changed),
+            snapshot.reaction_index.updated(changed),
+            snapshot.file_index.updated(changed),
+            snapshot.message_kinds.updated(changed),
+            snapshot.timeline_index.updated(changed),
+            version,
+        )
+        weakref.finalize(snapshot, self.conversation_store.retire, [snapshot.store_keys[key] for key in changed if key in snapshot.store_keys])
+
+    def update_user_name(self, user_id, new_name):
+        """사용자 매핑을 저장하고, 해당 사용자의 메시지 표시 이름만 갱신"""
+        self.user_mapping.update_mapping(user_id, new_name)
+        snapshot = self.snapshot
+        for posting in snapshot.user_postings.postings.get(user_id, []):
+            # 메모리에 없는 대화는 다시 불러올 때 갱신되므로 건너뜀
+            if snapshot.get_conversation_store(posting[1]).is_resident(posting[2]):
+                snapshot.resolve_posting(posting).display_name = new_name
+
+    def reload_mappings(self):
+        """
+        사용자/DM 매핑 파일을 다시 읽고 메모리에 있는 대화의 표시 이름을 갱신.
+        warm-up 산출물처럼 저장해 둔 매니저를 불러오면 그 뒤에 바뀐 매핑이 빠져 있으므로, 다음 이름 변경이 오래된 매핑으로
+        파일을 덮어쓰지 않도록 불러온 직후 호출한다. 매핑 버전이 올라가므로 DM 이름과 렌더링 캐시도 다시 계산된다.
+        """
+        self.user_mapping.reload()
+        self.dm_mapping.reload()
+        snapshot = self.snapshot
+        for source in ("channel", "dm"):
+            store = snapshot.get_conversation_store(source)
+            for conv_name in list(store):
+                # 메모리에 없는 대화는 다시 불러올 때 갱신되므로 건너뜀
+                if store.is_resident(conv_name):
+                    store[conv_name].refresh_display_names(self.user_mapping)
+
+    def get_conversation_store(self, source):
+        return self.snapshot.get_conversation_store(source)
+
+    def get_conversation(self, source, conv_name):
+        return self.snapshot.get_conversation(source, conv_name)
+
+    def query_conversation(self, source, conv_name, keyword=None, start_ts=None, end_ts=None, categories=None) -> List[Message]:
+        return self.snapshot.query_conversation(source, conv_name, keyword, start_ts, end_ts, categories)
+
+    def iter_timeline(self, start_ts=None, reverse=False, categories=None):
+        return self.snapshot.iter_timeline(start_ts, reverse=reverse, categories=categories)
+
+    def get_timeline_page(self, cursor, page_size, reverse=False, categories=None):
+        return self.snapshot.get_timeline_page(cursor, page_size, reverse=reverse, categories=categories)
+
+    def resolve_posting(self, posting) -> Message:
+        return self.snapshot.resolve_posting(posting)
 
     def get_channel_names(self):
-        return sorted(list(self.channels.keys()))
+        return self.snapshot.get_channel_names()
 
     def get_dm_names(self):
-        return sorted(list(self.dms.keys()))
\ No newline at end of file
+        return self.snapshot.get_dm_names()
+
+    def get_cache_stats(self):
+        return self.conversation_store.get_stats()
+
+    def _parse_source_files(self, source, conversation_files, max_workers=None) -> Dict[Any, List[Message]]:
+        """
+        소스의 day-file들을 읽어 파싱하여 대화별로 ts 정렬된 메시지 목록을 반환.
+        읽기는 read_ahead로 최대 read_ahead_files개까지 미리 읽어 두고(max_workers가 없으면 read_workers개 스레드),
+        호출한 스레드 하나가 읽기가 끝난 원본 바이트부터 순서대로 파싱하므로 파일당 지연이 큰 네트워크 저장소에서도 읽기와 파싱이 겹친다.
+        (json.loads와 Message 생성은 GIL을 놓지 않아 스레드로 나눠도 빨라지지 않으므로 파싱 자체는 병렬로 하지 않는다)
+        conversation_files: (kind, 대화 키, conv_type) -> 멤버 목록
+        파일마다 소요 시간, 크기, 메시지 수를 load_diagnostics에 기록하고, 실패한 파일은 격리 목록에 넣는다.
+        """
+        parsed = {key: [] for key in conversation_files}
+        # 대화 단위가 아니라 파일 단위로 읽어야 작은 대화가 많아도 읽기 동시성이 유지됨
+        files = ((key, member) for key, members in conversation_files.items() for member in members)
+        for (key, member), read, error, read_seconds in read_ahead(
+                lambda file: self._read_member(source, file[1]), files,
+                readers=max_workers or self.read_workers, max_in_flight=self.read_ahead_files):
+            started = time.perf_counter()
+            fingerprint, data = read or (None, None)
+            messages = []
+            if error is not None:
+                print(f"경고: {member} 파일 읽기 오류: {error}")
+            else:
+                try:
+                    messages = self._parse_messages(json.loads(data))
+                except json.JSONDecodeError as e:
+                    print(f"경고: {member} 파일 파싱 오류: {e}")
+                    error = e
+                except Exception as e:
+                    print(f"경고: {member} 파일 읽기 오류: {e}")
+                    error = e
+            self.load_diagnostics.record(FileLoadRecord(
+                member, key, source.spec, read_seconds + time.perf_counter() - started, len(data or b""), len(messages),
+                error_class=type(error).__name__ if error is not None else None,
+                error_message=str(error) if error is not None else None,
+                fingerprint=fingerprint,
+            ))
+            parsed[key].extend(messages)
+        for messages in parsed.values():
+            messages.sort(key=lambda msg: msg.ts)
+        return parsed
+
+    @staticmethod
+    def _read_member(source, member):
+        """(읽기 직전의 fingerprint, 원본 바이트). fingerprint를 먼저 재므로 읽는 도중에 바뀐 파일은 감시 스레드가 다시 읽는다"""
+        fingerprint = source.fingerprint(member)
+        return fingerprint, source.read_bytes(member)
+
+    def retry_quarantined(self, max_workers=None) -> int:
+        """
+        격리된 파일만 다시 파싱하여 해당 대화에 합치고 새 버전으로 반영.
+        반환값: 이번에 성공한 파일 수
+        """
+        from archive_merge import merge_message_lists  # archive_merge가 이 모듈을 import하므로 여기서 import
+
+        changed = {}
+        recovered = 0
+        for source_spec, conversation_files in self.load_diagnostics.quarantined_files().items():
+            try:
+                source = source_from_spec(source_spec)
+            except Exception as e:
+                print(f"경고: {source_spec[1]} 소스를 열 수 없습니다: {e}")
+                continue
+            with source:
+                parsed = self._parse_source_files(source, conversation_files, max_workers)
+            recovered += sum(
+                1 for members in conversation_files.values() for member in members
+                if member not in self.load_diagnostics.quarantine
+            )
+            for (kind, conv_name, conv_type), messages in parsed.items():
+                if not messages:
+                    continue
+                existing = changed.get((kind, conv_name)) or self.get_conversation(kind, conv_name)
+                conv = Conversation(name=conv_name, conv_type=conv_type)
+                # 다른 아카이브 루트에서 이미 병합된 같은 ts 메시지는 중복으로 넣지 않고 수정 시각이 최근인 쪽을 남김
+                conv.messages = merge_message_lists([list(existing.messages) if existing else [], messages])
+                changed[(kind, conv_name)] = conv
+        for conv in changed.values():
+            self.prepare_conversation(conv)
+        if changed:
+            self.publish_conversations(changed)
+        return recovered
+
+    def load_zip(self, zip_path, max_workers=None):
+        """
+        압축을 풀지 않고 Slack 내보내기 zip에서 채널/DM을 로드.
+        day-file은 read_ahead 스레드들이 필요할 때 압축 해제하여 미리 읽어 두고 호출한 스레드가 순서대로 파싱하며,
+        zip의 users.json/dms.json/mpims.json으로 사용자/DM 매핑을 한 번에 채운다.
+        """
+        if not os.path.isfile(zip_path):
+            print(f"경고: 내보내기 zip 파일을 찾을 수 없습니다: {zip_path}")
+            return
+        try:
+            source = ZipArchiveSource(zip_path)
+        except zipfile.BadZipFile as e:
+            print(f"경고: {zip_path} zip 파일 읽기 오류: {e}")
+            return
+
+        with source:
+            self.user_mapping.update_mappings(source.user_names())
+            self.dm_mapping.update_mappings(source.dm_names(self.user_mapping.mapping))
+
+            parsed = self._parse_source_files(source, source.conversation_files(), max_workers)
+            for (kind, conv_name, conv_type), messages in parsed.items():
+                conv = Conversation(name=conv_name, conv_type=conv_type)
+                conv.messages = messages
+                target = self.channels if kind == "channel" else self.dms
+                target[conv_name] = conv
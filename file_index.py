@@ -0,0 +1,154 @@
+import bisect
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_NAME_TOKEN_PATTERN = re.compile(r"[0-9a-z가-힣]+")
+
+
+def name_tokens(text: str) -> List[str]:
+    """파일 이름/제목을 소문자 영문·숫자·한글 단위로 나눔 (report_2024-03.pdf -> report, 2024, 03, pdf)"""
+    return _NAME_TOKEN_PATTERN.findall(text.lower())
+
+
+class FileIndex:
+    """
+    첨부 파일 메타데이터 옆 테이블. 파일 하나가 ts 순 행 하나이고, 행별 열(posting, ts, 크기, 종류/대화/사용자 번호, 이름, 제목)을 가진다.
+    종류별 행 목록은 (종류, 행) 순으로 정렬한 배열의 구간이고, 이름 토큰은 정렬된 토큰 목록에서 접두어 구간을 찾아
+    행 배열을 합친다. 기간은 ts 열에 대한 이진 탐색이므로 전체 아카이브에 대한 필터가 메시지를 읽지 않고 끝난다.
+    """
+    def __init__(self):
+        # (source, 대화 이름) -> [(posting, 사용자, (이름, 제목, 종류, 크기))]. 일부 대화만 바뀌면 이 항목만 교체해 다시 만든다
+        self.entries: Dict[tuple, List[tuple]] = {}
+        self.conversations: List[Tuple[str, str]] = []
+        self.types: List[str] = []
+        self.type_code: Dict[str, int] = {}
+        self.users: List[str] = []
+        self.user_code: Dict[str, int] = {}
+        self.postings: List[tuple] = []  # 행 -> posting (ts, source, 대화 이름, 메시지 인덱스, 답글 인덱스)
+        self.names: List[str] = []
+        self.titles: List[str] = []
+        self.row_ts = np.array([], dtype=np.float64)
+        self.row_size = np.array([], dtype=np.int64)
+        self.row_type = np.array([], dtype=np.int32)
+        self.row_conversation = np.array([], dtype=np.int32)
+        self.row_user = np.array([], dtype=np.int32)
+        self.type_rows = np.array([], dtype=np.int32)  # (종류, 행) 순으로 정렬한 행 번호
+        self.type_offsets = np.zeros(1, dtype=np.int64)  # 종류 번호 -> type_rows에서의 시작 위치
+        self.tokens: List[str] = []  # 정렬된 이름 토큰
+        self.token_rows: List[np.ndarray] = []  # 토큰 -> 행 번호 배열
+
+    @staticmethod
+    def _conversation_entries(source, conv_name, conv):
+        entries = []
+        for msg_index, msg in enumerate(conv.messages):
+            items = [((msg.ts, source, conv_name, msg_index, -1), msg)]
+            items.extend(((reply.ts, source, conv_name, msg_index, reply_index), reply) for reply_index, reply in enumerate(msg.replies))
+            for posting, item in items:
+                for file_meta in getattr(item, "files", None) or []:
+                    entries.append((posting, item.user_id, file_meta))
+        return entries
+
+    def _set_entries(self, entries):
+        self.entries = entries
+        self.conversations = sorted(conv for conv, conv_entries in entries.items() if conv_entries)
+        conversation_code = {conv: code for code, conv in enumerate(self.conversations)}
+        rows = sorted(entry for conv_entries in entries.values() for entry in conv_entries)
+        self.types = sorted({file_meta[2] for _, _, file_meta in rows})
+        self.type_code = {filetype: code for code, filetype in enumerate(self.types)}
+        self.users = sorted({user_id for _, user_id, _ in rows})
+        self.user_code = {user_id: code for code, user_id in enumerate(self.users)}
+
+        self.postings = [posting for posting, _, _ in rows]
+        self.names = [file_meta[0] for _, _, file_meta in rows]
+        self.titles = [file_meta[1] for _, _, file_meta in rows]
+        self.row_ts = np.array([posting[0] for posting in self.postings], dtype=np.float64)
+        self.row_size = np.array([file_meta[3] for _, _, file_meta in rows], dtype=np.int64)
+        self.row_type = np.array([self.type_code[file_meta[2]] for _, _, file_meta in rows], dtype=np.int32)
+        self.row_conversation = np.array([conversation_code[(posting[1], posting[2])] for posting in self.postings], dtype=np.int32)
+        self.row_user = np.array([self.user_code[user_id] for _, user_id, _ in rows], dtype=np.int32)
+
+        # 종류별 행: 안정 정렬이므로 같은 종류 안에서는 ts 순
+        self.type_rows = np.argsort(self.row_type, kind="stable").astype(np.int32)
+        self.type_offsets = np.searchsorted(self.row_type[self.type_rows], np.arange(len(self.types) + 1)).astype(np.int64)
+
+        token_rows = {}
+        for row, (name, title) in enumerate(zip(self.names, self.titles)):
+            for token in set(name_tokens(name)) | set(name_tokens(title)):
+                token_rows.setdefault(token, []).append(row)
+        self.tokens = sorted(token_rows)
+        self.token_rows = [np.array(token_rows[token], dtype=np.int32) for token in self.tokens]
+        return self
+
+    def build(self, channels: Dict[str, 'Conversation'], dms: Dict[str, 'Conversation']):
+        entries = {}
+        for source, conversations in (("channel", channels), ("dm", dms)):
+            for conv_name in list(conversations):
+                entries[(source, conv_name)] = self._conversation_entries(source, conv_name, conversations[conv_name])
+        return self._set_entries(entries)
+
+    def updated(self, changed: Dict[tuple, 'Conversation']) -> 'FileIndex':
+        """일부 대화가 바뀐 새 인덱스를 반환 (바뀌지 않은 대화는 다시 읽지 않음)"""
+        entries = dict(self.entries)
+        for (source, conv_name), conv in changed.items():
+            entries[(source, conv_name)] = self._conversation_entries(source, conv_name, conv)
+        return FileIndex()._set_entries(entries)
+
+    def type_counts(self) -> List[Tuple[str, int]]:
+        """종류별 파일 수 (많은 순)"""
+        counts = np.diff(self.type_offsets).tolist()
+        return sorted(zip(self.types, counts), key=lambda item: (-item[1], item[0]))
+
+    def _prefix_rows(self, prefix) -> np.ndarray:
+        """prefix로 시작하는 이름 토큰이 있는 행"""
+        lo = bisect.bisect_left(self.tokens, prefix)
+        hi = bisect.bisect_left(self.tokens, prefix + "\U0010ffff")
+        if lo == hi:
+            return np.array([], dtype=np.int32)
+        return np.unique(np.concatenate(self.token_rows[lo:hi]))
+
+    def search(self, query: str = "", types: Optional[Sequence[str]] = None,
+               conversations: Optional[Sequence[Tuple[str, str]]] = None, user_id: Optional[str] = None,
+               start_ts=None, end_ts=None, limit=200) -> Tuple[int, List[int]]:
+        """
+        조건에 맞는 파일 행. query의 단어마다 그 단어로 시작하는 이름/제목 토큰이 있어야 한다.
+        반환: (전체 개수, 최신순 행 번호 최대 limit개)
+        """
+        mask = np.zeros(len(self.postings), dtype=bool)
+        lo = 0 if start_ts is None else int(np.searchsorted(self.row_ts, start_ts, side="left"))
+        hi = len(self.row_ts) if end_ts is None else int(np.searchsorted(self.row_ts, end_ts, side="left"))
+        mask[lo:max(lo, hi)] = True
+        if types is not None:
+            type_mask = np.zeros(len(self.postings), dtype=bool)
+            for filetype in types:
+                code = self.type_code.get(filetype)
+                if code is not None:
+                    type_mask[self.type_rows[self.type_offsets[code]:self.type_offsets[code + 1]]] = True
+            mask &= type_mask
+        for word in name_tokens(query):
+            word_mask = np.zeros(len(self.postings), dtype=bool)
+            word_mask[self._prefix_rows(word)] = True
+            mask &= word_mask
+        if conversations is not None:
+            selected = set(conversations)
+            mask &= np.isin(self.row_conversation, [code for code, conv in enumerate(self.conversations) if conv in selected])
+        if user_id is not None:
+            mask &= self.row_user == self.user_code.get(user_id, -1)
+        rows = np.flatnonzero(mask)
+        return len(rows), rows[::-1][:limit].tolist()
+
+    def get_row(self, row) -> Dict[str, object]:
+        """행 하나의 메타데이터"""
+        posting = self.postings[row]
+        return {
+            "posting": posting,
+            "ts": posting[0],
+            "source": posting[1],
+            "conversation": posting[2],
+            "name": self.names[row],
+            "title": self.titles[row],
+            "type": self.types[self.row_type[row]],
+            "size": int(self.row_size[row]),
+            "user_id": self.users[self.row_user[row]],
+        }
@@ -0,0 +1,253 @@
+"""
+데이터 웨어하우스 동기화를 위한 증분 내보내기.
+
+    python incremental_export.py          # configs/config.yaml의 워크스페이스마다 새/수정 메시지만 JSONL 배치로 기록
+
+새로 생기거나 수정된 메시지와 스레드 답글만 내보낸다. day-file의 fingerprint 색인으로 바뀐 파일만 다시 파싱하고,
+바뀐 파일은 그 대화의 상태 조각에 기록한 파일별 메시지 키(ts)와 수정 시각(edited.ts)과 비교해 차집합만 내보낸다.
+따라서 이미 내보낸 파일 중간에 끼워 넣어진 과거 ts의 메시지도 빠지지 않으며, 읽고 쓰는 상태도 바뀐 대화의 것뿐이라
+실행 시간은 아카이브 크기가 아니라 변경량에 비례한다.
+"""
+import hashlib
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+from archive_sources import ZipArchiveSource, DirectoryArchiveSource, open_archive_source
+from data_models import Message, UserMapping, SlackArchiveManager
+from message_kinds import ConversationKinds, message_category
+from redaction import Redactor, build_redactor
+from workspaces import workspace_specs_from_config
+
+
+def _write_atomic(path, text):
+    # 임시 파일에 쓴 뒤 교체하여 중간에 중단되어도 이전 파일이 유지되도록 함
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _change_ts(msg: Message) -> float:
+    """메시지가 마지막으로 생기거나 바뀐 시각"""
+    return max(msg.ts, msg.edited_ts or 0.0)
+
+
+class IncrementalExporter:
+    """
+    워크스페이스 하나의 증분 내보내기.
+
+    state_dir에는 batch_000001.jsonl 형식의 배치 파일과 다음 상태를 둔다.
+    - state.json: 다음 배치 번호
+    - conversations/<대화 키 해시>.json: 대화별 상태 조각 (watermark, 파일별 fingerprint와 메시지 키 -> 수정 시각, 마지막으로 기록한 배치 번호 구간)
+    - fingerprints.json: 모든 day-file의 fingerprint 색인 (바뀐 파일 후보를 고르는 용도, 실행이 끝날 때 한 번 저장)
+    대화 하나씩 배치 파일 -> 그 대화의 상태 조각 -> state.json 순으로 저장하므로 배치는 대화 하나의 변경분만 담는다.
+    도중에 중단되면 다음 실행이 next_batch 뒤에 남은 배치 파일을 보고, 상태 조각까지 저장된 대화면 번호만 넘기고
+    아니면 그 배치를 지운 뒤 같은 번호로 다시 기록하므로 같은 레코드가 두 번 나오지 않는다 (재시작 가능, 멱등).
+    레코드를 id(source/대화/ts)로 upsert하면 수정된 메시지도 반영된다.
+    categories(예: ["human"])를 주면 그 분류의 메시지/답글만 내보낸다.
+    redaction(설정의 redaction 항목)을 주면 사용자와 본문을 익명화해 내보낸다 (가명 파일을 공유하므로 배치 사이에서 가명이 같다).
+    이전 형식의 export_state.json이 있으면 읽기 전용으로 두고, 상태 조각이 없는 대화와 파일은 그 값으로 판단한다.
+    """
+    STATE_FILE = "state.json"
+    FINGERPRINT_FILE = "fingerprints.json"
+    CONVERSATION_DIR = "conversations"
+    LEGACY_STATE_FILE = "export_state.json"
+
+    def __init__(self, spec: Dict[str, Any], state_dir, batch_records=5000, categories: Optional[List[str]] = None,
+                 redaction: Optional[Dict[str, Any]] = None):
+        self.spec = spec
+        self.state_dir = state_dir
+        self.batch_records = batch_records
+        self.categories = categories
+        self.redaction = redaction
+        self.state_path = os.path.join(state_dir, self.STATE_FILE)
+        self.fingerprint_path = os.path.join(state_dir, self.FINGERPRINT_FILE)
+
+    @staticmethod
+    def _read_json(path, default):
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return default
+
+    def _batch_path(self, number) -> str:
+        return os.path.join(self.state_dir, f"batch_{number:06d}.jsonl")
+
+    def _shard_path(self, key) -> str:
+        # 대화 키(DM 키)에는 사용자 이름이 들어 있을 수 있으므로 파일 이름은 해시로
+        return os.path.join(self.state_dir, self.CONVERSATION_DIR, f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json")
+
+    def _load_shard(self, key, legacy) -> Dict[str, Any]:
+        return self._read_json(self._shard_path(key), None) or {
+            "key": key, "watermark": (legacy.get("watermarks") or {}).get(key, 0.0), "files": {}, "batches": None}
+
+    @staticmethod
+    def _file_state(shard, member, legacy) -> Optional[Dict[str, Any]]:
+        """파일의 지난 상태 {"fingerprint", "messages"(메시지 키 -> 수정 시각, 모르면 None)}. 처음 보는 파일이면 None"""
+        if member in shard["files"]:
+            return shard["files"][member]
+        fingerprint = (legacy.get("fingerprints") or {}).get(member)
+        if fingerprint is None:
+            return None
+        return {"fingerprint": fingerprint, "messages": (legacy.get("messages") or {}).get(member)}
+
+    def _recover(self, state):
+        """
+        지난 실행이 대화를 기록하던 중 중단되어 next_batch 뒤에 남은 배치 파일을 정리. 상태 조각에 그 번호가 기록된 대화는
+        저장이 끝난 것이므로 번호를 넘기고, 아니면 다시 내보낼 것이므로 지운다 (한 번에 대화 하나씩 기록하므로 남은 배치는 한 대화의 것).
+        """
+        number = state["next_batch"]
+        while os.path.exists(self._batch_path(number)):
+            with open(self._batch_path(number), 'r', encoding='utf-8') as f:
+                record = json.loads(f.readline())
+            shard = self._read_json(self._shard_path(f"{record['source']}/{record['conversation']}"), None)
+            batches = shard.get("batches") if shard else None
+            if batches and batches[0] <= number < batches[1]:
+                number = state["next_batch"] = batches[1]
+                continue
+            while os.path.exists(self._batch_path(number)):
+                os.remove(self._batch_path(number))
+                number += 1
+
+    def _sources(self):
+        spec = self.spec
+        if spec.get("archive_roots"):
+            return [open_archive_source(root) for root in spec["archive_roots"] if os.path.exists(root)]
+        if spec.get("export_zip"):
+            return [ZipArchiveSource(spec["export_zip"])]
+        return [DirectoryArchiveSource(spec["channel_root"], spec["dm_root"])]
+
+    @staticmethod
+    def _record(kind, conv_name, msg: Message, user_names: Dict[str, str], parent: Optional[Message] = None,
+                redactor: Optional[Redactor] = None):
+        record = {
+            "id": f"{kind}/{conv_name}/{msg.ts:.6f}",
+            "source": kind,
+            "conversation": conv_name,
+            "ts": msg.ts,
+            "thread_ts": parent.ts if parent is not None else msg.thread_ts,
+            "is_reply": parent is not None,
+            "user": msg.user_id,
+            "user_name": user_names.get(msg.user_id, msg.user_id),
+            "text": msg.text,
+            "edited_ts": msg.edited_ts,
+            "subtype": msg.subtype,
+            "bot_id": msg.bot_id,
+            "category": message_category(msg.subtype, msg.bot_id),
+        }
+        if redactor is not None:
+            record["user"] = record["user_name"] = redactor.pseudonym(msg.user_id)
+            record["text"] = redactor.redact_text(msg.text)
+        return record
+
+    def run(self, progress=print) -> List[str]:
+        """변경분을 배치 파일로 기록하고 이번에 만든 배치 파일 경로 목록을 반환"""
+        os.makedirs(os.path.join(self.state_dir, self.CONVERSATION_DIR), exist_ok=True)
+        legacy = self._read_json(os.path.join(self.state_dir, self.LEGACY_STATE_FILE), {})
+        state = self._read_json(self.state_path, {"next_batch": legacy.get("next_batch", 1)})
+        self._recover(state)
+        index = self._read_json(self.fingerprint_path, None)
+        if index is None:
+            index = dict(legacy.get("fingerprints") or {})
+        shards = {}  # 이번 실행에서 읽은 대화 상태 조각 (바뀐 파일이 있는 대화만)
+        parser = SlackArchiveManager(self.spec["channel_root"], self.spec["dm_root"], UserMapping(self.spec["user_mapping_file"]),
+                                     read_workers=self.spec.get("read_workers", 16), read_ahead_files=self.spec.get("read_ahead_files", 64))
+
+        # 1. 새로 생겼거나 fingerprint가 바뀐 day-file만 파일 단위로 파싱
+        changed = {}  # (kind, 대화 이름) -> [(파일, 메시지 목록, fingerprint 또는 None(실패))]
+        user_names = {}
+        for source in self._sources():
+            with source:
+                user_names.update(source.user_names())
+                delta_files, delta_fingerprints = {}, {}
+                for (kind, conv_name, conv_type), members in source.conversation_files().items():
+                    for member in members:
+                        fingerprint = source.fingerprint(member)
+                        if index.get(member) == fingerprint:
+                            continue
+                        key = f"{kind}/{conv_name}"
+                        if key not in shards:
+                            shards[key] = self._load_shard(key, legacy)
+                        previous = self._file_state(shards[key], member, legacy)
+                        if previous is not None and previous["fingerprint"] == fingerprint:
+                            index[member] = fingerprint  # 지난 실행이 색인을 저장하기 전에 중단된 경우
+                            continue
+                        # 파일별 메시지를 구분하기 위해 파일마다 따로 파싱 (읽기는 read-ahead로 함께 진행)
+                        delta_files[(kind, conv_name, conv_type, member)] = [member]
+                        delta_fingerprints[member] = fingerprint
+                for (kind, conv_name, _, member), messages in parser._parse_source_files(source, delta_files).items():
+                    failed = member in parser.load_diagnostics.quarantine  # 실패한 파일은 다음에 다시 시도
+                    changed.setdefault((kind, conv_name), []).append((member, messages, None if failed else delta_fingerprints[member]))
+        user_names.update(parser.user_mapping.mapping)
+        redactor = None
+        if self.redaction is not None:
+            user_ids = {item.user_id for files in changed.values() for _, messages, _ in files for msg in messages for item in [msg] + msg.replies}
+            redactor = build_redactor(self.redaction, parser.user_mapping, user_ids)
+
+        # 2. 대화마다 지난번과 달라진 메시지/답글만 배치로 기록하고, 이어서 그 대화의 상태 조각과 다음 배치 번호를 저장
+        written = []
+        for (kind, conv_name), files in sorted(changed.items()):
+            key = f"{kind}/{conv_name}"
+            shard = shards[key]
+            pending = []
+            for member, messages, fingerprint in files:
+                items = [(item, parent) for msg in messages for item, parent in [(msg, None)] + [(reply, msg) for reply in msg.replies]]
+                current = {f"{item.ts:.6f}": item.edited_ts or 0.0 for item, _ in items}
+                previous = self._file_state(shard, member, legacy)
+                if self.categories is not None:
+                    # 메시지/답글 목록의 종류 비트맵으로 내보낼 분류만 남김
+                    items = [items[i] for i in ConversationKinds([item for item, _ in items]).select(categories=self.categories).tolist()]
+                for item, parent in items:
+                    if previous is None:
+                        export = True  # 처음 보는 파일(예: 나중에 채워진 과거 day-file)은 전부
+                    elif previous["messages"] is None:
+                        export = _change_ts(item) > shard["watermark"]  # 메시지 키를 기록하기 전 형식의 상태: watermark로 판단
+                    else:
+                        # 지난번에 없던 메시지(과거 ts로 끼워 넣어진 것 포함)와 수정 시각이 바뀐 메시지
+                        export = previous["messages"].get(f"{item.ts:.6f}") != (item.edited_ts or 0.0)
+                    if export:
+                        pending.append((_change_ts(item), item.ts, self._record(kind, conv_name, item, user_names, parent=parent, redactor=redactor)))
+                if fingerprint is not None:
+                    shard["files"][member] = {"fingerprint": fingerprint, "messages": current}
+            pending.sort(key=lambda item: (item[0], item[1]))
+            first = state["next_batch"]
+            for start in range(0, len(pending), self.batch_records):
+                path = self._batch_path(state["next_batch"])
+                _write_atomic(path, "".join(json.dumps(record, ensure_ascii=False) + "\n" for _, _, record in pending[start:start + self.batch_records]))
+                written.append(path)
+                state["next_batch"] += 1
+            if pending:
+                shard["watermark"] = max(shard["watermark"], pending[-1][0])
+            shard["batches"] = [first, state["next_batch"]]
+            _write_atomic(self._shard_path(key), json.dumps(shard, ensure_ascii=False))
+            _write_atomic(self.state_path, json.dumps(state))
+            for member, _, fingerprint in files:
+                if fingerprint is not None:
+                    index[member] = fingerprint
+            if pending:
+                progress(f"{self.spec['name']} {key}: {len(pending)}건")
+        _write_atomic(self.fingerprint_path, json.dumps(index, ensure_ascii=False))
+        return written
+
+
+def run_incremental_export(config: Dict[str, Any], progress=print) -> Dict[str, List[str]]:
+    """설정(dict)의 모든 워크스페이스에 대해 증분 내보내기를 실행. 반환: 워크스페이스 -> 새 배치 파일 목록"""
+    export = config.get("export") or {}
+    redaction = config.get("redaction") or {}
+    state_root = export.get("state_dir", "./exports/incremental")
+    written = {}
+    for spec in workspace_specs_from_config(config):
+        exporter = IncrementalExporter(spec, os.path.join(state_root, spec["name"]), export.get("batch_records", 5000),
+                                       categories=export.get("categories"),
+                                       redaction=redaction if redaction.get("incremental_export") else None)
+        written[spec["name"]] = exporter.run(progress=progress)
+        progress(f"{spec['name']}: 새 배치 {len(written[spec['name']])}개")
+    return written
+
+
+if __name__ == "__main__":
+    from warmup import load_config_dict
+
+    run_incremental_export(load_config_dict(sys.argv[1:]))
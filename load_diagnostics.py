@@ -0,0 +1,80 @@
+import heapq
+import threading
+import time
+from typing import Dict, List, Optional, Any
+
+
+class FileLoadRecord:
+    """day-file 하나를 읽고 파싱한 결과: 소요 시간, 크기, 메시지 수, 실패 시 오류 종류"""
+    def __init__(self, member, key, source_spec, seconds, size_bytes, message_count,
+                 error_class: Optional[str] = None, error_message: Optional[str] = None, fingerprint=None):
+        self.member = member
+        self.key = key  # (kind, 대화 키, conv_type)
+        self.source_spec = source_spec  # 재시도 시 소스를 다시 열기 위한 값
+        self.seconds = seconds
+        self.size_bytes = size_bytes
+        self.message_count = message_count
+        self.error_class = error_class
+        self.error_message = error_message
+        self.fingerprint = fingerprint  # 읽기 직전의 소스 fingerprint (감시 스레드가 로드 이후 바뀐 파일을 찾는 기준)
+        self.loaded_at = time.time()
+
+    @property
+    def failed(self):
+        return self.error_class is not None
+
+
+class LoadDiagnostics:
+    """
+    파일별 로드 기록과 격리(quarantine) 목록.
+    파싱에 실패한 파일은 격리 목록에 남겨 두었다가 전체를 다시 로드하지 않고 그 파일만 재시도할 수 있다.
+    로드는 여러 스레드에서 동시에 기록하므로 잠금으로 보호한다.
+    """
+    def __init__(self):
+        self.records: Dict[str, FileLoadRecord] = {}  # 파일 -> 가장 최근 기록
+        self.quarantine: Dict[str, FileLoadRecord] = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def record(self, record: FileLoadRecord):
+        with self._lock:
+            self.records[record.member] = record
+            if record.failed:
+                self.quarantine[record.member] = record
+            else:
+                self.quarantine.pop(record.member, None)
+
+    def slowest(self, n=20) -> List[FileLoadRecord]:
+        with self._lock:
+            return heapq.nlargest(n, self.records.values(), key=lambda record: record.seconds)
+
+    def failed(self) -> List[FileLoadRecord]:
+        with self._lock:
+            return sorted(self.quarantine.values(), key=lambda record: record.member)
+
+    def quarantined_files(self) -> Dict[Any, Dict[tuple, List[str]]]:
+        """격리된 파일을 소스별, 대화별로 묶음: source_spec -> (kind, 대화 키, conv_type) -> 파일 목록"""
+        with self._lock:
+            grouped = {}
+            for record in self.quarantine.values():
+                grouped.setdefault(record.source_spec, {}).setdefault(record.key, []).append(record.member)
+            return grouped
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            records = list(self.records.values())
+            return {
+                "files": len(records),
+                "failed": len(self.quarantine),
+                "bytes": sum(record.size_bytes for record in records),
+                "messages": sum(record.message_count for record in records),
+                "seconds": sum(record.seconds for record in records),
+            }
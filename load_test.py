@@ -0,0 +1,355 @@
+"""
+여러 사용자가 동시에 앱을 쓰는 상황의 부하 테스트.
+
+    python load_test.py                                            # configs/config.yaml의 load_test 설정 사용
+    python load_test.py "load_test.concurrency=[1,8,32]" load_test.rounds=5   # Hydra override
+
+Streamlit의 headless AppTest로 세션마다 별도 프로세스를 하나씩 띄워 주요 흐름
+(채널 열기 -> 기간 변경 -> 내보내기 -> 검색 -> 매핑 수정)을 반복한다. 프로세스마다 아카이브를 따로 로드하므로
+모든 세션이 로드를 마친 뒤 동시에 측정을 시작하고, 각 세션은 user_mapping.json/dm_mapping.json의 임시 복사본과
+자기 spill 폴더를 쓰므로 실제 매핑 파일은 바뀌지 않는다 (앱에는 CLI override와 함께 CONFIG_OVERRIDES_ENV 환경 변수로 전달).
+동시 세션 수를 늘려 가며 단계별 p50/p95/p99 지연, 처리량(초당 상호작용 수), 세션 프로세스 RSS를 출력한다.
+"""
+import json
+import multiprocessing
+import os
+import queue
+import random
+import resource
+import shlex
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from streamlit import config as streamlit_config
+from streamlit.logger import set_log_level
+from streamlit.testing.v1 import AppTest
+
+from workspaces import CONFIG_OVERRIDES_ENV, workspace_specs_from_config
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+PERIOD_TYPES = ["전체", "연도별", "월별", "분기별"]
+
+
+def current_rss_bytes() -> int:
+    """현재 프로세스 RSS (Linux의 /proc가 없으면 최대 RSS로 대신함)"""
+    try:
+        with open("/proc/self/statm", 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # macOS는 바이트, Linux는 KB
+
+
+def _find(elements, label):
+    for element in elements:
+        if element.label == label:
+            return element
+    return None
+
+
+class SimulatedSession:
+    """
+    AppTest 하나로 만든 가상 사용자 세션. 각 단계는 위젯을 조작하고 스크립트를 한 번 다시 실행(rerun)하며,
+    단계 이름별 지연 시간(초)과 오류 수를 기록한다.
+    """
+    def __init__(self, session_id: int, keywords: List[str], seed=0, timeout=120):
+        self.session_id = session_id
+        self.keywords = keywords
+        self.random = random.Random(seed * 100003 + session_id)
+        self.timeout = timeout
+        self.app = None
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.error_messages: Dict[str, str] = {}  # 단계별 첫 오류 내용
+
+    def _record_error(self, name, message):
+        self.errors[name] = self.errors.get(name, 0) + 1
+        self.error_messages.setdefault(name, message)
+
+    def _step(self, name, action: Callable[[], Any]):
+        """action이 위젯을 조작한 AppTest를 반환하면 rerun 시간을 측정. None이면 이번에는 건너뜀"""
+        try:
+            target = action()
+            if target is None:
+                return
+            started = time.perf_counter()
+            target.run(timeout=self.timeout)
+            self.latencies.setdefault(name, []).append(time.perf_counter() - started)
+            if self.app.exception:
+                self._record_error(name, self.app.exception[0].message)
+        except Exception as e:
+            self._record_error(name, f"{type(e).__name__}: {e}")
+
+    def _menu(self, option):
+        return self.app.sidebar.radio[0].set_value(option)
+
+    def open(self):
+        def action():
+            self.app = AppTest.from_file(MAIN_SCRIPT, default_timeout=self.timeout)
+            return self.app
+        self._step("open_app", action)
+        return self.app is not None and not self.app.exception
+
+    def open_channel(self):
+        self._step("open_channel", lambda: self._menu("채널 보기"))
+
+        def select_channel():
+            selectbox = _find(self.app.sidebar.selectbox, "채널 선택")
+            if selectbox is None or not selectbox.options:
+                return None
+            return selectbox.set_value(self.random.choice(selectbox.options))
+        self._step("select_channel", select_channel)
+
+    def change_period(self):
+        def action():
+            selectbox = _find(self.app.sidebar.selectbox, "기간 선택")
+            if selectbox is None:
+                return None
+            return selectbox.set_value(self.random.choice([p for p in PERIOD_TYPES if p != selectbox.value]))
+        self._step("change_period", action)
+
+    def export(self):
+        def action():
+            button = _find(self.app.button, "💾 대화 내보내기")
+            return button.click() if button is not None else None
+        self._step("export", action)
+
+    def search(self):
+        self._step("open_search", lambda: self._menu("검색"))
+
+        def action():
+            text_input = _find(self.app.text_input, "검색어 입력")
+            if text_input is None or not self.keywords:
+                return None
+            return text_input.set_value(self.random.choice(self.keywords))
+        self._step("search", action)
+
+    def edit_mapping(self):
+        self._step("open_mapping", lambda: self._menu("사용자 매핑 업데이트"))
+
+        def select_user():
+            # 이미 이름이 있는 사용자만 골라 같은 이름으로 다시 저장 (매핑 파일 내용은 바뀌지 않음)
+            selectbox = _find(self.app.selectbox, "사용자 선택")
+            if selectbox is None:
+                return None
+            mapped = []
+            for label in selectbox.options:
+                uid, _, name = label.partition(" (")
+                if name[:-1] != uid:
+                    mapped.append(uid)
+            if not mapped:
+                return None
+            return selectbox.set_value(self.random.choice(mapped))
+        self._step("select_user", select_user)
+
+        def submit():
+            text_input = _find(self.app.text_input, "새로운 이름")
+            button = _find(self.app.button, "매핑 업데이트")
+            if text_input is None or button is None or not text_input.value:
+                return None
+            text_input.set_value(text_input.value)
+            return button.click()
+        self._step("edit_mapping", submit)
+
+    def run_flow(self):
+        self.open_channel()
+        self.change_period()
+        self.export()
+        self.search()
+        self.edit_mapping()
+
+    def report(self) -> Dict[str, Any]:
+        return {"latencies": self.latencies, "errors": self.errors, "error_messages": self.error_messages,
+                "rss_bytes": current_rss_bytes(), "peak_rss_bytes": peak_rss_bytes()}
+
+
+def session_process(session_id: int, overrides: List[str], keywords: List[str], rounds: int, seed: int, timeout,
+                    messages, go):
+    """
+    세션 프로세스 본체. 앱을 열어(아카이브 로드) ("ready", id, 성공 여부, 로드 초)를 보내고, go가 켜지면
+    주요 흐름을 rounds번 반복한 뒤 ("done", id, 보고서)를 보낸다.
+    """
+    # AppTest가 main.py를 실행하기 전에 override를 환경 변수로 넘김
+    os.environ[CONFIG_OVERRIDES_ENV] = " ".join(shlex.quote(override) for override in overrides)
+    # AppTest는 서버 없이 실행되어 세션마다 안내 경고를 남기므로 오류만 출력
+    streamlit_config.set_option("logger.level", "error")
+    set_log_level("error")
+    session = SimulatedSession(session_id, keywords, seed=seed, timeout=timeout)
+    opened = session.open()
+    load_seconds = session.latencies.pop("open_app", [0.0])[0]
+    messages.put(("ready", session_id, opened, load_seconds))
+    go.wait()
+    if opened:
+        for _ in range(rounds):
+            session.run_flow()
+    messages.put(("done", session_id, session.report()))
+
+
+def percentile_summary(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    p50, p95, p99 = np.percentile(np.array(values) * 1000, [50, 95, 99])
+    return {"count": len(values), "p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99), "max_ms": max(values) * 1000}
+
+
+def session_overrides(config: Dict[str, Any], session_dir: str) -> List[str]:
+    """
+    워크스페이스마다 user_mapping.json과 같은 폴더의 dm_mapping.json을 session_dir에 복사하고, 세션이 이 복사본과
+    자기 spill 폴더를 쓰도록 하는 Hydra override 목록을 반환. warm-up 산출물은 원래 매핑 경로로 만들어졌으므로 쓰지 않는다.
+    """
+    overrides = ["warmup.use_artifacts=false"]
+    for index, spec in enumerate(workspace_specs_from_config(config)):
+        workspace_dir = os.path.join(session_dir, f"workspace_{index}")
+        os.makedirs(workspace_dir, exist_ok=True)
+        source = spec["user_mapping_file"]
+        mapping_file = os.path.join(workspace_dir, os.path.basename(source))
+        for path, target in ((source, mapping_file),
+                             (os.path.join(os.path.dirname(source), "dm_mapping.json"), os.path.join(workspace_dir, "dm_mapping.json"))):
+            if os.path.exists(path):
+                shutil.copyfile(path, target)
+        spill_dir = os.path.join(workspace_dir, "spill")
+        if config.get("workspaces"):
+            overrides += [f"++workspaces.{index}.user_mapping_file='{mapping_file}'", f"++workspaces.{index}.spill_dir='{spill_dir}'"]
+        else:
+            overrides += [f"paths.user_mapping_file='{mapping_file}'", f"memory.spill_dir='{spill_dir}'"]
+    return overrides
+
+
+def _collect(messages, processes: Dict[int, Any], kind: str, received: Dict[int, tuple]):
+    """세션 프로세스들이 보낸 kind 메시지를 received(세션 id -> 메시지)에 모음. 메시지 없이 끝난 프로세스는 None으로 둔다"""
+    while len(received) < len(processes):
+        try:
+            message = messages.get(timeout=1)
+        except queue.Empty:
+            for session_id, process in processes.items():
+                if session_id not in received and process.exitcode is not None and messages.empty():
+                    received[session_id] = None
+            continue
+        if message[0] == kind:
+            received[message[1]] = message
+
+
+def run_level(concurrency: int, rounds: int, keywords: List[str], overrides: List[str], config: Dict[str, Any],
+              work_dir: str, seed=0, timeout=120) -> Dict[str, Any]:
+    """
+    동시 세션 concurrency개를 각자 프로세스로 띄워, 모두 앱을 연(아카이브 로드) 뒤 동시에 주요 흐름을 rounds번 반복.
+    반환: 단계별 지연 통계와 처리량/RSS (아카이브 로드는 측정에서 제외하고 load_seconds로 따로 기록)
+    """
+    context = multiprocessing.get_context("spawn")
+    messages, go = context.Queue(), context.Event()
+    processes = {}
+    for session_id in range(concurrency):
+        session_dir = os.path.join(work_dir, f"c{concurrency}_s{session_id}")
+        args = (session_id, overrides + session_overrides(config, session_dir), keywords, rounds, seed, timeout, messages, go)
+        processes[session_id] = context.Process(target=session_process, args=args)
+    try:
+        for process in processes.values():
+            process.start()
+        ready, done = {}, {}
+        _collect(messages, processes, "ready", ready)
+        go.set()
+        started = time.perf_counter()
+        _collect(messages, processes, "done", done)
+        elapsed = time.perf_counter() - started
+        for process in processes.values():
+            process.join()
+    finally:
+        for process in processes.values():
+            if process.is_alive():
+                process.terminate()
+
+    latencies, errors, error_messages = {}, {}, {}
+    rss_bytes, peak = 0, 0
+    for session_id in range(concurrency):
+        if not done.get(session_id):
+            # 보고서 없이 끝난 세션 프로세스 (앱을 열지 못한 세션은 보고서에 open_app 오류가 있음)
+            errors["session"] = errors.get("session", 0) + 1
+            error_messages.setdefault("session", f"세션 프로세스 종료 코드 {processes[session_id].exitcode}")
+            continue
+        report = done[session_id][2]
+        for name, values in report["latencies"].items():
+            latencies.setdefault(name, []).extend(values)
+        for name, count in report["errors"].items():
+            errors[name] = errors.get(name, 0) + count
+        for name, message in report["error_messages"].items():
+            error_messages.setdefault(name, message)
+        rss_bytes += report["rss_bytes"]
+        peak = max(peak, report["peak_rss_bytes"])
+    interactions = sum(len(values) for values in latencies.values())
+    steps = {name: dict(percentile_summary(values), errors=errors.get(name, 0)) for name, values in latencies.items()}
+    for name, count in errors.items():
+        steps.setdefault(name, dict(percentile_summary([]), errors=count))
+    return {
+        "concurrency": concurrency,
+        "load_seconds": max((message[3] for message in ready.values() if message), default=0.0),
+        "interactions": interactions,
+        "elapsed_seconds": elapsed,
+        "throughput_per_second": interactions / elapsed if elapsed > 0 else 0.0,
+        "overall": percentile_summary([value for values in latencies.values() for value in values]),
+        "steps": steps,
+        "error_messages": error_messages,
+        "rss_bytes": rss_bytes,            # 세션 프로세스 RSS 합계
+        "peak_rss_bytes": peak,            # 세션 프로세스 하나의 최대 RSS
+    }
+
+
+def format_level(result: Dict[str, Any]) -> str:
+    lines = [
+        f"동시 세션 {result['concurrency']}: 상호작용 {result['interactions']}회, {result['elapsed_seconds']:.1f}초, "
+        f"{result['throughput_per_second']:.1f}회/초, 세션 RSS 합계 {result['rss_bytes'] / 2**20:.0f} MB (세션당 최대 {result['peak_rss_bytes'] / 2**20:.0f} MB), "
+        f"아카이브 로드 최대 {result['load_seconds']:.1f}초 (측정 제외)",
+        f"  {'단계':<16}{'횟수':>6}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'오류':>6}",
+    ]
+    rows = list(result["steps"].items()) + [("(전체)", dict(result["overall"], errors=sum(s["errors"] for s in result["steps"].values())))]
+    for name, stats in rows:
+        lines.append(f"  {name:<16}{stats['count']:>6}{stats['p50_ms']:>10.0f}{stats['p95_ms']:>10.0f}{stats['p99_ms']:>10.0f}{stats['errors']:>6}")
+    for name, message in result["error_messages"].items():
+        lines.append(f"  오류 예 [{name}] {message}")
+    return "\n".join(lines)
+
+
+def run_load_test(config: Dict[str, Any], progress: Callable[[str], None] = print,
+                  overrides: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    설정(dict)의 load_test 항목대로 동시 세션 수를 늘려 가며 측정. overrides는 config를 만든 Hydra override로,
+    세션 프로세스의 앱에도 그대로 적용한다. 반환: 동시 세션 수별 결과
+    """
+    options = config.get("load_test") or {}
+    levels = options.get("concurrency") or [1, 4, 16]
+    rounds = options.get("rounds", 3)
+    keywords = options.get("keywords") or []
+    seed = options.get("seed", 0)
+    timeout = options.get("timeout_seconds", 120)
+
+    results = []
+    work_dir = tempfile.mkdtemp(prefix="load_test_")  # 세션별 매핑 복사본과 spill 폴더 (끝나면 삭제)
+    try:
+        for concurrency in levels:
+            progress(f"동시 세션 {concurrency} 준비 중 (세션마다 아카이브 로드)...")
+            result = run_level(concurrency, rounds, keywords, list(overrides or []), config, work_dir, seed=seed, timeout=timeout)
+            results.append(result)
+            progress(format_level(result))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report_file = options.get("report_file")
+    if report_file:
+        os.makedirs(os.path.dirname(os.path.abspath(report_file)), exist_ok=True)
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=4)
+        progress(f"결과 저장: {report_file}")
+    return results
+
+
+if __name__ == "__main__":
+    from warmup import load_config_dict
+
+    run_load_test(load_config_dict(sys.argv[1:]), overrides=sys.argv[1:])
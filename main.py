@@ -1,42 +1,76 @@
 import streamlit as st
+import bisect
 import os
 import glob
 import json
 import datetime
-from hydra import initialize, compose
+import math
+import time
 from omegaconf import OmegaConf
-from hydra.core.global_hydra import GlobalHydra
-import pandas as pd
 from typing import List, Optional
-from data_models import Message, Conversation, UserMapping, DMChannelMapping, SlackArchiveManager
+from data_models import Message, Conversation, UserMapping, DMChannelMapping, SlackArchiveManager, TimestampView, format_local_times
+from rich_text import RichTextRenderer
+from workspaces import ShardedArchive, workspace_specs_from_config, CONFIG_OVERRIDES_ENV
+from archive_watcher import WatcherRegistry
+from memory_footprint import FOOTPRINT_PARTS, PART_LABELS, summarize_footprints, footprint_metrics
+from message_kinds import CATEGORY_LABELS
+import text_store
+# pandas, scikit-learn(text_index, term_stats), warmup은 import에 수 초가 걸려 쓰는 페이지/함수 안에서 import한다.
+# 첫 화면(DM 보기)은 이 모듈들 없이 그려진다 (startup_benchmark.py로 확인)
 
 # ================================
 # Hydra 설정 불러오기
 # ================================
 
+@st.cache_resource(show_spinner=False)  # 설정 파일은 프로세스당 한 번만 compose (rerun마다 Hydra를 다시 초기화하지 않음)
 def load_config():
+    import shlex
+    from hydra import initialize, compose
+    from hydra.core.global_hydra import GlobalHydra
+
     # Hydra가 이미 초기화되어 있다면 초기화 해제
     if GlobalHydra.instance().is_initialized():
         GlobalHydra.instance().clear()
     
-    # Hydra 초기화 및 설정 로드
+    # Hydra 초기화 및 설정 로드 (CONFIG_OVERRIDES_ENV 환경 변수의 override 적용)
     with initialize(config_path="configs", version_base=None):
-        cfg = compose(config_name="config")
+        cfg = compose(config_name="config", overrides=shlex.split(os.environ.get(CONFIG_OVERRIDES_ENV, "")))
     return cfg
 
 # 설정 로드
 try:
     cfg = load_config()
-    # Hydra 설정으로부터 경로 정보 읽기
-    channel_root_path = cfg.paths.channel_root
-    dm_root_path = cfg.paths.dm_root
-    user_mapping_file = cfg.paths.user_mapping_file
+    # Hydra 설정으로부터 워크스페이스별 경로 정보 읽기 (workspaces가 비어 있으면 paths 사용)
+    workspace_specs = workspace_specs_from_config(OmegaConf.to_container(cfg, resolve=True))
+    workspace_use_processes = OmegaConf.select(cfg, "workspace_load", default="thread") == "process"
+    similarity_components = OmegaConf.select(cfg, "similarity.n_components", default=0)
+    similarity_top_k = OmegaConf.select(cfg, "similarity.top_k", default=10)
+    watch_enabled = OmegaConf.select(cfg, "watch.enabled", default=False)
+    watch_poll_seconds = OmegaConf.select(cfg, "watch.poll_seconds", default=2.0)
+    watch_debounce_seconds = OmegaConf.select(cfg, "watch.debounce_seconds", default=1.0)
+    text_cache_blocks = OmegaConf.select(cfg, "text_store.cache_blocks", default=256)
+    warmup_use_artifacts = OmegaConf.select(cfg, "warmup.use_artifacts", default=False)
+    warmup_artifact_dir = OmegaConf.select(cfg, "warmup.artifact_dir", default="./data/cache/warmup")
+    memory_metrics_file = OmegaConf.select(cfg, "memory.metrics_file", default=None)
+    redaction_options = OmegaConf.to_container(cfg, resolve=True).get("redaction") or {}
 except Exception as e:
     st.error(f"설정 파일 로드 중 오류 발생: {str(e)}")
     # 기본값 설정
-    channel_root_path = "./data/channels"
-    dm_root_path = "./data/dms"
-    user_mapping_file = "./data/user_mapping.json"
+    workspace_specs = workspace_specs_from_config({})
+    workspace_use_processes = False
+    similarity_components = 0
+    similarity_top_k = 10
+    watch_enabled = False
+    watch_poll_seconds = 2.0
+    watch_debounce_seconds = 1.0
+    text_cache_blocks = 256
+    warmup_use_artifacts = False
+    warmup_artifact_dir = "./data/cache/warmup"
+    memory_metrics_file = None
+    redaction_options = {}
+
+# 압축된 텍스트 블록을 풀어 둘 LRU 크기 (모든 워크스페이스 공용)
+text_store.block_cache.max_blocks = text_cache_blocks
 
 # ================================
 # 유틸리티 함수
@@ -54,88 +88,122 @@ def convert_user_ids_to_names(messages_data, user_mapping):
         converted_data.append(msg_copy)
     return converted_data
 
-def export_conversation_to_txt(conv, user_mapping, file_name):
-    """대화 내용을 TXT 파일로 내보내기"""
-    output = []
-    
-    # 메인 메시지 처리
-    for msg in conv.messages:
-        time_str = msg.get_datetime().strftime('%Y-%m-%d %H:%M:%S')
-        display_name = user_mapping.get_name(msg.user_id)
-        output.append(f"[{time_str}] {display_name}: {msg.text}")
-        
-        # 스레드 메시지 처리 (msg.replies 사용)
-        if msg.replies:
-            output.append("┌── 스레드 ──")
-            for t_msg in sorted(msg.replies, key=lambda x: x.ts):
-                t_time = t_msg.get_datetime().strftime('%Y-%m-%d %H:%M:%S')
-                t_display = user_mapping.get_name(t_msg.user_id)
-                output.append(f"│ [{t_time}] {t_display}: {t_msg.text}")
-            output.append("└──────────")
-        output.append("")  # 빈 줄 추가
+def export_conversation_to_txt(conv, user_mapping, file_name, messages=None, redactor=None):
+    """대화 내용을 TXT 파일로 내보내기 (messages를 주면 그 메인 메시지만, redactor를 주면 익명화)"""
+    from redaction import conversation_rows, format_conversation_txt
+
+    messages = messages if messages is not None else conv.messages
+    if redactor is not None:
+        text = format_conversation_txt(redactor.redact_rows(conversation_rows(messages)), lambda name: name)
+    else:
+        # 화면과 같은 이름이 나오도록 로드 시 계산해 둔 표시 이름 사용
+        text = format_conversation_txt(conversation_rows(messages, display_names=True), lambda name: name)
     
     # 파일 저장
     os.makedirs("exports", exist_ok=True)
     file_path = os.path.join("exports", f"{file_name}.txt")
     with open(file_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(output))
+        f.write(text)
     
     return file_path
 
 
 def aggregate_user_ids(archive_manager):
-    """채널과 DM 모든 대화에서 user id 집계"""
-    user_ids = set()
-    for conv in list(archive_manager.channels.values()) + list(archive_manager.dms.values()):
-        for msg in conv.messages:
-            user_ids.add(msg.user_id)
-            if msg.replies: # 스레드 답글의 사용자도 집계
-                for reply_msg in msg.replies:
-                    user_ids.add(reply_msg.user_id)
-    return sorted(list(user_ids))
-
-@st.cache_data(ttl=300, show_spinner=False)  # 5분 캐시
-def filter_messages_by_period(_messages, period_type, period_value, start_date=None, end_date=None):
-    """
-    period_type: "year", "month", "quarter", "custom" 또는 None(전체)
-    period_value: 해당 period에 해당하는 값
-    start_date, end_date: custom 기간 선택시 사용
-    """
-    if period_type is None:
-        return messages
-        
-    filtered = []
-    for msg in messages:
-        dt = msg.get_datetime()
-        
-        if period_type == "custom":
-            if start_date and end_date:
-                if start_date <= dt.date() <= end_date:
-                    filtered.append(msg)
-            continue
-            
-        if period_type == "year" and dt.year != period_value:
-            continue
-        if period_type == "month" and (dt.year, dt.month) != period_value:
-            continue
-        if period_type == "quarter":
-            msg_quarter = (dt.month - 1) // 3 + 1
-            if (dt.year, msg_quarter) != period_value:
-                continue
-        filtered.append(msg)
-    return filtered
+    """채널과 DM 모든 대화에서 user id 집계 (스레드 답글 포함, 로드 시 만든 posting list 사용)"""
+    return archive_manager.user_postings.get_user_ids()
+
+def period_to_ts_range(period_type, period_value, start_date=None, end_date=None):
+    """기간 선택을 [start_ts, end_ts) 타임스탬프 구간으로 변환 (None이면 제한 없음)"""
+    if period_type == "year":
+        start, end = datetime.datetime(period_value, 1, 1), datetime.datetime(period_value + 1, 1, 1)
+    elif period_type in ("month", "quarter"):
+        year, index = period_value
+        first_month = index if period_type == "month" else (index - 1) * 3 + 1
+        months = 1 if period_type == "month" else 3
+        start = datetime.datetime(year, first_month, 1)
+        end_month = first_month + months
+        end = datetime.datetime(year + (end_month - 1) // 12, (end_month - 1) % 12 + 1, 1)
+    elif period_type == "custom" and start_date and end_date:
+        start = datetime.datetime.combine(start_date, datetime.time.min)
+        end = datetime.datetime.combine(end_date + datetime.timedelta(days=1), datetime.time.min)
+    else:
+        return None, None
+    return start.timestamp(), end.timestamp()
 
 # ================================
 # 캐시: 아카이브 매니저 로드
 # ================================
 
-@st.cache_data(ttl=3600, show_spinner=False)  # 1시간 캐시
-def load_archive_manager(channel_root, dm_root):
-    user_mapping = UserMapping(mapping_file=user_mapping_file)
-    manager = SlackArchiveManager(channel_root=channel_root, dm_root=dm_root, user_mapping=user_mapping)
-    manager.load_channels()
-    manager.load_dms()
-    return manager
+@st.cache_resource(ttl=3600, show_spinner=False)  # 1시간 캐시. 매 rerun마다 아카이브 전체를 pickle/unpickle하지 않도록 resource 캐시 사용
+def load_archive(workspace_specs, use_processes=False, artifact_dir=None):
+    """
+    모든 워크스페이스를 병렬로 로드하여 (샤드 아카이브, 워크스페이스별로 미리 만든 인덱스)로 반환.
+    artifact_dir가 주어지면 warm-up 산출물만 로드한다 (없으면 오류, 요청 처리 중에 빌드하지 않음)
+    """
+    if artifact_dir:
+        from warmup import load_warmup_artifacts
+        return load_warmup_artifacts(workspace_specs, artifact_dir)
+    return ShardedArchive.load(workspace_specs, use_processes=use_processes), {}
+
+@st.cache_resource(ttl=3600, show_spinner=False)  # 행렬을 pickle하지 않도록 resource 캐시 사용
+def load_similarity_index(_archive_manager, workspace_name, load_id, archive_version, n_components):
+    """
+    유사 메시지 검색용 TF-IDF 인덱스 (warm-up에서 같은 버전/설정으로 만든 인덱스가 있으면 그대로 사용).
+    load_id(매니저의 로드별 ID)가 키에 있어 아카이브를 다시 로드하면 이전 매니저로 만든 인덱스를 쓰지 않는다.
+    """
+    from text_index import SimilarityIndex
+
+    prebuilt = prebuilt_indexes.get(workspace_name, {}).get("similarity_index")
+    if prebuilt is not None and prebuilt.archive_version == archive_version and prebuilt.n_components == n_components:
+        return prebuilt
+    return SimilarityIndex(n_components=n_components).build(_archive_manager)
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def load_term_index(_archive_manager, workspace_name, load_id, archive_version):
+    """키워드 트렌드용 (대화, 월) x 단어 빈도 행렬 (warm-up에서 같은 버전으로 만든 인덱스가 있으면 그대로 사용, load_id는 유사도 인덱스와 같음)"""
+    from term_stats import TermTrendIndex
+
+    prebuilt = prebuilt_indexes.get(workspace_name, {}).get("term_index")
+    if prebuilt is not None and prebuilt.archive_version == archive_version:
+        return prebuilt
+    return TermTrendIndex().build(_archive_manager)
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def load_redactor(_archive_manager, workspace_name, load_id, archive_version, user_names, options):
+    """익명화 내보내기용 Redactor. 민감 단어 자동자를 내보낼 때마다 다시 만들지 않고, 새 사용자나 이름 변경이 있을 때만 다시 만든다"""
+    from redaction import build_redactor
+    return build_redactor(options, _archive_manager.user_mapping, _archive_manager.user_postings.get_user_ids())
+
+def get_redactor():
+    return load_redactor(archive_manager, selected_workspace, archive_manager.load_id, archive_manager.version,
+                         tuple(sorted(archive_manager.user_mapping.mapping.items())), redaction_options)
+
+def rebuild_indexes(manager, workspace_name):
+    """감시 스레드가 새 버전을 반영한 직후 유사도/키워드 인덱스를 백그라운드에서 미리 만듦 (첫 요청이 인덱스를 다시 만드는 동안 기다리지 않도록)"""
+    version = manager.version
+    load_similarity_index(manager, workspace_name, manager.load_id, version, similarity_components)
+    load_term_index(manager, workspace_name, manager.load_id, version)
+
+@st.cache_resource(show_spinner=False)  # TTL 없이 프로세스당 하나 (매니저 캐시가 만료되어도 이전 감시 스레드를 여기서 멈춤)
+def get_watcher_registry():
+    """워크스페이스별 감시 스레드 (새 day-file을 재시작 없이 반영). 아카이브를 다시 로드하면 이전 스레드를 멈추고 교체"""
+    return WatcherRegistry()
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def write_footprint_metrics(_sharded_archive, path, archive_versions):
+    """대화별 메모리 사용량 메트릭을 파일로 저장 (아카이브를 다시 로드했거나 버전이 바뀔 때만 다시 씀)"""
+    metrics = footprint_metrics({name: list(manager.footprints.values()) for name, manager in _sharded_archive.shards.items()})
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # 수집기가 반쯤 쓰인 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(metrics)
+    os.replace(path + ".tmp", path)
+    return path
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def get_renderer(_archive_manager, workspace_name, load_id):
+    """메시지 렌더링 캐시를 세션과 rerun 사이에 공유 (아카이브를 다시 로드하면 load_id가 바뀌어 새 매핑으로 다시 만듦)"""
+    return RichTextRenderer(_archive_manager.user_mapping)
 
 # ================================
 # Streamlit UI 구현
@@ -143,13 +211,59 @@ def load_archive_manager(channel_root, dm_root):
 
 st.title("Slack 아카이브 조회 앱 (Streamlit)")
 
-# Hydra 설정에서 불러온 경로 사용
-archive_manager = load_archive_manager(channel_root_path, dm_root_path)
+# Hydra 설정에서 불러온 워크스페이스 사용
+try:
+    sharded_archive, prebuilt_indexes = load_archive(
+        workspace_specs, workspace_use_processes, warmup_artifact_dir if warmup_use_artifacts else None
+    )
+except ValueError as e:
+    st.error(str(e))
+    st.stop()
+workspace_names = sharded_archive.get_workspace_names()
+if len(workspace_names) > 1:
+    selected_workspace = st.sidebar.selectbox("워크스페이스", options=workspace_names, key="workspace")
+else:
+    selected_workspace = workspace_names[0]
+archive_manager = sharded_archive.shards[selected_workspace]
+
+# 메모리 예산이 설정된 경우 캐시 통계 표시 (예산 산정용)
+cache_stats = archive_manager.get_cache_stats()
+if cache_stats["budget_bytes"]:
+    with st.sidebar.expander("메모리 캐시"):
+        st.write(f"- 사용량: {cache_stats['resident_bytes'] / 2**20:.1f} / {cache_stats['budget_bytes'] / 2**20:.1f} MB (전체 {cache_stats['total_bytes'] / 2**20:.1f} MB)")
+        st.write(f"- 메모리 내 대화: {cache_stats['resident_conversations']} / {cache_stats['total_conversations']}")
+        st.write(f"- hit {cache_stats['hits']} / miss {cache_stats['misses']} / eviction {cache_stats['evictions']}")
+if archive_manager.text_block_size:
+    block_stats = text_store.block_cache.get_stats()
+    with st.sidebar.expander("텍스트 압축"):
+        st.write(f"- 풀어 둔 블록: {block_stats['blocks']} / {block_stats['max_blocks']}")
+        st.write(f"- hit {block_stats['hits']} / miss {block_stats['misses']}")
+renderer = get_renderer(archive_manager, selected_workspace, archive_manager.load_id)
+if memory_metrics_file:
+    write_footprint_metrics(sharded_archive, memory_metrics_file,
+                            tuple((sharded_archive.shards[name].load_id, sharded_archive.shards[name].version) for name in workspace_names))
+
+# 감시 모드: 폴더에서 직접 로드하는 워크스페이스만 감시하고, 새 버전이 반영되면 열려 있는 세션을 다시 그림
+if watch_enabled:
+    for spec in workspace_specs:
+        if not spec.get("export_zip") and not spec.get("archive_roots"):
+            shard = sharded_archive.shards[spec["name"]]
+            get_watcher_registry().ensure(shard, spec["name"], watch_poll_seconds, watch_debounce_seconds,
+                                          on_publish=lambda manager, name=spec["name"]: rebuild_indexes(manager, name))
+
+    @st.fragment(run_every=watch_poll_seconds)
+    def watch_archive_version():
+        version = archive_manager.version
+        if st.session_state.setdefault("archive_version", version) != version:
+            st.session_state["archive_version"] = version
+            st.rerun()
+
+    watch_archive_version()
 
 # 사이드바: 메뉴 선택
 menu_option = st.sidebar.radio(
     "메뉴 선택", 
-    options=["DM 보기", "채널 보기", "검색", "사용자 매핑 업데이트"]  # DM을 첫번째로
+    options=["DM 보기", "채널 보기", "검색", "사용자별 보기", "전체 타임라인", "키워드 트렌드", "리액션", "파일", "사용자 매핑 업데이트", "로드 진단", "메모리 사용량"]  # DM을 첫번째로
 )
 
 # 1. 속도 개선을 위한 캐시 최적화
@@ -164,17 +278,36 @@ def get_available_years(_messages):  # 언더스코어 추가
     return sorted(set(msg.get_datetime().year for msg in _messages))
 
 # 2. 기간 필터 단순화
-def render_period_filter(messages):
-    """기간 필터"""
+def render_message_period_filter(messages):
+    """ts 순으로 정렬된 메시지 목록의 기간 필터 (처음/끝 메시지의 미리 계산한 표시 시각 사용)"""
     if not messages:
-        return []
-    
-    # 전체 기간 표시
-    dates = [msg.get_datetime().date() for msg in messages]
-    min_date = min(dates)
-    max_date = max(dates)
+        return None, None
+    return render_period_range_filter(TimestampView(messages), [messages[0].display_time, messages[-1].display_time])
+
+def periods_with_messages(timestamps, period_type, period_values):
+    """기간 값 중 정렬된 timestamps에 메시지가 하나라도 있는 것만 (기간마다 bisect 두 번)"""
+    result = []
+    for value in period_values:
+        start_ts, end_ts = period_to_ts_range(period_type, value)
+        if bisect.bisect_left(timestamps, start_ts) < bisect.bisect_left(timestamps, end_ts):
+            result.append(value)
+    return result
+
+def render_period_range_filter(timestamps, display_times=None):
+    """
+    정렬된 ts 목록으로 기간 선택지를 만들고, 선택한 기간을 [start_ts, end_ts) 구간으로 반환 (None이면 제한 없음).
+    연도/월/분기 선택지는 메시지가 있는 기간만 보여 주되, 메시지를 순회하지 않고 처음~끝 사이의 달력 기간마다 bisect로 확인하므로
+    posting list처럼 큰 목록에도 바로 동작한다. (TimestampView로 메시지 목록을 그대로 넘길 수 있음)
+    display_times: 처음/끝의 미리 계산한 표시 시각 (없으면 처음/끝 ts 두 개만 변환)
+    """
+    if not len(timestamps):
+        return None, None
+    if not display_times or None in display_times:
+        display_times = format_local_times([timestamps[0], timestamps[-1]])
+    min_date = datetime.date.fromisoformat(display_times[0][:10])
+    max_date = datetime.date.fromisoformat(display_times[-1][:10])
     st.sidebar.info(f"전체 기간: {min_date.year}-{min_date.month} ~ {max_date.year}-{max_date.month}")
-    
+
     st.sidebar.write("### 기간 필터")
     period_type = st.sidebar.selectbox(
         "기간 선택",
@@ -182,42 +315,87 @@ def render_period_filter(messages):
         key="period_type"
     )
 
-    filtered_messages = messages
-    period_value = None
-    start_date = None
-    end_date = None
-
+    months = [(y, m) for y in range(max_date.year, min_date.year - 1, -1) for m in range(12, 0, -1)
+              if (min_date.year, min_date.month) <= (y, m) <= (max_date.year, max_date.month)]
     if period_type == "연도별":
-        years = sorted(list(set(msg.get_datetime().year for msg in messages)), reverse=True)
-        if years:
-            selected_year = st.sidebar.selectbox("연도 선택", options=years, key="selected_year")
-            period_value = selected_year
-            filtered_messages = filter_messages_by_period(messages, "year", period_value)
+        years = periods_with_messages(timestamps, "year", range(max_date.year, min_date.year - 1, -1))
+        selected_year = st.sidebar.selectbox("연도 선택", options=years, key="selected_year")
+        return period_to_ts_range("year", selected_year)
     elif period_type == "월별":
-        months = sorted(list(set((msg.get_datetime().year, msg.get_datetime().month) for msg in messages)), reverse=True)
-        month_options = [f"{y}년 {m}월" for y, m in months]
-        if month_options:
-            selected_month_str = st.sidebar.selectbox("월 선택", options=month_options, key="selected_month")
-            selected_year, selected_month = int(selected_month_str.split('년')[0]), int(selected_month_str.split('년')[1].replace('월', '').strip())
-            period_value = (selected_year, selected_month)
-            filtered_messages = filter_messages_by_period(messages, "month", period_value)
+        months = periods_with_messages(timestamps, "month", months)
+        selected_month = st.sidebar.selectbox("월 선택", options=months, format_func=lambda x: f"{x[0]}년 {x[1]}월", key="selected_month")
+        return period_to_ts_range("month", selected_month)
     elif period_type == "분기별":
-        quarters = sorted(list(set((msg.get_datetime().year, (msg.get_datetime().month - 1) // 3 + 1) for msg in messages)), reverse=True)
-        quarter_options = [f"{y}년 {q}분기" for y, q in quarters]
-        if quarter_options:
-            selected_quarter_str = st.sidebar.selectbox("분기 선택", options=quarter_options, key="selected_quarter")
-            selected_year, selected_quarter = int(selected_quarter_str.split('년')[0]), int(selected_quarter_str.split('년')[1].replace('분기', '').strip())
-            period_value = (selected_year, selected_quarter)
-            filtered_messages = filter_messages_by_period(messages, "quarter", period_value)
+        quarters = periods_with_messages(timestamps, "quarter", sorted(set((y, (m - 1) // 3 + 1) for y, m in months), reverse=True))
+        selected_quarter = st.sidebar.selectbox("분기 선택", options=quarters, format_func=lambda x: f"{x[0]}년 {x[1]}분기", key="selected_quarter")
+        return period_to_ts_range("quarter", selected_quarter)
     elif period_type == "사용자 정의":
         col1, col2 = st.sidebar.columns(2)
         with col1:
             start_date = st.date_input("시작일", value=min_date, key="custom_start_date")
         with col2:
             end_date = st.date_input("종료일", value=max_date, key="custom_end_date")
-        filtered_messages = filter_messages_by_period(messages, "custom", None, start_date, end_date)
-    
-    return filtered_messages
+        return period_to_ts_range("custom", None, start_date, end_date)
+    return None, None
+
+# 메시지 종류 필터 선택지 -> 분류 목록 (None이면 전체)
+MESSAGE_KIND_FILTERS = {
+    "전체": None,
+    "사람만": ("human",),
+    "봇/연동만": ("bot",),
+    "시스템 메시지 제외": ("human", "bot"),
+    "시스템 메시지만": ("system",),
+}
+
+def render_message_kind_filter():
+    """사이드바의 메시지 종류 필터 (입장/퇴장, 봇 메시지 등 숨기기). 선택한 분류 목록을 반환 (전체면 None)"""
+    selected = st.sidebar.selectbox("메시지 종류", options=list(MESSAGE_KIND_FILTERS), key="message_kind_filter")
+    return MESSAGE_KIND_FILTERS[selected]
+
+def render_category_counts(source, conv_name, conv):
+    """대화의 분류별 메시지 수 (로드 시 만든 종류 열로 집계)"""
+    counts = archive_manager.message_kinds.get(source, conv_name, conv).category_counts()
+    st.caption(" · ".join(f"{CATEGORY_LABELS[category]} {count}개" for category, count in counts.items()))
+
+def render_similar_messages(source, conv_name, messages, key):
+    """선택한 메시지와 비슷한 과거 메시지를 전체 아카이브에서 찾아 표시"""
+    if not messages:
+        return
+    # 펼쳤을 때만 실행: 닫혀 있으면 TF-IDF 인덱스(scikit-learn)를 만들지 않아 첫 화면이 빨라짐
+    with st.expander("🔎 비슷한 메시지 찾기", key=f"similar_open_{key}", on_change="rerun") as expander:
+        if not expander.open:
+            return
+        selected_msg = st.selectbox(
+            "기준 메시지",
+            options=messages,
+            format_func=lambda m: f"[{m.display_time[:16]}] {m.display_name}: {m.text[:60]}",
+            key=f"similar_{key}"
+        )
+        if selected_msg is None:
+            return
+        if len(workspace_names) > 1 and st.checkbox("모든 워크스페이스에서 찾기", key=f"similar_all_{key}"):
+            # 워크스페이스별 인덱스에 병렬로 질의하고 점수 순으로 합침
+            similarity_indexes = {
+                workspace: load_similarity_index(shard, workspace, shard.load_id, shard.version, similarity_components)
+                for workspace, shard in sharded_archive.shards.items()
+            }
+            results = [
+                (workspace, r_source, r_conv_name, r_msg, score)
+                for workspace, r_source, r_conv_name, r_msg, score
+                in sharded_archive.similar_to_text(similarity_indexes, selected_msg.text, top_k=similarity_top_k + 1)
+                if (workspace, r_conv_name, r_msg.ts) != (selected_workspace, conv_name, selected_msg.ts)
+            ][:similarity_top_k]
+        else:
+            similarity_index = load_similarity_index(archive_manager, selected_workspace, archive_manager.load_id, archive_manager.version, similarity_components)
+            results = [(selected_workspace, *result) for result in similarity_index.similar_messages(source, conv_name, selected_msg, top_k=similarity_top_k)]
+        if not results:
+            st.info("비슷한 메시지가 없습니다.")
+        for workspace, r_source, r_conv_name, r_msg, score in results:
+            label = "채널" if r_source == "channel" else "DM"
+            if len(workspace_names) > 1:
+                label = f"{workspace} / {label}"
+            workspace_renderer = get_renderer(sharded_archive.shards[workspace], workspace, sharded_archive.shards[workspace].load_id)
+            st.write(f"`{score:.2f}` [{label}: {r_conv_name}] [{r_msg.display_time}] **{r_msg.display_name}**: {workspace_renderer.render(r_msg)}")
 
 # --------------------
 # 채널 보기 페이지
@@ -228,61 +406,59 @@ if menu_option == "채널 보기":
         st.error("채널을 찾을 수 없습니다.")
     else:
         selected_channel = st.sidebar.selectbox("채널 선택", options=channel_names)
+        categories = render_message_kind_filter()
         conv = archive_manager.channels.get(selected_channel)
         
         # 제목과 내보내기 버튼을 나란히 배치
         col1, col2 = st.columns([3, 1])
         with col1:
             st.subheader(f"채널: {selected_channel}")
+            render_category_counts("channel", selected_channel, conv)
         with col2:
+            redact = st.checkbox("익명화", key="redact_channel_export", help="사용자는 가명으로, 이메일/전화번호/민감 단어는 대체 문자열로 바꿔 내보냅니다")
             if st.button("💾 대화 내보내기"):
+                redactor = get_redactor() if redact else None
+                # 익명화 파일 이름에는 실제 이름 대신 익명화한 채널 이름 사용
+                file_stem = redactor.file_stem("channel", selected_channel) if redact else selected_channel
                 file_path = export_conversation_to_txt(
                     conv, 
                     archive_manager.user_mapping,
-                    f"channel_{selected_channel}"
+                    f"channel_{file_stem}{'_익명화' if redact else ''}",
+                    messages=archive_manager.query_conversation("channel", selected_channel, categories=categories),
+                    redactor=redactor
                 )
                 with open(file_path, "r", encoding="utf-8") as f:
                     st.download_button(
                         "📥 TXT 파일 다운로드",
                         f,
-                        file_name=f"{selected_channel}_대화.txt",
+                        file_name=f"{file_stem}_대화{'_익명화' if redact else ''}.txt",
                         mime="text/plain"
                     )
         
         # 메시지 표시
-        filtered_messages = render_period_filter(conv.messages)
+        start_ts, end_ts = render_message_period_filter(conv.messages)
+        filtered_messages = archive_manager.query_conversation("channel", selected_channel, start_ts=start_ts, end_ts=end_ts, categories=categories)
         for msg in filtered_messages:
-            time_str = msg.get_datetime().strftime('%Y-%m-%d %H:%M:%S')
-            display_name = archive_manager.user_mapping.get_name(msg.user_id)
-            st.write(f"[{time_str}] **{display_name}**: {msg.text}")
+            st.write(f"[{msg.display_time}] **{msg.display_name}**: {renderer.render(msg)}")
             # 스레드 메시지 표시 (msg.replies 사용)
             if msg.replies:
                 with st.expander(f"스레드 보기 ({len(msg.replies)}개 답글)"):
                     for t_msg in sorted(msg.replies, key=lambda x: x.ts):
-                        t_time = t_msg.get_datetime().strftime('%Y-%m-%d %H:%M:%S')
-                        t_display = archive_manager.user_mapping.get_name(t_msg.user_id)
-                        st.write(f"[{t_time}] **{t_display}**: {t_msg.text}")
+                        st.write(f"[{t_msg.display_time}] **{t_msg.display_name}**: {renderer.render(t_msg)}")
+        render_similar_messages("channel", selected_channel, filtered_messages, key="channel")
 
 # --------------------
 # DM 보기 페이지
 elif menu_option == "DM 보기":
     st.header("DM 보기")
-    dm_names = archive_manager.get_dm_names()
+    # 표시용 이름과 실제 키의 매핑은 로드 시 만든 DM 메타데이터 인덱스에서 가져옴
+    display_to_key = archive_manager.dm_index.get_display_to_key()
     
-    if not dm_names:
+    if not display_to_key:
         st.error("DM 대화를 찾을 수 없습니다.")
     else:
         st.sidebar.write("### DM 목록")
         
-        # 표시용 이름과 실제 키를 매핑
-        display_to_key = {}
-        for name in dm_names:
-            if name.startswith('C'):  # 그룹 DM인 경우
-                display_name = archive_manager.dm_mapping.get_name(name)
-            else:  # 1:1 DM인 경우
-                display_name = name.split('_')[0] if '_' in name else name
-            display_to_key[display_name] = name
-        
         # 정렬된 표시 이름 목록
         display_names = sorted(display_to_key.keys())
         
@@ -293,26 +469,37 @@ elif menu_option == "DM 보기":
             key="dm_select",
             format_func=lambda x: f"👥 {x}"  # 이모지 추가
         )
+        categories = render_message_kind_filter()
         
         # 선택된 표시 이름에 해당하는 실제 키로 변환
         selected_key = display_to_key[selected_display]
+        dm_info = archive_manager.dm_index.get(selected_key)
         
         # 제목과 내보내기 버튼을 상단에 배치
         col1, col2 = st.columns([3, 1])
         with col1:
             st.subheader(f"DM 대화: {selected_display}")
+            if dm_info.first_ts is not None:
+                first_time, last_time = format_local_times([dm_info.first_ts, dm_info.last_ts])
+                st.caption(f"참여자: {', '.join(dm_info.participant_names)} · 메시지 {dm_info.message_count}개 · {first_time[:10]} ~ {last_time[:10]}")
+                render_category_counts("dm", selected_key, archive_manager.dms.get(selected_key))
         with col2:
+            redact = st.checkbox("익명화", key="redact_dm_export", help="사용자는 가명으로, 이메일/전화번호/민감 단어는 대체 문자열로 바꿔 내보냅니다")
             if st.button("💾 대화 내보내기"):
+                redactor = get_redactor() if redact else None
+                # DM 키와 표시 이름에는 사용자 이름이 들어 있으므로 익명화 파일 이름은 키의 해시로 만듦
                 file_path = export_conversation_to_txt(
                     archive_manager.dms.get(selected_key),
                     archive_manager.user_mapping,
-                    f"dm_{selected_key}"
+                    f"{redactor.file_stem('dm', selected_key)}_익명화" if redact else f"dm_{selected_key}",
+                    messages=archive_manager.query_conversation("dm", selected_key, categories=categories),
+                    redactor=redactor
                 )
                 with open(file_path, "r", encoding="utf-8") as f:
                     st.download_button(
                         "📥 TXT 파일 다운로드",
                         f,
-                        file_name=f"{selected_display}_대화.txt",
+                        file_name=f"{redactor.file_stem('dm', selected_key)}_대화_익명화.txt" if redact else f"{selected_display}_대화.txt",
                         mime="text/plain"
                     )
         
@@ -323,20 +510,18 @@ elif menu_option == "DM 보기":
             if view_mode == "파싱된 메시지":
                 if archive_manager.dms.get(selected_key) and archive_manager.dms.get(selected_key).messages:
                     # 기간 필터 UI 추가
-                    filtered_messages = render_period_filter(archive_manager.dms.get(selected_key).messages)
+                    start_ts, end_ts = render_message_period_filter(archive_manager.dms.get(selected_key).messages)
+                    filtered_messages = archive_manager.query_conversation("dm", selected_key, start_ts=start_ts, end_ts=end_ts, categories=categories)
                     
                     st.write(f"### 메시지 ({len(filtered_messages)}개)")
                     for msg in filtered_messages:
-                        time_str = msg.get_datetime().strftime('%Y-%m-%d %H:%M:%S')
-                        display_name = archive_manager.user_mapping.get_name(msg.user_id)
-                        st.write(f"[{time_str}] **{display_name}**: {msg.text}")
+                        st.write(f"[{msg.display_time}] **{msg.display_name}**: {renderer.render(msg)}")
                         # 스레드 메시지 표시 (msg.replies 사용)
                         if msg.replies:
                             with st.expander(f"스레드 보기 ({len(msg.replies)}개 답글)"):
                                 for t_msg in sorted(msg.replies, key=lambda x: x.ts):
-                                    t_time = t_msg.get_datetime().strftime('%Y-%m-%d %H:%M:%S')
-                                    t_display = archive_manager.user_mapping.get_name(t_msg.user_id)
-                                    st.write(f"[{t_time}] **{t_display}**: {t_msg.text}")
+                                    st.write(f"[{t_msg.display_time}] **{t_msg.display_name}**: {renderer.render(t_msg)}")
+                    render_similar_messages("dm", selected_key, filtered_messages, key="dm")
                 else:
                     st.info("파싱된 메시지가 없습니다.")
                 
@@ -348,40 +533,333 @@ elif menu_option == "DM 보기":
 elif menu_option == "검색":
     st.header("메시지 검색")
     search_source = st.sidebar.radio("대상 선택", options=["채널", "DM"])
+    search_all_workspaces = len(workspace_names) > 1 and st.sidebar.checkbox("모든 워크스페이스에서 검색", key="search_all_workspaces")
+    categories = render_message_kind_filter()
     keyword = st.text_input("검색어 입력")
     if search_source == "채널":
         conv_names = archive_manager.get_channel_names()
-        conv_dict = archive_manager.channels
     else:
         conv_names = archive_manager.get_dm_names()
-        conv_dict = archive_manager.dms
-    if not conv_names:
+    if search_all_workspaces:
+        # 모든 워크스페이스의 모든 대화에 병렬로 검색하고 ts 순으로 합침
+        if keyword:
+            results = sharded_archive.search(keyword, source="channel" if search_source == "채널" else "dm", categories=categories)
+            # 결과는 (ts, 워크스페이스, source, 대화, 메시지)를 ts 순으로 합친 목록
+            start_ts, end_ts = render_period_range_filter(
+                TimestampView(results, lambda result: result[0]),
+                [results[0][4].display_time, results[-1][4].display_time] if results else None)
+            filtered_results = [result for result in results if start_ts is None or start_ts <= result[0] < end_ts]
+            st.subheader(f"'{keyword}' 검색 결과 ({len(filtered_results)}건)")
+            for _, workspace, _, conv_name, msg in filtered_results:
+                workspace_renderer = get_renderer(sharded_archive.shards[workspace], workspace, sharded_archive.shards[workspace].load_id)
+                st.write(f"[{workspace} / {conv_name}] [{msg.display_time}] **{msg.display_name}**: {workspace_renderer.render(msg)}")
+    elif not conv_names:
         st.error(f"{search_source} 대화를 찾을 수 없습니다.")
     else:
         selected_conv = st.selectbox(f"{search_source} 선택", options=conv_names, key="search_conv")
-        conv = conv_dict.get(selected_conv)
+        source = "channel" if search_source == "채널" else "dm"
         if keyword:
-            results = conv.search_messages(keyword)
-            filtered_results = render_period_filter(results) # Changed from render_simplified_period_filter
+            # 검색 결과와 기간 필터 결과 모두 아카이브 버전별 결과 캐시를 사용
+            results = archive_manager.query_conversation(source, selected_conv, keyword, categories=categories)
+            start_ts, end_ts = render_message_period_filter(results)
+            filtered_results = archive_manager.query_conversation(source, selected_conv, keyword, start_ts, end_ts, categories=categories)
             st.subheader(f"'{keyword}' 검색 결과 ({len(filtered_results)}건)")
             for msg in filtered_results:
-                time_str = msg.get_datetime().strftime('%Y-%m-%d %H:%M:%S')
-                display_name = archive_manager.user_mapping.get_name(msg.user_id)
-                st.write(f"[{time_str}] **{display_name}**: {msg.text}")
+                st.write(f"[{msg.display_time}] **{msg.display_name}**: {renderer.render(msg)}")
+            render_similar_messages(source, selected_conv, filtered_results, key="search")
+
+# --------------------
+# 사용자별 보기 페이지 (채널/DM 전체에서 한 사용자의 메시지를 시간순으로)
+elif menu_option == "사용자별 보기":
+    st.header("사용자별 보기")
+    user_postings = archive_manager.user_postings
+    user_ids = user_postings.get_user_ids()
+    if not user_ids:
+        st.error("사용자를 찾을 수 없습니다.")
+    else:
+        selected_uid = st.sidebar.selectbox(
+            "사용자 선택",
+            options=user_ids,
+            format_func=lambda x: f"{archive_manager.user_mapping.get_name(x)} ({x})",
+            key="posting_user"
+        )
+        start_ts, end_ts = render_period_range_filter(user_postings.timestamps.get(selected_uid, []))
+        total = user_postings.count(selected_uid, start_ts, end_ts)
+        page_size = 50
+        page_count = max(1, math.ceil(total / page_size))
+        page = st.number_input("페이지", min_value=1, max_value=page_count, value=1, step=1, key="posting_page")
+
+        st.subheader(f"{archive_manager.user_mapping.get_name(selected_uid)}의 메시지 ({total}개, {page}/{page_count} 페이지)")
+        for posting in user_postings.get_page(selected_uid, page - 1, page_size, start_ts, end_ts):
+            msg = archive_manager.resolve_posting(posting)
+            label = "채널" if posting[1] == "channel" else "DM"
+            reply_mark = "↳ 스레드 답글: " if posting[4] >= 0 else ""
+            st.write(f"[{label}: {posting[2]}] [{msg.display_time}] {reply_mark}{renderer.render(msg)}")
+
+# --------------------
+# 전체 타임라인 페이지 (모든 채널/DM의 메시지를 시간순으로 합쳐 앞뒤로 페이지 이동)
+elif menu_option == "전체 타임라인":
+    st.header("전체 타임라인")
+    latest = next(archive_manager.iter_timeline(reverse=True), None)
+    if latest is None:
+        st.error("메시지를 찾을 수 없습니다.")
+    else:
+        start_date = st.sidebar.date_input(
+            "시작 날짜",
+            value=datetime.datetime.fromtimestamp(latest[0]).date(),
+            key="timeline_start_date"
+        )
+        start_ts = datetime.datetime.combine(start_date, datetime.time()).timestamp()
+        categories = render_message_kind_filter()
+        page_size = 50
+
+        # 시작 날짜나 워크스페이스가 바뀌면 해당 시점부터 다시 보기
+        timeline_state = st.session_state.get("timeline_state")
+        if timeline_state is None or timeline_state["anchor"] != (selected_workspace, start_ts, categories):
+            timeline_state = {"anchor": (selected_workspace, start_ts, categories), "cursor": start_ts, "reverse": False}
+            st.session_state["timeline_state"] = timeline_state
+        page = archive_manager.get_timeline_page(timeline_state["cursor"], page_size, reverse=timeline_state["reverse"], categories=categories)
+
+        def move_timeline(cursor, reverse):
+            st.session_state["timeline_state"].update(cursor=cursor, reverse=reverse)
+
+        col1, col2 = st.columns(2)
+        col1.button(
+            "◀ 이전", key="timeline_prev",
+            disabled=timeline_state["reverse"] and len(page) < page_size,
+            on_click=move_timeline, args=(page[0] if page else timeline_state["cursor"], True)
+        )
+        col2.button(
+            "다음 ▶", key="timeline_next",
+            disabled=not timeline_state["reverse"] and len(page) < page_size,
+            on_click=move_timeline, args=(page[-1] if page else timeline_state["cursor"], False)
+        )
+
+        if not page:
+            st.info("이 시점 이후의 메시지가 없습니다.")
+        for posting in page:
+            msg = archive_manager.resolve_posting(posting)
+            label = "채널" if posting[1] == "channel" else "DM"
+            reply_count = f" (답글 {len(msg.replies)}개)" if msg.replies else ""
+            st.write(f"[{msg.display_time}] [{label}: {posting[2]}] **{msg.display_name}**: {renderer.render(msg)}{reply_count}")
+
+# --------------------
+# 키워드 트렌드 페이지 (대화/기간별 상위 단어, 단어 추이, 급상승 단어)
+elif menu_option == "키워드 트렌드":
+    import pandas as pd
+    from term_stats import month_label
+
+    st.header("키워드 트렌드")
+    term_index = load_term_index(archive_manager, selected_workspace, archive_manager.load_id, archive_manager.version)
+    months = term_index.get_months()
+    if not months:
+        st.error("집계할 메시지가 없습니다.")
+    else:
+        def conversation_label(conv):
+            source, conv_name = conv
+            return f"#{conv_name}" if source == "channel" else f"DM: {archive_manager.dm_index.get(conv_name).display_name}"
+
+        selected_conversations = st.sidebar.multiselect(
+            "대화 선택 (비우면 전체)",
+            options=term_index.conversations,
+            format_func=conversation_label,
+            key="trend_conversations"
+        )
+        conversations = selected_conversations or None
+        if len(months) > 1:
+            start_month, end_month = st.sidebar.select_slider(
+                "기간", options=months, value=(months[0], months[-1]), format_func=month_label, key="trend_months"
+            )
+        else:
+            start_month = end_month = months[0]
+            st.sidebar.info(f"기간: {month_label(months[0])}")
+        top_k = st.sidebar.slider("표시할 단어 수", min_value=5, max_value=50, value=20, step=5, key="trend_top_k")
+
+        tab1, tab2, tab3 = st.tabs(["상위 단어", "단어 추이", "급상승 단어"])
+        with tab1:
+            top_terms = term_index.top_terms(conversations, start_month, end_month, top_k)
+            if top_terms:
+                df_top = pd.DataFrame(top_terms, columns=["단어", "횟수"])
+                st.bar_chart(df_top.set_index("단어"))
+                st.dataframe(df_top)
+            else:
+                st.info("해당 기간에 단어가 없습니다.")
+        with tab2:
+            terms_input = st.text_input(
+                "단어 (쉼표로 구분)", value=", ".join(term for term, _ in top_terms[:3]), key="trend_terms"
+            )
+            terms = [term.strip().lower() for term in terms_input.split(",") if term.strip()]
+            trend_months, series = term_index.term_over_time(terms, conversations, start_month, end_month)
+            if series:
+                st.line_chart(pd.DataFrame(series, index=[month_label(month) for month in trend_months]))
+            else:
+                st.info("표시할 단어를 입력하세요.")
+        with tab3:
+            window = st.slider("비교할 이전 개월 수", min_value=1, max_value=12, value=3, key="trend_window")
+            st.caption(f"{month_label(end_month)}의 단어 사용 비율을 직전 {window}개월과 비교합니다.")
+            rising = term_index.rising_terms(end_month, window, conversations, top_k)
+            if rising:
+                st.dataframe(pd.DataFrame(
+                    [(term, count, round(previous, 1), round(score, 2)) for term, count, previous, score in rising],
+                    columns=["단어", "이번 달", "이전 월평균", "점수"]
+                ))
+            else:
+                st.info("급상승한 단어가 없습니다.")
+
+# --------------------
+# 리액션 페이지 (로드 시 만든 리액션 인덱스로 반응이 많은 메시지와 사용자별 이모지)
+elif menu_option == "리액션":
+    import pandas as pd
+
+    st.header("리액션")
+    reaction_index = archive_manager.reaction_index
+    if not reaction_index.postings:
+        st.error("리액션이 달린 메시지가 없습니다.")
+    else:
+        def conversation_label(conv):
+            source, conv_name = conv
+            return f"#{conv_name}" if source == "channel" else f"DM: {archive_manager.dm_index.get(conv_name).display_name}"
+
+        selected_conversations = st.sidebar.multiselect(
+            "대화 선택 (비우면 전체)",
+            options=reaction_index.conversations,
+            format_func=conversation_label,
+            key="reaction_conversations"
+        )
+        conversations = selected_conversations or None
+        start_ts, end_ts = render_period_range_filter(reaction_index.row_ts)
+        top_k = st.sidebar.slider("표시할 개수", min_value=5, max_value=100, value=20, step=5, key="reaction_top_k")
+
+        tab1, tab2, tab3 = st.tabs(["반응이 많은 메시지", "이모지 순위", "누가 무엇으로"])
+        with tab1:
+            emoji = st.selectbox(
+                "이모지", options=[None] + reaction_index.emojis,
+                format_func=lambda x: "전체" if x is None else f"{renderer.render_text(f':{x}:')} {x}",
+                key="reaction_emoji"
+            )
+            top_messages = reaction_index.top_messages(top_k, conversations, start_ts, end_ts, emoji)
+            if not top_messages:
+                st.info("해당 조건에 리액션이 달린 메시지가 없습니다.")
+            for posting, count in top_messages:
+                msg = archive_manager.resolve_posting(posting)
+                reactions = " ".join(
+                    f"{renderer.render_text(f':{name}:')}{reaction_count}"
+                    for name, reaction_count in sorted(reaction_index.get_reactions(posting).items(), key=lambda item: -item[1])
+                )
+                reply_mark = "↳ 스레드 답글: " if posting[4] >= 0 else ""
+                st.write(f"**{count}** [{conversation_label(posting[1:3])}] [{msg.display_time}] **{msg.display_name}**: {reply_mark}{renderer.render(msg)}")
+                st.caption(reactions)
+        with tab2:
+            emoji_totals = reaction_index.emoji_totals(conversations, start_ts, end_ts, top_k)
+            if emoji_totals:
+                df_emoji = pd.DataFrame(
+                    [(f"{renderer.render_text(f':{name}:')} {name}", total) for name, total in emoji_totals],
+                    columns=["이모지", "횟수"]
+                )
+                st.bar_chart(df_emoji.set_index("이모지"))
+                st.dataframe(df_emoji)
+            else:
+                st.info("해당 조건에 리액션이 없습니다.")
+        with tab3:
+            col1, col2 = st.columns(2)
+            with col1:
+                reactor = st.selectbox(
+                    "사용자", options=[None] + reaction_index.users,
+                    format_func=lambda x: "전체" if x is None else f"{archive_manager.user_mapping.get_name(x)} ({x})",
+                    key="reaction_user"
+                )
+            with col2:
+                reactor_emoji = st.selectbox(
+                    "이모지", options=[None] + reaction_index.emojis,
+                    format_func=lambda x: "전체" if x is None else f"{renderer.render_text(f':{x}:')} {x}",
+                    key="reaction_reactor_emoji"
+                )
+            reactor_counts = reaction_index.reactor_emoji_counts(conversations, start_ts, end_ts, reactor, reactor_emoji, top_k)
+            if reactor_counts:
+                st.dataframe(pd.DataFrame(
+                    [(archive_manager.user_mapping.get_name(user_id), user_id, f"{renderer.render_text(f':{name}:')} {name}", count)
+                     for user_id, name, count in reactor_counts],
+                    columns=["사용자", "User ID", "이모지", "횟수"]
+                ))
+            else:
+                st.info("해당 조건에 리액션한 사용자 기록이 없습니다.")
+
+# --------------------
+# 파일 페이지 (로드 시 만든 첨부 파일 테이블을 이름/종류/대화/사용자/기간으로 필터)
+elif menu_option == "파일":
+    import pandas as pd
+
+    st.header("파일")
+    file_index = archive_manager.file_index
+    if not file_index.postings:
+        st.error("첨부 파일이 있는 메시지가 없습니다.")
+    else:
+        def conversation_label(conv):
+            source, conv_name = conv
+            return f"#{conv_name}" if source == "channel" else f"DM: {archive_manager.dm_index.get(conv_name).display_name}"
+
+        def format_size(size):
+            for unit in ("B", "KB", "MB"):
+                if size < 1024:
+                    return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+                size /= 1024
+            return f"{size:.1f} GB"
+
+        type_counts = dict(file_index.type_counts())
+        query = st.text_input("파일 이름 검색 (단어의 앞부분만 입력해도 됨)", key="file_query")
+        selected_types = st.sidebar.multiselect(
+            "종류 (비우면 전체)",
+            options=list(type_counts),
+            format_func=lambda x: f"{x} ({type_counts[x]})",
+            key="file_types"
+        )
+        selected_conversations = st.sidebar.multiselect(
+            "대화 선택 (비우면 전체)",
+            options=file_index.conversations,
+            format_func=conversation_label,
+            key="file_conversations"
+        )
+        file_user = st.sidebar.selectbox(
+            "올린 사용자", options=[None] + file_index.users,
+            format_func=lambda x: "전체" if x is None else f"{archive_manager.user_mapping.get_name(x)} ({x})",
+            key="file_user"
+        )
+        start_ts, end_ts = render_period_range_filter(file_index.row_ts)
+
+        started = time.perf_counter()
+        total, rows = file_index.search(
+            query, selected_types or None, selected_conversations or None, file_user, start_ts, end_ts, limit=200
+        )
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        st.caption(f"전체 {len(file_index.postings)}개 중 {total}개 ({elapsed_ms:.1f}ms){' - 최근 200개만 표시' if total > 200 else ''}")
+        if rows:
+            file_rows = []
+            for row in rows:
+                file_meta = file_index.get_row(row)
+                msg = archive_manager.resolve_posting(file_meta["posting"])
+                file_rows.append({
+                    "시각": msg.display_time,
+                    "이름": file_meta["name"],
+                    "제목": file_meta["title"] if file_meta["title"] != file_meta["name"] else "",
+                    "종류": file_meta["type"],
+                    "크기": format_size(file_meta["size"]),
+                    "대화": conversation_label((file_meta["source"], file_meta["conversation"])),
+                    "올린 사용자": msg.display_name,
+                })
+            st.dataframe(pd.DataFrame(file_rows))
 
 # --------------------
 # 사용자 매핑 업데이트 페이지
 elif menu_option == "사용자 매핑 업데이트":
+    import pandas as pd
+
     tab1, tab2 = st.tabs(["사용자 ID 매핑", "DM 이름 매핑"])
     
     with tab1:
         st.header("사용자 ID 매핑")
         
-        # 사용자 통계 수집
-        archive_manager.user_mapping.collect_user_stats(
-            archive_manager.channels,
-            archive_manager.dms
-        )
+        # 사용자 통계 (warm-up 또는 이전 요청에서 같은 아카이브 버전으로 계산했으면 재사용)
+        archive_manager.build_user_stats()
         
         # 전체 사용자 ID 목록 표시
         all_user_ids = archive_manager.user_mapping.user_stats.keys()
@@ -432,35 +910,25 @@ elif menu_option == "사용자 매핑 업데이트":
                 
                 submitted = st.form_submit_button("매핑 업데이트")
                 if submitted and new_name:
-                    archive_manager.user_mapping.update_mapping(selected_uid, new_name)
+                    archive_manager.update_user_name(selected_uid, new_name)
                     st.success(f"매핑 업데이트 완료: {selected_uid} → {new_name}")
                     st.rerun()  # experimental_rerun 대신 rerun 사용
 
     with tab2:
         st.header("DM 이름 매핑")
         
-        # DM ID 목록 (C로 시작하는 그룹 DM만)
-        dm_ids = [name for name in archive_manager.get_dm_names() 
-                 if name.startswith('C')]
+        # 그룹 DM(로드할 때 소스가 dm_group으로 정한 DM)의 메타데이터 (참여자/메시지 수는 로드 시 계산된 인덱스에서 읽음)
+        group_dms = archive_manager.dm_index.get_group_dms()
+        dm_ids = [info.dm_id for info in group_dms]
         
         # DM 매핑 테이블 표시
         dm_mapping_data = []
-        for dm_id in dm_ids:
-            conv = archive_manager.dms.get(dm_id)
-            message_count = len(conv.messages) if conv else 0
-            current_name = archive_manager.dm_mapping.get_name(dm_id)
-            
-            # 참여자 목록 추출
-            participants = set()
-            if conv:
-                for msg in conv.messages:
-                    participants.add(archive_manager.user_mapping.get_name(msg.user_id))
-            
+        for info in group_dms:
             dm_mapping_data.append({
-                "DM ID": dm_id,
-                "현재 이름": current_name if current_name != dm_id else "-",
-                "메시지 수": message_count,
-                "참여자": ", ".join(sorted(participants))
+                "DM ID": info.dm_id,
+                "현재 이름": info.display_name if info.display_name != info.dm_id else "-",
+                "메시지 수": info.message_count,
+                "참여자": ", ".join(info.participant_names)
             })
         
         df_dm = pd.DataFrame(dm_mapping_data)
@@ -483,4 +951,99 @@ elif menu_option == "사용자 매핑 업데이트":
                 if new_dm_name:
                     archive_manager.dm_mapping.update_mapping(selected_dm, new_dm_name)
                     st.success(f"DM 이름 업데이트 완료: {selected_dm} → {new_dm_name}")
-                    st.rerun()
\ No newline at end of file
+                    st.rerun()
+
+# --------------------
+# 로드 진단 페이지 (파일별 로드 시간/크기와 실패해 격리된 파일)
+elif menu_option == "로드 진단":
+    import pandas as pd
+
+    st.header("로드 진단")
+    diagnostics = archive_manager.load_diagnostics
+    summary = diagnostics.summary()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("파일 수", summary["files"])
+    col2.metric("실패(격리)", summary["failed"])
+    col3.metric("크기", f"{summary['bytes'] / 2**20:.1f} MB")
+    col4.metric("파싱 시간 합계", f"{summary['seconds']:.2f}초")
+
+    st.subheader("가장 느린 파일")
+    slowest_count = st.slider("표시할 파일 수", min_value=5, max_value=100, value=20, step=5, key="slowest_count")
+    slowest = diagnostics.slowest(slowest_count)
+    if slowest:
+        st.dataframe(pd.DataFrame([{
+            "파일": record.member,
+            "대화": record.key[1],
+            "시간(ms)": round(record.seconds * 1000, 1),
+            "비중(%)": round(record.seconds / summary["seconds"] * 100, 1) if summary["seconds"] else 0.0,
+            "크기(KB)": round(record.size_bytes / 1024, 1),
+            "메시지 수": record.message_count,
+            "오류": record.error_class or "",
+        } for record in slowest]))
+    else:
+        st.info("로드 기록이 없습니다.")
+
+    st.subheader("실패한 파일 (격리)")
+    failed = diagnostics.failed()
+    if failed:
+        st.dataframe(pd.DataFrame([{
+            "파일": record.member,
+            "대화": record.key[1],
+            "오류 종류": record.error_class,
+            "오류 내용": record.error_message,
+        } for record in failed]))
+        if st.button("격리된 파일 다시 시도", key="retry_quarantined"):
+            recovered = archive_manager.retry_quarantined()
+            st.success(f"{recovered}개 파일을 다시 읽어 반영했습니다. (남은 격리 파일 {len(diagnostics.quarantine)}개)")
+    else:
+        st.success("실패한 파일이 없습니다.")
+
+# --------------------
+# 메모리 사용량 페이지 (로드 시 잰 대화별 메모리 사용량)
+elif menu_option == "메모리 사용량":
+    import pandas as pd
+
+    st.header("메모리 사용량")
+    footprints = list(archive_manager.footprints.values())
+    if not footprints:
+        st.info("메모리 사용량 기록이 없습니다. (memory.track_footprint 설정을 확인하세요)")
+    else:
+        summary = summarize_footprints(footprints)
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("대화 수", summary["conversations"])
+        col2.metric("전체 추정 크기", f"{summary['total_bytes'] / 2**20:.1f} MB")
+        col3.metric("blocks", f"{summary['blocks_bytes'] / 2**20:.1f} MB",
+                    help="Slack 원본 blocks 데이터. 텍스트가 없는 메시지를 표시할 때만 사용합니다.")
+        col4.metric("표시되지 않는 blocks", f"{summary['unrendered_blocks_bytes'] / 2**20:.1f} MB",
+                    help="텍스트가 있어 화면에 쓰이지 않는데도 메모리에 남아 있는 blocks")
+
+        st.subheader("항목별 합계")
+        st.dataframe(pd.DataFrame([{
+            "항목": PART_LABELS[part],
+            "크기(MB)": round(summary[f"{part}_bytes"] / 2**20, 2),
+            "비중(%)": round(summary[f"{part}_bytes"] / summary["total_bytes"] * 100, 1) if summary["total_bytes"] else 0.0,
+        } for part in FOOTPRINT_PARTS]))
+
+        st.subheader("대화별 사용량")
+        footprint_count = st.slider("표시할 대화 수", min_value=10, max_value=500, value=50, step=10, key="footprint_count")
+        rows = []
+        for footprint in sorted(footprints, key=lambda footprint: footprint.total_bytes, reverse=True)[:footprint_count]:
+            dm_info = archive_manager.dm_index.get(footprint.name) if footprint.kind == "dm" else None
+            row = {
+                "대화": dm_info.display_name if dm_info is not None else footprint.name,
+                "종류": "채널" if footprint.kind == "channel" else "DM",
+                "메시지 수": footprint.message_count,
+                "답글 수": footprint.reply_count,
+                "전체(KB)": round(footprint.total_bytes / 1024, 1),
+            }
+            row.update({f"{PART_LABELS[part]}(KB)": round(footprint.parts[part] / 1024, 1) for part in FOOTPRINT_PARTS})
+            row["표시되지 않는 blocks(KB)"] = round(footprint.unrendered_blocks_bytes / 1024, 1)
+            rows.append(row)
+        st.dataframe(pd.DataFrame(rows))
+
+        st.download_button(
+            "📥 메트릭 내려받기 (Prometheus 형식)",
+            footprint_metrics({selected_workspace: footprints}),
+            file_name=f"memory_footprint_{selected_workspace}.prom",
+            mime="text/plain",
+        )
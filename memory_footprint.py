@@ -0,0 +1,109 @@
+import time
+from typing import Dict, Iterable, List, Optional
+
+from conversation_cache import deep_sizeof
+
+# 분해 항목 (측정 순서이기도 함. 여러 항목이 공유하는 객체는 먼저 잰 항목에만 포함)
+FOOTPRINT_PARTS = ["blocks", "reactions", "text", "replies", "messages", "other"]
+PART_LABELS = {
+    "blocks": "blocks",
+    "reactions": "reactions",
+    "text": "텍스트",
+    "replies": "답글 구조",
+    "messages": "메시지 구조",
+    "other": "기타",
+}
+
+
+class ConversationFootprint:
+    """
+    대화 하나의 메모리 사용량 추정치(바이트)와 항목별 분해.
+    replies/messages는 blocks/reactions/텍스트를 뺀 Message 객체 자체(ts, 사용자, 표시 필드 등)의 크기이고,
+    unrendered_blocks_bytes는 텍스트가 있어 화면에 blocks를 쓰지 않는 메시지가 들고 있는 blocks 크기다.
+    """
+    def __init__(self, kind, name, message_count, reply_count, parts: Dict[str, int], unrendered_blocks_bytes):
+        self.kind = kind
+        self.name = name
+        self.message_count = message_count
+        self.reply_count = reply_count
+        self.parts = parts
+        self.unrendered_blocks_bytes = unrendered_blocks_bytes
+        self.measured_at = time.time()
+
+    @property
+    def total_bytes(self):
+        return sum(self.parts.values())
+
+
+def measure_conversation(kind, conv) -> ConversationFootprint:
+    """대화의 메모리 사용량을 항목별로 나눠 잰다 (객체는 처음 잰 항목에만 포함)"""
+    seen = set()
+    parts = dict.fromkeys(FOOTPRINT_PARTS, 0)
+    all_messages = list(conv.iter_all_messages())
+    replies = [reply for msg in conv.messages for reply in msg.replies]
+
+    # 텍스트가 있으면 렌더러는 blocks를 쓰지 않으므로 그런 메시지의 blocks를 먼저 따로 잰다
+    unrendered_blocks = 0
+    for msg in all_messages:
+        if msg.blocks is not None and msg.text:
+            unrendered_blocks += deep_sizeof(msg.blocks, seen)
+    parts["blocks"] = unrendered_blocks + sum(deep_sizeof(msg.blocks, seen) for msg in all_messages if msg.blocks is not None)
+    parts["reactions"] = sum(deep_sizeof(msg.reactions, seen) for msg in all_messages if msg.reactions is not None)
+    # 압축한 경우 텍스트는 대화의 압축 저장소에 있음
+    parts["text"] = deep_sizeof(conv.text_store, seen) if conv.text_store is not None else 0
+    parts["text"] += sum(deep_sizeof(msg._text, seen) for msg in all_messages if msg._text is not None)
+    parts["replies"] = sum(deep_sizeof(reply, seen) for reply in replies)
+    parts["messages"] = sum(deep_sizeof(msg, seen) for msg in conv.messages)
+    parts["other"] = deep_sizeof(conv, seen)
+    return ConversationFootprint(kind, conv.name, len(conv.messages), len(replies), parts, unrendered_blocks)
+
+
+def summarize_footprints(footprints: Iterable[ConversationFootprint]) -> Dict[str, int]:
+    """전체 합계: 대화 수, 메시지/답글 수, 항목별 바이트, 표시되지 않는 blocks 바이트"""
+    summary = {"conversations": 0, "messages": 0, "replies": 0, "total_bytes": 0, "unrendered_blocks_bytes": 0}
+    summary.update({f"{part}_bytes": 0 for part in FOOTPRINT_PARTS})
+    for footprint in footprints:
+        summary["conversations"] += 1
+        summary["messages"] += footprint.message_count
+        summary["replies"] += footprint.reply_count
+        summary["total_bytes"] += footprint.total_bytes
+        summary["unrendered_blocks_bytes"] += footprint.unrendered_blocks_bytes
+        for part, size in footprint.parts.items():
+            summary[f"{part}_bytes"] += size
+    return summary
+
+
+def _label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def footprint_metrics(footprints_by_workspace: Dict[str, Iterable[ConversationFootprint]],
+                      top_n: Optional[int] = None) -> str:
+    """
+    Prometheus 텍스트 형식 메트릭. 워크스페이스별 합계와 대화별(top_n이 있으면 큰 순으로 top_n개) 항목별 크기.
+    node_exporter의 textfile collector 등에서 그대로 읽을 수 있다.
+    """
+    lines: List[str] = [
+        "# HELP slack_archive_workspace_bytes 워크스페이스 대화의 항목별 메모리 사용량 추정치 (바이트)",
+        "# TYPE slack_archive_workspace_bytes gauge",
+    ]
+    conversation_lines = [
+        "# HELP slack_archive_conversation_bytes 대화별 항목별 메모리 사용량 추정치 (바이트)",
+        "# TYPE slack_archive_conversation_bytes gauge",
+    ]
+    unrendered_lines = [
+        "# HELP slack_archive_unrendered_blocks_bytes 화면에 쓰이지 않는 blocks 원본 데이터 크기 (바이트)",
+        "# TYPE slack_archive_unrendered_blocks_bytes gauge",
+    ]
+    for workspace, footprints in footprints_by_workspace.items():
+        footprints = sorted(footprints, key=lambda footprint: footprint.total_bytes, reverse=True)
+        summary = summarize_footprints(footprints)
+        workspace_label = f'workspace="{_label_value(workspace)}"'
+        for part in FOOTPRINT_PARTS:
+            lines.append(f'slack_archive_workspace_bytes{{{workspace_label},part="{part}"}} {summary[f"{part}_bytes"]}')
+        unrendered_lines.append(f"slack_archive_unrendered_blocks_bytes{{{workspace_label}}} {summary['unrendered_blocks_bytes']}")
+        for footprint in footprints[:top_n] if top_n else footprints:
+            labels = f'{workspace_label},source="{footprint.kind}",conversation="{_label_value(footprint.name)}"'
+            for part in FOOTPRINT_PARTS:
+                conversation_lines.append(f'slack_archive_conversation_bytes{{{labels},part="{part}"}} {footprint.parts[part]}')
+    return "\n".join(lines + conversation_lines + unrendered_lines) + "\n"
@@ -0,0 +1,131 @@
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# 메시지 분류: 사람이 쓴 메시지, 봇/연동이 올린 메시지, 입장/퇴장/주제 변경 같은 시스템 메시지
+MESSAGE_CATEGORIES = ["human", "bot", "system"]
+CATEGORY_LABELS = {"human": "사람", "bot": "봇/연동", "system": "시스템"}
+# 사람이 쓴 내용을 담는 subtype ("" = subtype 없음). bot_id가 있으면 봇/연동으로 분류
+HUMAN_SUBTYPES = {"", "thread_broadcast", "file_share", "me_message"}
+BOT_SUBTYPES = {"bot_message"}
+
+
+def message_category(subtype: Optional[str], bot_id: Optional[str]) -> str:
+    """subtype과 bot_id로 메시지 분류 (MESSAGE_CATEGORIES 중 하나)"""
+    subtype = subtype or ""
+    if subtype in BOT_SUBTYPES:
+        return "bot"
+    if subtype not in HUMAN_SUBTYPES:
+        return "system"
+    return "bot" if bot_id else "human"
+
+
+def _union(bitmaps: Iterable[np.ndarray], size: int) -> np.ndarray:
+    result = np.zeros(size, dtype=np.uint8)
+    for bitmap in bitmaps:
+        result |= bitmap
+    return result
+
+
+class ConversationKinds:
+    """
+    메시지 목록(행 = 목록 인덱스)의 종류 열과 비트맵.
+    subtype은 대화 안에서 번호를 붙인 작은 정수 열로, subtype별/분류별/봇/수정 여부는 np.packbits 비트맵
+    (메시지 8개당 1바이트)으로 가진다. 분류 비트맵은 subtype 비트맵과 봇 비트맵의 합/교집합으로 만들고,
+    "사람만", "봇만" 같은 필터는 메시지를 보지 않고 비트맵 AND/OR와 필요한 바이트 구간만 풀어 처리한다.
+    """
+    def __init__(self, messages: Sequence['Message']):
+        self.size = len(messages)
+        subtypes = [getattr(msg, "subtype", None) or "" for msg in messages]
+        self.subtypes: List[str] = sorted(set(subtypes))  # 번호 -> subtype ("" = 일반 메시지)
+        subtype_code = {subtype: code for code, subtype in enumerate(self.subtypes)}
+        self.subtype_codes = np.array([subtype_code[subtype] for subtype in subtypes],
+                                      dtype=np.min_scalar_type(max(len(self.subtypes) - 1, 0)))
+        self.subtype_bitmaps: Dict[str, np.ndarray] = {
+            subtype: np.packbits(self.subtype_codes == code) for code, subtype in enumerate(self.subtypes)
+        }
+        self.bot_bitmap = np.packbits(np.array([bool(getattr(msg, "bot_id", None)) for msg in messages], dtype=bool))
+        self.edited_bitmap = np.packbits(np.array([msg.edited_ts is not None for msg in messages], dtype=bool))
+
+        byte_count = len(self.bot_bitmap)
+        human_subtypes = _union((bitmap for subtype, bitmap in self.subtype_bitmaps.items() if subtype in HUMAN_SUBTYPES), byte_count)
+        bot_subtypes = _union((bitmap for subtype, bitmap in self.subtype_bitmaps.items() if subtype in BOT_SUBTYPES), byte_count)
+        self.category_bitmaps: Dict[str, np.ndarray] = {
+            "human": human_subtypes & ~self.bot_bitmap,
+            "bot": bot_subtypes | (human_subtypes & self.bot_bitmap),
+            "system": ~(human_subtypes | bot_subtypes),
+        }
+        # 분류 번호 열 (MESSAGE_CATEGORIES 순서), 개수 집계용
+        self.category_codes = np.zeros(self.size, dtype=np.uint8)
+        for code, category in enumerate(MESSAGE_CATEGORIES):
+            self.category_codes[np.unpackbits(self.category_bitmaps[category], count=self.size).astype(bool)] = code
+
+    def select(self, lo=0, hi=None, categories: Optional[Sequence[str]] = None, subtypes: Optional[Sequence[str]] = None,
+               edited_only=False) -> np.ndarray:
+        """[lo, hi) 행 중 조건에 맞는 행 번호. 조건 안에서는 OR, 조건끼리는 AND (None이면 그 조건 없음)"""
+        hi = self.size if hi is None else min(hi, self.size)
+        if lo >= hi:
+            return np.array([], dtype=np.int64)
+        byte_count = len(self.bot_bitmap)
+        bitmap = None
+        if categories is not None:
+            bitmap = _union((self.category_bitmaps[category] for category in categories if category in self.category_bitmaps), byte_count)
+        if subtypes is not None:
+            subtype_bitmap = _union((self.subtype_bitmaps[subtype] for subtype in subtypes if subtype in self.subtype_bitmaps), byte_count)
+            bitmap = subtype_bitmap if bitmap is None else bitmap & subtype_bitmap
+        if edited_only:
+            bitmap = self.edited_bitmap if bitmap is None else bitmap & self.edited_bitmap
+        if bitmap is None:
+            return np.arange(lo, hi)
+        # [lo, hi)가 걸친 바이트만 풀어 행 번호로 변환
+        first_byte = lo // 8
+        bits = np.unpackbits(bitmap[first_byte:(hi + 7) // 8])
+        return np.flatnonzero(bits[lo - first_byte * 8:hi - first_byte * 8]) + lo
+
+    def category_counts(self) -> Dict[str, int]:
+        counts = np.bincount(self.category_codes, minlength=len(MESSAGE_CATEGORIES))
+        return dict(zip(MESSAGE_CATEGORIES, counts.tolist()))
+
+    def subtype_counts(self) -> Dict[str, int]:
+        counts = np.bincount(self.subtype_codes.astype(np.int64), minlength=len(self.subtypes))
+        return dict(zip(self.subtypes, counts.tolist()))
+
+
+class MessageKindIndex:
+    """대화별 메인 메시지의 ConversationKinds. 로드 시 만들고 일부 대화가 바뀌면 그 대화만 다시 만든다"""
+    def __init__(self):
+        self.entries: Dict[tuple, ConversationKinds] = {}  # (source, 대화 이름) -> ConversationKinds
+
+    def build(self, channels: Dict[str, 'Conversation'], dms: Dict[str, 'Conversation']):
+        entries = {}
+        for source, conversations in (("channel", channels), ("dm", dms)):
+            for conv_name in list(conversations):
+                entries[(source, conv_name)] = ConversationKinds(conversations[conv_name].messages)
+        self.entries = entries
+        return self
+
+    def updated(self, changed: Dict[tuple, 'Conversation']) -> 'MessageKindIndex':
+        """일부 대화가 바뀐 새 인덱스를 반환 (바뀌지 않은 대화는 다시 읽지 않음)"""
+        index = MessageKindIndex()
+        index.entries = dict(self.entries)
+        for key, conv in changed.items():
+            index.entries[key] = ConversationKinds(conv.messages)
+        return index
+
+    def get(self, source, conv_name, conv: Optional['Conversation'] = None) -> Optional[ConversationKinds]:
+        """
+        대화의 ConversationKinds. conv를 주면 인덱스가 그 대화와 맞지 않을 때(반영 중인 새 대화 등)
+        그 자리에서 만들어 반환한다.
+        """
+        kinds = self.entries.get((source, conv_name))
+        if conv is not None and (kinds is None or kinds.size != len(conv.messages)):
+            return ConversationKinds(conv.messages)
+        return kinds
+
+    def category_counts(self) -> Dict[str, int]:
+        """전체 아카이브의 분류별 메인 메시지 수"""
+        totals = dict.fromkeys(MESSAGE_CATEGORIES, 0)
+        for kinds in self.entries.values():
+            for category, count in kinds.category_counts().items():
+                totals[category] += count
+        return totals
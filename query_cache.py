@@ -0,0 +1,52 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Sequence
+
+
+class QueryResultCache:
+    """
+    검색/기간 필터 결과를 담는 크기 제한 LRU 캐시.
+    메시지 복사본이 아니라 대화 내 메시지 인덱스 목록만 저장하므로 작고, 직렬화가 필요 없다.
+    키에 아카이브 버전을 넣어 사용하면 새 메시지가 반영된 뒤에는 예전 결과가 조회되지 않고 LRU로 밀려난다.
+    """
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Any, Sequence[int]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute: Callable[[], Sequence[int]]) -> Sequence[int]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return result
+            self.misses += 1
+        # 계산은 잠금 밖에서 (같은 키를 동시에 계산해도 결과는 같음)
+        result = compute()
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[key] = result
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses}
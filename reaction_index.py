@@ -0,0 +1,188 @@
+import bisect
+import heapq
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def _emoji_name(name: str) -> str:
+    # 피부색 변형(thumbsup::skin-tone-2)은 같은 이모지로 집계
+    return name.split("::", 1)[0]
+
+
+class ReactionIndex:
+    """
+    로드 시 만든 리액션 인덱스. 리액션이 하나 이상 달린 메시지(스레드 답글 포함)를 ts 순 행으로 두고
+    행별 열(posting, ts, 대화 번호, 전체 리액션 수)과 (메시지, 이모지) 쌍 열, (메시지, 이모지, 사용자) 열을 numpy 배열로 가진다.
+    이모지별 posting list는 쌍 열을 이모지 순으로 정렬한 구간이다.
+    "가장 반응이 많은 메시지"는 기간을 이진 탐색으로 자른 뒤 리액션 수 열에서 heap으로 top-k만 고른다.
+    """
+    def __init__(self):
+        # (source, 대화 이름) -> [(posting, {이모지: (횟수, 사용자 목록)})]. 일부 대화만 바뀌면 이 항목만 교체해 다시 만든다
+        self.entries: Dict[tuple, List[tuple]] = {}
+        self.conversations: List[Tuple[str, str]] = []
+        self.emojis: List[str] = []
+        self.emoji_code: Dict[str, int] = {}
+        self.users: List[str] = []
+        self.user_code: Dict[str, int] = {}
+        self.postings: List[tuple] = []  # 행 -> posting (ts, source, 대화 이름, 메시지 인덱스, 답글 인덱스)
+        self.row_reactions: List[dict] = []  # 행 -> {이모지: (횟수, 사용자 목록)}
+        self.row_ts = np.array([], dtype=np.float64)
+        self.row_conversation = np.array([], dtype=np.int32)
+        self.row_total = np.array([], dtype=np.int32)  # 메시지별 전체 리액션 수
+        self.pair_row = np.array([], dtype=np.int32)  # (메시지, 이모지) 쌍, 이모지 순 -> 행 순으로 정렬
+        self.pair_emoji = np.array([], dtype=np.int32)
+        self.pair_count = np.array([], dtype=np.int32)
+        self.emoji_offsets = np.zeros(1, dtype=np.int64)  # 이모지 번호 -> 쌍 열에서의 시작 위치
+        self.event_row = np.array([], dtype=np.int32)  # (메시지, 이모지, 리액션한 사용자)
+        self.event_emoji = np.array([], dtype=np.int32)
+        self.event_user = np.array([], dtype=np.int32)
+
+    @staticmethod
+    def _conversation_entries(source, conv_name, conv):
+        entries = []
+        for msg_index, msg in enumerate(conv.messages):
+            items = [((msg.ts, source, conv_name, msg_index, -1), msg)]
+            items.extend(((reply.ts, source, conv_name, msg_index, reply_index), reply) for reply_index, reply in enumerate(msg.replies))
+            for posting, item in items:
+                reactions = {}
+                for reaction in item.reactions or []:
+                    if not isinstance(reaction, dict) or not reaction.get("name"):
+                        continue
+                    users = [user for user in reaction.get("users") or [] if isinstance(user, str)]
+                    count, previous_users = reactions.get(_emoji_name(reaction["name"]), (0, []))
+                    # users는 일부만 내보내질 수 있으므로 횟수는 count를 우선 사용
+                    reactions[_emoji_name(reaction["name"])] = (count + int(reaction.get("count") or len(users)), previous_users + users)
+                if reactions:
+                    entries.append((posting, reactions))
+        return entries
+
+    def _set_entries(self, entries):
+        self.entries = entries
+        self.conversations = sorted(conv for conv, conv_entries in entries.items() if conv_entries)
+        conversation_code = {conv: code for code, conv in enumerate(self.conversations)}
+        rows = sorted(entry for conv_entries in entries.values() for entry in conv_entries)
+        self.postings = [posting for posting, _ in rows]
+        self.row_reactions = [reactions for _, reactions in rows]
+        self.emojis = sorted({emoji for _, reactions in rows for emoji in reactions})
+        self.emoji_code = emoji_code = {emoji: code for code, emoji in enumerate(self.emojis)}
+        self.users = sorted({user for _, reactions in rows for _, users in reactions.values() for user in users})
+        self.user_code = user_code = {user: code for code, user in enumerate(self.users)}
+
+        self.row_ts = np.array([posting[0] for posting in self.postings], dtype=np.float64)
+        self.row_conversation = np.array([conversation_code[(posting[1], posting[2])] for posting in self.postings], dtype=np.int32)
+        self.row_total = np.array([sum(count for count, _ in reactions.values()) for _, reactions in rows], dtype=np.int32)
+        pairs, events = [], []
+        for row, (_, reactions) in enumerate(rows):
+            for emoji, (count, users) in reactions.items():
+                pairs.append((emoji_code[emoji], row, count))
+                events.extend((row, emoji_code[emoji], user_code[user]) for user in users)
+        pairs.sort()
+        pair_columns = np.array(pairs, dtype=np.int64).reshape(-1, 3)
+        self.pair_emoji = pair_columns[:, 0].astype(np.int32)
+        self.pair_row = pair_columns[:, 1].astype(np.int32)
+        self.pair_count = pair_columns[:, 2].astype(np.int32)
+        self.emoji_offsets = np.searchsorted(self.pair_emoji, np.arange(len(self.emojis) + 1)).astype(np.int64)
+        event_columns = np.array(events, dtype=np.int64).reshape(-1, 3)
+        self.event_row = event_columns[:, 0].astype(np.int32)
+        self.event_emoji = event_columns[:, 1].astype(np.int32)
+        self.event_user = event_columns[:, 2].astype(np.int32)
+        return self
+
+    def build(self, channels: Dict[str, 'Conversation'], dms: Dict[str, 'Conversation']):
+        entries = {}
+        for source, conversations in (("channel", channels), ("dm", dms)):
+            for conv_name in list(conversations):
+                entries[(source, conv_name)] = self._conversation_entries(source, conv_name, conversations[conv_name])
+        return self._set_entries(entries)
+
+    def updated(self, changed: Dict[tuple, 'Conversation']) -> 'ReactionIndex':
+        """일부 대화가 바뀐 새 인덱스를 반환 (바뀌지 않은 대화는 다시 읽지 않음)"""
+        entries = dict(self.entries)
+        for (source, conv_name), conv in changed.items():
+            entries[(source, conv_name)] = self._conversation_entries(source, conv_name, conv)
+        return ReactionIndex()._set_entries(entries)
+
+    def _conversation_codes(self, conversations: Sequence[Tuple[str, str]]) -> List[int]:
+        selected = set(conversations)
+        return [code for code, conv in enumerate(self.conversations) if conv in selected]
+
+    def _row_mask(self, conversations: Optional[Sequence[Tuple[str, str]]], start_ts=None, end_ts=None):
+        """[start_ts, end_ts) 행 구간 (lo, hi)와 대화 조건 mask (조건이 없으면 None)"""
+        lo = 0 if start_ts is None else int(np.searchsorted(self.row_ts, start_ts, side="left"))
+        hi = len(self.row_ts) if end_ts is None else int(np.searchsorted(self.row_ts, end_ts, side="left"))
+        hi = max(lo, hi)
+        if conversations is None:
+            return lo, hi, None
+        return lo, hi, np.isin(self.row_conversation[lo:hi], self._conversation_codes(conversations))
+
+    def _rows_in(self, rows: np.ndarray, conversations, start_ts=None, end_ts=None) -> np.ndarray:
+        """행 번호 배열 중 기간/대화 조건에 맞는 것만"""
+        keep = np.ones(len(rows), dtype=bool)
+        if start_ts is not None:
+            keep &= self.row_ts[rows] >= start_ts
+        if end_ts is not None:
+            keep &= self.row_ts[rows] < end_ts
+        if conversations is not None:
+            keep &= np.isin(self.row_conversation[rows], self._conversation_codes(conversations))
+        return keep
+
+    def emoji_postings(self, emoji) -> Tuple[List[tuple], np.ndarray]:
+        """이모지의 posting list (ts 순)와 메시지별 횟수"""
+        code = self.emoji_code.get(emoji)
+        if code is None:
+            return [], np.array([], dtype=np.int32)
+        lo, hi = self.emoji_offsets[code], self.emoji_offsets[code + 1]
+        return [self.postings[row] for row in self.pair_row[lo:hi]], self.pair_count[lo:hi]
+
+    def top_messages(self, top_k=20, conversations=None, start_ts=None, end_ts=None, emoji=None) -> List[Tuple[tuple, int]]:
+        """
+        기간/대화 안에서 리액션이 가장 많은 메시지 top_k개 (posting, 리액션 수).
+        emoji를 주면 그 이모지의 횟수로 고른다. 전체를 정렬하지 않고 heap으로 k개만 유지한다.
+        """
+        if emoji is not None:
+            code = self.emoji_code.get(emoji)
+            if code is None:
+                return []
+            lo, hi = self.emoji_offsets[code], self.emoji_offsets[code + 1]
+            rows, counts = self.pair_row[lo:hi], self.pair_count[lo:hi]
+            keep = self._rows_in(rows, conversations, start_ts, end_ts)
+            candidates = zip(counts[keep].tolist(), rows[keep].tolist())
+        else:
+            lo, hi, mask = self._row_mask(conversations, start_ts, end_ts)
+            rows = np.arange(lo, hi) if mask is None else lo + np.flatnonzero(mask)
+            candidates = zip(self.row_total[rows].tolist(), rows.tolist())
+        # 같은 횟수면 최근 메시지를 앞에
+        return [(self.postings[row], count) for count, row in heapq.nlargest(top_k, candidates)]
+
+    def emoji_totals(self, conversations=None, start_ts=None, end_ts=None, top_k=None) -> List[Tuple[str, int]]:
+        """기간/대화 안에서 이모지별 리액션 수 (많은 순)"""
+        keep = self._rows_in(self.pair_row, conversations, start_ts, end_ts)
+        totals = np.bincount(self.pair_emoji[keep], weights=self.pair_count[keep], minlength=len(self.emojis))
+        candidates = ((int(total), code) for code, total in enumerate(totals.tolist()) if total)
+        top = heapq.nlargest(top_k, candidates) if top_k else sorted(candidates, reverse=True)
+        return [(self.emojis[code], total) for total, code in top]
+
+    def reactor_emoji_counts(self, conversations=None, start_ts=None, end_ts=None, user_id=None, emoji=None,
+                             top_k=20) -> List[Tuple[str, str, int]]:
+        """
+        누가 어떤 이모지로 반응했는지: 기간/대화 안에서 (사용자, 이모지, 횟수) top_k개.
+        user_id나 emoji를 주면 그 사용자/이모지로 좁힌다. 내보내기에 사용자 목록이 있는 리액션만 집계된다.
+        """
+        keep = self._rows_in(self.event_row, conversations, start_ts, end_ts)
+        if user_id is not None:
+            keep &= self.event_user == self.user_code.get(user_id, -1)
+        if emoji is not None:
+            keep &= self.event_emoji == self.emoji_code.get(emoji, -1)
+        # (사용자, 이모지)를 정수 하나로 묶어 횟수를 센 뒤 heap으로 top-k
+        emoji_count = max(len(self.emojis), 1)
+        codes, counts = np.unique(self.event_user[keep].astype(np.int64) * emoji_count + self.event_emoji[keep], return_counts=True)
+        top = heapq.nlargest(top_k, zip(counts.tolist(), codes.tolist()))
+        return [(self.users[code // emoji_count], self.emojis[code % emoji_count], count) for count, code in top]
+
+    def get_reactions(self, posting) -> Dict[str, int]:
+        """메시지 하나의 이모지별 횟수 (리액션이 없으면 빈 dict)"""
+        row = bisect.bisect_left(self.postings, posting)
+        if row < len(self.postings) and self.postings[row] == posting:
+            return {emoji: count for emoji, (count, _) in self.row_reactions[row].items()}
+        return {}
@@ -0,0 +1,42 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+
+def _timed_read(read: Callable[[Any], bytes], item) -> Tuple[Optional[bytes], Optional[Exception], float]:
+    started = time.perf_counter()
+    try:
+        return read(item), None, time.perf_counter() - started
+    except Exception as e:
+        return None, e, time.perf_counter() - started
+
+
+def read_ahead(read: Callable[[Any], bytes], items: Iterable[Any], readers=16,
+               max_in_flight=64) -> Iterator[Tuple[Any, Optional[bytes], Optional[Exception], float]]:
+    """
+    items를 readers개 스레드로 미리 읽어 끝난 순서대로 (item, 원본 바이트, 읽기 오류, 읽기 초)를 생성.
+    읽는 중이거나 읽었지만 아직 소비되지 않은 item은 max_in_flight개를 넘지 않으므로 메모리에 올라가는 원본 크기가 제한되고,
+    NFS처럼 파일당 지연이 큰 저장소에서도 호출자가 파싱하는 동안 다음 파일들을 계속 읽는다 (읽기는 GIL을 놓으므로 겹쳐 진행됨).
+    """
+    readers = max(1, readers or 1)
+    max_in_flight = max(readers, max_in_flight or readers)
+    items = iter(items)
+    executor = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="read_ahead")
+    running = {}  # future -> item
+    try:
+        while True:
+            for item in items:
+                running[executor.submit(_timed_read, read, item)] = item
+                if len(running) >= max_in_flight:
+                    break
+            if not running:
+                return
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                data, error, seconds = future.result()
+                yield running.pop(future), data, error, seconds
+    finally:
+        # 소비자가 중간에 멈추면 아직 시작하지 않은 읽기는 취소 (shutdown의 cancel_futures는 Python 3.9부터라 직접 취소)
+        for future in running:
+            future.cancel()
+        executor.shutdown(wait=True)
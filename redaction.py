@@ -0,0 +1,312 @@
+"""
+외부 공유(감사 등)를 위한 익명화.
+
+    python redaction.py                                                # 모든 대화를 익명화한 TXT로 redaction.output_dir에 저장
+    python redaction.py redaction.terms_file=./data/sensitive_terms.txt redaction.max_workers=8   # Hydra override
+
+본문의 사용자 멘션과 매핑된 사용자 이름은 가명으로, 이메일/전화번호와 민감 단어 목록은 대체 문자열로 바꾼다.
+수천 개의 민감 단어와 사용자 이름은 Aho-Corasick 자동자(TermMatcher) 하나로 미리 컴파일해 단어 수와 무관하게
+본문을 한 번만 훑고, 멘션/이메일/전화번호 정규식은 하나로 합쳐 미리 컴파일한다. 두 결과를 합쳐 본문을 한 번에 다시 만든다.
+가명은 UserMapping 형식 파일(redaction.pseudonym_file)에 저장해 실행이 달라도 같은 사용자는 같은 가명을 쓴다.
+전체 아카이브는 대화 단위로 여러 프로세스에 나눠 익명화한다.
+"""
+import hashlib
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from data_models import UserMapping
+
+MENTION_PATTERN = r"<@[UW][A-Z0-9]+(?:\|[^>]*)?>"
+MAILTO_PATTERN = r"<mailto:[^>|]+(?:\|[^>]*)?>"
+EMAIL_PATTERN = r"[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}"
+# 010-1234-5678, 02-123-4567, 01012345678, +82 10-1234-5678, +1 415 555 0100
+PHONE_PATTERN = r"(?<!\d)(?:(?:\+82[-.\s]?|0)\d{1,2}[-.\s]?\d{3,4}[-.\s]?\d{4}|\+\d{1,3}[-.\s]\d{1,4}[-.\s]\d{3,4}[-.\s]\d{4})(?!\d)"
+EMAIL_REPLACEMENT = "[이메일]"
+PHONE_REPLACEMENT = "[전화번호]"
+UNKNOWN_USER = "UNKNOWN"
+
+
+def load_terms(path) -> List[str]:
+    """민감 단어 파일 (한 줄에 하나, 빈 줄과 #으로 시작하는 줄은 무시)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def _is_ascii_alnum(char) -> bool:
+    return char.isascii() and char.isalnum()
+
+
+class TermMatcher:
+    """
+    Aho-Corasick 자동자. 단어 목록(수천 개)을 한 번 컴파일해 두고, 본문을 글자마다 한 번만 따라가며
+    모든 단어의 등장 위치를 찾는다 (단어 수와 무관하게 본문 길이에 비례). 대소문자는 구분하지 않는다.
+    """
+    def __init__(self, words: Iterable[str]):
+        self.goto: List[Dict[str, int]] = [{}]  # 상태 -> {글자: 다음 상태}
+        self.fail = [0]  # 실패 링크 (현재 상태 문자열의 가장 긴 접미사 상태)
+        self.length = [0]  # 상태에서 끝나는 단어 길이 (단어 끝이 아니면 0)
+        self.output_link = [0]  # 실패 링크를 따라 만나는 가장 가까운 단어 끝 상태 (없으면 0)
+        for word in words:
+            state = 0
+            for char in word.lower():
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.length.append(0)
+                    self.output_link.append(0)
+                    self.goto[state][char] = next_state
+                state = next_state
+            if state:
+                self.length[state] = len(word)
+        # 너비 우선으로 실패 링크와 출력 링크 계산
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                link = self.fail[next_state]
+                self.output_link[next_state] = link if self.length[link] else self.output_link[link]
+
+    def find_all(self, text) -> List[Tuple[int, int]]:
+        """겹치는 것을 포함한 모든 등장 위치 [(시작, 끝)]"""
+        lowered = text.lower()
+        if len(lowered) != len(text):  # 소문자로 바꾸면 길이가 달라지는 글자(İ 등)가 있으면 위치가 어긋나므로 글자별로 변환
+            lowered = "".join(char.lower() if len(char.lower()) == 1 else char for char in text)
+        goto, fail, length, output_link = self.goto, self.fail, self.length, self.output_link
+        matches = []
+        state = 0
+        for end, char in enumerate(lowered, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            output = state if length[state] else output_link[state]
+            while output:
+                matches.append((end - length[output], end))
+                output = output_link[output]
+        return matches
+
+
+class PseudonymMapping(UserMapping):  # UserMapping을 상속받아 파일 로드/저장 기능 재활용
+    """user ID -> 가명 (예: 사용자-0001). 한 번 정한 가명은 파일에 남아 다음 실행에서도 그대로 쓴다"""
+    def __init__(self, mapping_file, prefix="사용자"):
+        super().__init__(mapping_file)
+        self.prefix = prefix
+
+    def assign(self, user_ids: Iterable[str]) -> int:
+        """가명이 없는 사용자에게 다음 번호를 붙이고 한 번만 저장. 반환: 새로 붙인 수"""
+        new_ids = sorted({user_id for user_id in user_ids if user_id and user_id != UNKNOWN_USER and user_id not in self.mapping})
+        used = set(self.mapping.values())
+        assigned, number = {}, len(self.mapping)
+        for user_id in new_ids:
+            number += 1
+            while f"{self.prefix}-{number:04d}" in used:
+                number += 1
+            assigned[user_id] = f"{self.prefix}-{number:04d}"
+        return self.update_mappings(assigned)
+
+
+class Redactor:
+    """
+    본문 익명화. 멘션/이메일/전화번호/추가 정규식은 미리 합쳐 컴파일한 정규식 하나로, 민감 단어와 사용자 이름은
+    TermMatcher(Aho-Corasick) 하나로 찾은 뒤 두 결과의 구간을 합쳐 본문을 한 번에 다시 만든다.
+    pseudonyms: user ID -> 가명, names: 본문에 나올 수 있는 사용자 이름 -> 가명, terms: 민감 단어 목록.
+    프로세스 풀로 넘길 수 있도록 상태는 dict/list와 컴파일된 정규식(pickle 시 패턴 문자열로 저장)뿐이다.
+    """
+    def __init__(self, pseudonyms: Dict[str, str], names: Optional[Dict[str, str]] = None, terms: Sequence[str] = (),
+                 replacement="[삭제]", extra_patterns: Sequence[str] = (), prefix="사용자"):
+        self.pseudonyms = dict(pseudonyms)
+        self.prefix = prefix
+        self.replacement = replacement
+        # 단어는 대소문자 구분 없이 비교. 민감 단어가 같은 이름을 덮어씀
+        self.term_replacements = {name.lower(): pseudonym for name, pseudonym in (names or {}).items()}
+        self.term_replacements.update({term.lower(): replacement for term in terms})
+        self.term_replacements.pop("", None)
+        self.terms = TermMatcher(self.term_replacements) if self.term_replacements else None
+        groups = [
+            ("mention", MENTION_PATTERN),
+            ("mailto", MAILTO_PATTERN),
+            ("email", EMAIL_PATTERN),
+            ("phone", PHONE_PATTERN),
+        ]
+        groups.extend((f"extra{i}", pattern) for i, pattern in enumerate(extra_patterns))
+        self.pattern = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in groups))
+
+    def pseudonym(self, user_id) -> str:
+        """user ID의 가명 (가명 파일에 없는 ID는 ID 해시로 만든 고정 가명)"""
+        if user_id == UNKNOWN_USER:
+            return user_id
+        pseudonym = self.pseudonyms.get(user_id)
+        if pseudonym is None:
+            pseudonym = f"{self.prefix}-{hashlib.sha1(user_id.encode('utf-8')).hexdigest()[:6]}"
+        return pseudonym
+
+    def file_stem(self, source, conv_name) -> str:
+        """
+        익명화한 대화의 파일 이름 (확장자 제외). DM 키(alice_D1, mpdm-alice--bob-1)에는 사용자 이름이 들어 있으므로
+        키의 해시만 쓰고, 채널 이름은 본문과 같이 이름/민감 단어를 바꾼다.
+        """
+        if source == "dm":
+            return f"dm-{hashlib.sha1(conv_name.encode('utf-8')).hexdigest()[:12]}"
+        return self.redact_text(conv_name).replace(os.sep, "_")
+
+    def _replace(self, match) -> str:
+        kind = match.lastgroup
+        if kind == "mention":
+            return "@" + self.pseudonym(match.group()[2:-1].split("|", 1)[0])
+        if kind in ("mailto", "email"):
+            return EMAIL_REPLACEMENT
+        if kind == "phone":
+            return PHONE_REPLACEMENT
+        return self.replacement
+
+    def _term_spans(self, text) -> List[Tuple[int, int, str]]:
+        """민감 단어/이름 구간 [(시작, 끝, 대체 문자열)]"""
+        spans = []
+        for start, end in self.terms.find_all(text):
+            # 영문/숫자로 시작하거나 끝나는 단어는 다른 단어의 일부와 맞지 않도록 경계를 확인 (한글은 조사가 붙으므로 확인하지 않음)
+            if start and _is_ascii_alnum(text[start]) and _is_ascii_alnum(text[start - 1]):
+                continue
+            if end < len(text) and _is_ascii_alnum(text[end - 1]) and _is_ascii_alnum(text[end]):
+                continue
+            spans.append((start, end, self.term_replacements.get(text[start:end].lower(), self.replacement)))
+        return spans
+
+    def redact_text(self, text) -> str:
+        if not text:
+            return text
+        # (시작, 우선순위, -길이) 순으로 훑어 겹치지 않는 구간만 고른다: 가장 왼쪽, 같은 위치면 정규식, 그다음 가장 긴 단어
+        spans = [(match.start(), 0, match.start() - match.end(), self._replace(match)) for match in self.pattern.finditer(text)]
+        if self.terms is not None:
+            spans.extend((start, 1, start - end, replacement) for start, end, replacement in self._term_spans(text))
+        if not spans:
+            return text
+        spans.sort()
+        parts, position = [], 0
+        for start, _, negative_length, replacement in spans:
+            if start < position:
+                continue
+            parts.append(text[position:start])
+            parts.append(replacement)
+            position = start - negative_length
+        parts.append(text[position:])
+        return "".join(parts)
+
+    def redact_rows(self, rows: List[tuple]) -> List[tuple]:
+        """conversation_rows()의 결과에서 user ID는 가명으로, 본문은 익명화"""
+        return [
+            (time_str, self.pseudonym(user_id), self.redact_text(text),
+             [(r_time, self.pseudonym(r_user), self.redact_text(r_text)) for r_time, r_user, r_text in replies])
+            for time_str, user_id, text, replies in rows
+        ]
+
+
+def build_redactor(options: Dict[str, Any], user_mapping: UserMapping, user_ids: Iterable[str]) -> Redactor:
+    """설정(redaction 항목)으로 Redactor 생성. user_ids에 가명을 붙여 가명 파일에 저장한다"""
+    prefix = options.get("pseudonym_prefix", "사용자")
+    pseudonyms = PseudonymMapping(options.get("pseudonym_file", "./data/pseudonyms.json"), prefix=prefix)
+    pseudonyms.assign(list(user_ids) + list(user_mapping.mapping))
+    names = {}
+    if options.get("redact_names", True):
+        # 매핑된 이름이 본문에 그대로 나오는 경우 (ID와 같거나 한 글자인 이름은 제외)
+        names = {name: pseudonyms.get_name(user_id) for user_id, name in user_mapping.mapping.items()
+                 if name and name != user_id and len(name) > 1 and user_id in pseudonyms.mapping}
+    terms_file = options.get("terms_file")
+    terms = load_terms(terms_file) if terms_file else []
+    return Redactor(pseudonyms.mapping, names, terms, replacement=options.get("replacement", "[삭제]"),
+                    extra_patterns=options.get("extra_patterns") or [], prefix=prefix)
+
+
+def conversation_rows(messages, display_names=False) -> List[tuple]:
+    """
+    메인 메시지 목록 -> [(표시 시각, user ID, 텍스트, [(표시 시각, user ID, 텍스트) 스레드 답글...])]
+    display_names=True면 user ID 대신 로드 시 계산해 둔 표시 이름(display_name)을 넣는다 (화면과 같은 이름).
+    """
+    user_of = (lambda msg: msg.display_name) if display_names else (lambda msg: msg.user_id)
+    return [
+        (msg.display_time, user_of(msg), msg.text,
+         [(reply.display_time, user_of(reply), reply.text) for reply in sorted(msg.replies, key=lambda x: x.ts)])
+        for msg in messages
+    ]
+
+
+def format_conversation_txt(rows: List[tuple], name_of: Callable[[str], str]) -> str:
+    """대화 TXT 형식 (앱의 대화 내보내기와 같음). name_of: user ID -> 표시 이름"""
+    output = []
+    for time_str, user_id, text, replies in rows:
+        output.append(f"[{time_str}] {name_of(user_id)}: {text}")
+        if replies:
+            output.append("┌── 스레드 ──")
+            for r_time, r_user, r_text in replies:
+                output.append(f"│ [{r_time}] {name_of(r_user)}: {r_text}")
+            output.append("└──────────")
+        output.append("")  # 빈 줄 추가
+    return "\n".join(output)
+
+
+# 작업 프로세스마다 한 번 받아 두는 Redactor (대화마다 패턴을 다시 보내거나 컴파일하지 않음)
+_worker_redactor: Optional[Redactor] = None
+
+
+def _init_worker(redactor: Redactor):
+    global _worker_redactor
+    _worker_redactor = redactor
+
+
+def _redact_conversation(path, rows) -> int:
+    """작업 프로세스에서 대화 하나를 익명화해 TXT로 저장. 반환: 메시지 수"""
+    redacted = _worker_redactor.redact_rows(rows)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(format_conversation_txt(redacted, lambda name: name))
+    return len(rows)
+
+
+def run_redaction(config: Dict[str, Any], progress: Callable[[str], None] = print) -> Dict[str, int]:
+    """설정(dict)의 모든 워크스페이스 대화를 익명화해 output_dir/워크스페이스/source/대화.txt로 저장 (파일 이름은 Redactor.file_stem). 반환: 워크스페이스 -> 대화 수"""
+    from workspaces import load_workspace_manager, workspace_specs_from_config
+
+    options = config.get("redaction") or {}
+    output_root = options.get("output_dir", "./exports/redacted")
+    max_workers = options.get("max_workers") or os.cpu_count() or 1
+    written = {}
+    for spec in workspace_specs_from_config(config):
+        started = time.perf_counter()
+        manager = load_workspace_manager(spec)
+        redactor = build_redactor(options, manager.user_mapping, manager.user_postings.get_user_ids())
+        progress(f"{spec['name']}: 로드 {time.perf_counter() - started:.1f}초, 가명 {len(redactor.pseudonyms)}명")
+
+        started = time.perf_counter()
+        count = messages = 0
+        # 대화 내용을 한꺼번에 큐에 올리지 않도록 진행 중인 작업 수를 작업 프로세스 수의 몇 배로 제한
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(redactor,)) as executor:
+            running = set()
+            for source, conversations in (("channel", manager.channels), ("dm", manager.dms)):
+                os.makedirs(os.path.join(output_root, spec["name"], source), exist_ok=True)
+                for conv_name in list(conversations):
+                    if len(running) >= max_workers * 4:
+                        done, running = wait(running, return_when=FIRST_COMPLETED)
+                        messages += sum(future.result() for future in done)
+                    path = os.path.join(output_root, spec["name"], source, f"{redactor.file_stem(source, conv_name)}.txt")
+                    running.add(executor.submit(_redact_conversation, path, conversation_rows(conversations[conv_name].messages)))
+                    count += 1
+            messages += sum(future.result() for future in wait(running).done)
+        written[spec["name"]] = count
+        progress(f"{spec['name']}: 대화 {count}개, 메시지 {messages}개 익명화 ({time.perf_counter() - started:.1f}초) -> {os.path.join(output_root, spec['name'])}")
+    return written
+
+
+if __name__ == "__main__":
+    from warmup import load_config_dict
+
+    run_redaction(load_config_dict(sys.argv[1:]))
@@ -0,0 +1,133 @@
+import html
+import re
+import weakref
+from typing import List, Dict, Any
+
+from data_models import Message, UserMapping
+
+# <@U123>, <@U123|name>, <#C123|general>, <!here>, <!subteam^S1|@team>, <https://...|label>
+_SLACK_MARKUP_PATTERN = re.compile(r"<([@#!]?)([^<>|]+)(?:\|([^<>]*))?>")
+_EMOJI_PATTERN = re.compile(r":([a-z0-9_+\-']+):")
+
+# 자주 쓰는 이모지 코드만 변환하고, 모르는 코드는 그대로 둔다 (오프라인 동작)
+EMOJI_MAP = {
+    "+1": "👍", "thumbsup": "👍", "-1": "👎", "thumbsdown": "👎", "smile": "😄", "smiley": "😃",
+    "grinning": "😀", "laughing": "😆", "joy": "😂", "sweat_smile": "😅", "wink": "😉", "blush": "😊",
+    "slightly_smiling_face": "🙂", "thinking_face": "🤔", "cry": "😢", "sob": "😭", "scream": "😱",
+    "pray": "🙏", "clap": "👏", "raised_hands": "🙌", "muscle": "💪", "wave": "👋", "ok_hand": "👌",
+    "eyes": "👀", "heart": "❤️", "fire": "🔥", "tada": "🎉", "rocket": "🚀", "star": "⭐",
+    "white_check_mark": "✅", "heavy_check_mark": "✔️", "x": "❌", "warning": "⚠️", "bulb": "💡",
+    "memo": "📝", "pushpin": "📌", "calendar": "📆", "coffee": "☕", "bow": "🙇", "100": "💯",
+}
+
+_SPECIAL_MENTIONS = {"here": "@here", "channel": "@channel", "everyone": "@everyone"}
+
+
+def _replace_emoji(text: str) -> str:
+    return _EMOJI_PATTERN.sub(lambda m: EMOJI_MAP.get(m.group(1), m.group(0)), text)
+
+
+def _style_text(text: str, style: Dict[str, Any]) -> str:
+    core = text.strip()
+    if not style or not core:
+        return text
+    # 마크다운 강조 기호 안쪽에 공백이 있으면 적용되지 않으므로 공백은 바깥에 둔다
+    leading, trailing = text[:len(text) - len(text.lstrip())], text[len(text.rstrip()):]
+    if style.get("code"):
+        core = f"`{core}`"
+    else:
+        if style.get("bold"):
+            core = f"**{core}**"
+        if style.get("italic"):
+            core = f"*{core}*"
+        if style.get("strike"):
+            core = f"~~{core}~~"
+    return leading + core + trailing
+
+
+def _flatten_elements(elements: List[Dict[str, Any]], user_mapping: UserMapping) -> str:
+    parts = []
+    for element in elements or []:
+        element_type = element.get("type")
+        if element_type == "text":
+            parts.append(_style_text(element.get("text", ""), element.get("style")))
+        elif element_type == "link":
+            url = element.get("url", "")
+            parts.append(f"[{element['text']}]({url})" if element.get("text") else url)
+        elif element_type == "user":
+            parts.append("@" + user_mapping.get_name(element.get("user_id", "")))
+        elif element_type == "channel":
+            parts.append("#" + element.get("channel_id", ""))
+        elif element_type == "emoji":
+            parts.append(EMOJI_MAP.get(element.get("name", ""), f":{element.get('name', '')}:"))
+        elif element_type == "broadcast":
+            parts.append("@" + element.get("range", ""))
+        elif element_type == "rich_text_section":
+            parts.append(_flatten_elements(element.get("elements"), user_mapping))
+        elif element_type == "rich_text_list":
+            bullet = "1." if element.get("style") == "ordered" else "-"
+            items = [_flatten_elements(item.get("elements"), user_mapping) for item in element.get("elements", [])]
+            parts.append("\n" + "\n".join(f"{bullet} {item}" for item in items) + "\n")
+        elif element_type == "rich_text_quote":
+            parts.append("\n> " + _flatten_elements(element.get("elements"), user_mapping) + "\n")
+        elif element_type == "rich_text_preformatted":
+            parts.append("\n```\n" + _flatten_elements(element.get("elements"), user_mapping) + "\n```\n")
+        elif element_type in ("mrkdwn", "plain_text"):
+            parts.append(element.get("text", ""))
+    return "".join(parts)
+
+
+def flatten_blocks(blocks: List[Dict[str, Any]], user_mapping: UserMapping) -> str:
+    """Slack blocks(rich_text, section, header, context)를 마크다운 텍스트로 평탄화"""
+    lines = []
+    for block in blocks or []:
+        block_type = block.get("type")
+        if block_type == "rich_text":
+            lines.append(_flatten_elements(block.get("elements"), user_mapping).strip("\n"))
+        elif block_type in ("section", "header"):
+            text = (block.get("text") or {}).get("text", "")
+            fields = [field.get("text", "") for field in block.get("fields", [])]
+            lines.append("\n".join(part for part in [text] + fields if part))
+        elif block_type == "context":
+            lines.append(_flatten_elements(block.get("elements"), user_mapping))
+    return "\n".join(line for line in lines if line)
+
+
+class RichTextRenderer:
+    """
+    메시지 텍스트의 Slack 마크업(멘션, 채널 링크, URL 링크, :emoji:)을 마크다운으로 변환.
+    text가 비어 있으면 blocks를 평탄화하여 사용한다.
+
+    결과는 메시지별로 캐시하고, 사용자 매핑 버전이 바뀐 경우에만 다시 렌더링한다.
+    """
+    def __init__(self, user_mapping: UserMapping):
+        self.user_mapping = user_mapping
+        self._cache = weakref.WeakKeyDictionary()  # Message -> (매핑 버전, 렌더링 결과)
+
+    def _replace_markup(self, match) -> str:
+        prefix, target, label = match.groups()
+        if prefix == "@":
+            name = self.user_mapping.get_name(target)
+            return "@" + (label if name == target and label else name)
+        if prefix == "#":
+            return "#" + (label or target)
+        if prefix == "!":
+            return label or _SPECIAL_MENTIONS.get(target, "@" + target)
+        return f"[{label}]({target})" if label else target
+
+    def render_text(self, text: str) -> str:
+        if not text:
+            return ""
+        text = _SLACK_MARKUP_PATTERN.sub(self._replace_markup, text)
+        return _replace_emoji(html.unescape(text))
+
+    def render(self, msg: Message) -> str:
+        cached = self._cache.get(msg)
+        if cached is not None and cached[0] == self.user_mapping.version:
+            return cached[1]
+        if msg.text:
+            rendered = self.render_text(msg.text)
+        else:
+            rendered = _replace_emoji(flatten_blocks(msg.blocks, self.user_mapping))
+        self._cache[msg] = (self.user_mapping.version, rendered)
+        return rendered
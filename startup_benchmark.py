@@ -0,0 +1,185 @@
+"""
+앱 시작 지연(import 시간) 벤치마크와 회귀 예산 검사.
+
+    python startup_benchmark.py                                        # configs/config.yaml의 startup 설정 사용
+    python startup_benchmark.py startup.import_budget_ms=800 "startup.pages=['리액션','파일']"   # Hydra override
+
+`python -X importtime`으로 새 프로세스를 띄워 import 시간을 구간별로 나눠 잰다.
+- 프로세스 시작: 인터프리터와 streamlit import (서버가 세션을 받기 전에 치르는 비용)
+- 첫 화면: AppTest로 main.py를 처음 실행해 기본 페이지(DM 보기)를 그리는 동안 새로 일어난 import
+- 페이지별: 첫 화면 뒤 startup.pages의 메뉴를 차례로 열 때 새로 일어난 import
+repeat번 반복해 중앙값을 쓰고, 첫 화면 import 시간이 예산을 넘거나 첫 화면에서 지연 로드 대상
+모듈(deferred_modules)이 import되면 종료 코드 1로 끝난다. 아카이브 로드가 포함되는 첫 화면 실행 시간은
+데이터 크기에 따라 다르므로 first_paint_budget_ms를 지정했을 때만 검사한다.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+MARKER = "@@startup_benchmark"
+
+# 측정용 자식 프로세스에서 실행하는 코드. 구간이 끝날 때마다 stderr에 표시 줄(MARKER [이름, 초, 예외 수])을 남긴다 (-X importtime 출력도 stderr)
+_CHILD_CODE = """
+import json, sys, time
+started = time.perf_counter()
+from streamlit import config as streamlit_config
+from streamlit.logger import set_log_level
+from streamlit.testing.v1 import AppTest
+streamlit_config.set_option("logger.level", "error")
+set_log_level("error")
+main_script, pages, timeout = json.loads(sys.argv[1])
+def mark(name, elapsed, exceptions=0):
+    sys.stderr.write("{marker} " + json.dumps([name, elapsed, exceptions], ensure_ascii=False) + "\\n"); sys.stderr.flush()
+mark("process", time.perf_counter() - started)
+app = AppTest.from_file(main_script, default_timeout=timeout)
+started = time.perf_counter()
+app.run()
+mark("first_paint", time.perf_counter() - started, len(app.exception))
+for page in pages:
+    started = time.perf_counter()
+    app.sidebar.radio[0].set_value(page).run()
+    mark("page:" + page, time.perf_counter() - started, len(app.exception))
+""".format(marker=MARKER)
+
+
+def parse_importtime_line(line: str):
+    """'import time: self [us] | cumulative | name' 한 줄 -> (들여쓰기 단계, 누적 us, 모듈 이름). 헤더나 다른 줄이면 None"""
+    if not line.startswith("import time:"):
+        return None
+    parts = line[len("import time:"):].split("|", 2)
+    if len(parts) != 3 or not parts[1].strip().isdigit():
+        return None
+    name_field = parts[2].rstrip("\n")
+    level = (len(name_field) - len(name_field.lstrip(" ")) - 1) // 2
+    return level, int(parts[1]), name_field.strip()
+
+
+def split_sections(stderr: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    자식 프로세스 stderr를 구간별로 나눔. 구간마다 이름, 실행 시간, 예외 수와 그 구간에서 처음 import된
+    최상위 모듈 [(모듈, 누적 ms)]를 가진다. 반환: (구간 목록, import 출력이 아닌 줄)
+    """
+    sections, imports, other_lines = [], [], []
+    for line in stderr.splitlines():
+        if line.startswith(MARKER):
+            name, elapsed, exceptions = json.loads(line[len(MARKER):])
+            sections.append({
+                "name": name,
+                "elapsed_ms": elapsed * 1000,
+                "exceptions": exceptions,
+                "imports": sorted(imports, key=lambda item: item[1], reverse=True),
+            })
+            imports = []
+            continue
+        parsed = parse_importtime_line(line)
+        if parsed is None:
+            if line.strip() and not line.startswith("import time:"):
+                other_lines.append(line)
+        elif parsed[0] == 0:  # 최상위 import만 합산 (하위 import는 누적 시간에 이미 포함)
+            imports.append((parsed[2], parsed[1] / 1000))
+    return sections, other_lines
+
+
+def measure_once(pages: List[str], timeout=120) -> List[Dict[str, Any]]:
+    """새 프로세스에서 한 번 측정. 현재 작업 디렉터리에서 실행하므로 설정의 상대 경로가 streamlit run과 같게 해석된다"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD_CODE, json.dumps([MAIN_SCRIPT, pages, timeout])],
+        capture_output=True, text=True,
+    )
+    sections, other_lines = split_sections(completed.stderr)
+    if completed.returncode != 0 or not sections:
+        raise RuntimeError(f"측정 프로세스 실패 (종료 코드 {completed.returncode}): {' / '.join(other_lines[-5:])}")
+    return sections
+
+
+def _median(values: List[float]) -> float:
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+
+def summarize_runs(runs: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """반복 측정을 구간별 중앙값으로 합침 (모듈 목록은 첫 측정의 것을 사용)"""
+    summary = []
+    for index, section in enumerate(runs[0]):
+        import_totals = [sum(ms for _, ms in run[index]["imports"]) for run in runs]
+        summary.append({
+            "name": section["name"],
+            "elapsed_ms": _median([run[index]["elapsed_ms"] for run in runs]),
+            "import_ms": _median(import_totals),
+            "exceptions": max(run[index]["exceptions"] for run in runs),
+            "modules": [{"module": module, "ms": ms} for module, ms in section["imports"]],
+        })
+    return summary
+
+
+def check_budgets(summary: List[Dict[str, Any]], options: Dict[str, Any]) -> List[str]:
+    """예산 위반 목록 (비어 있으면 통과)"""
+    failures = []
+    first_paint = next(section for section in summary if section["name"] == "first_paint")
+    import_budget = options.get("import_budget_ms")
+    if import_budget is not None and first_paint["import_ms"] > import_budget:
+        failures.append(f"첫 화면 import 시간 {first_paint['import_ms']:.0f} ms > 예산 {import_budget} ms")
+    paint_budget = options.get("first_paint_budget_ms")
+    if paint_budget is not None and first_paint["elapsed_ms"] > paint_budget:
+        failures.append(f"첫 화면 실행 시간 {first_paint['elapsed_ms']:.0f} ms > 예산 {paint_budget} ms")
+    imported = {entry["module"].split(".")[0] for entry in first_paint["modules"]}
+    for module in options.get("deferred_modules") or []:
+        if module in imported:
+            failures.append(f"첫 화면에서 지연 로드 대상 모듈이 import됨: {module}")
+    for section in summary:
+        if section["exceptions"]:
+            failures.append(f"{section['name']} 실행 중 예외 {section['exceptions']}개")
+    return failures
+
+
+def format_summary(summary: List[Dict[str, Any]], top_n=8) -> str:
+    labels = {"process": "프로세스 시작", "first_paint": "첫 화면"}
+    lines = [f"{'구간':<20}{'실행(ms)':>10}{'import(ms)':>12}"]
+    for section in summary:
+        label = labels.get(section["name"], section["name"].replace("page:", "페이지 "))
+        lines.append(f"{label:<20}{section['elapsed_ms']:>10.0f}{section['import_ms']:>12.0f}")
+        heavy = ", ".join(f"{entry['module']} {entry['ms']:.0f}" for entry in section["modules"][:top_n] if entry["ms"] >= 1)
+        if heavy:
+            lines.append(f"  {heavy}")
+    return "\n".join(lines)
+
+
+def run_startup_benchmark(config: Dict[str, Any], progress: Callable[[str], None] = print) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """설정(dict)의 startup 항목대로 측정하고 예산을 검사. 반환: (구간별 결과, 예산 위반 목록)"""
+    options = config.get("startup") or {}
+    repeat = max(1, options.get("repeat", 3))
+    pages = list(options.get("pages") or [])
+    timeout = options.get("timeout_seconds", 120)
+
+    # 첫 실행은 .pyc 생성 등이 섞이므로 버리고 측정
+    measure_once([], timeout)
+    runs = []
+    for run in range(repeat):
+        started = time.perf_counter()
+        runs.append(measure_once(pages, timeout))
+        progress(f"측정 {run + 1}/{repeat}: {time.perf_counter() - started:.1f}초")
+    summary = summarize_runs(runs)
+    failures = check_budgets(summary, options)
+    progress(format_summary(summary))
+    for failure in failures:
+        progress(f"경고: {failure}")
+
+    report_file = options.get("report_file")
+    if report_file:
+        os.makedirs(os.path.dirname(os.path.abspath(report_file)), exist_ok=True)
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump({"sections": summary, "failures": failures}, f, ensure_ascii=False, indent=4)
+        progress(f"결과 저장: {report_file}")
+    return summary, failures
+
+
+if __name__ == "__main__":
+    from warmup import load_config_dict
+
+    _, failures = run_startup_benchmark(load_config_dict(sys.argv[1:]))
+    sys.exit(1 if failures else 0)
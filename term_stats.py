@@ -0,0 +1,137 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+
+from text_index import tokenize, iter_archive_messages
+
+
+def month_label(month: int) -> str:
+    """월 번호(연도*12 + 월-1) -> 'YYYY-MM'"""
+    return f"{month // 12}-{month % 12 + 1:02d}"
+
+
+class TermTrendIndex:
+    """
+    (대화, 월) x 단어 빈도 희소 행렬. 검색과 같은 한국어 토크나이저(tokenize)를 사용한다.
+    메시지별 단어 빈도 행렬을 (대화, 월) 묶음 행렬과 한 번 곱해 만들고,
+    상위 단어/단어 추이/급상승 단어 질의는 행 선택과 희소 행렬 합으로만 처리한다.
+    """
+    def __init__(self, min_df: int = 1):
+        self.min_df = min_df
+        self.archive_version = None  # 인덱스를 만든 아카이브 버전
+        self.counts = None  # (대화, 월) 묶음 x 단어, CSR
+        self.terms = np.array([], dtype=object)
+        self.term_index: Dict[str, int] = {}
+        self.conversations: List[Tuple[str, str]] = []  # (source, 대화 이름)
+        self.bucket_conversation = np.array([], dtype=np.int32)  # 묶음 -> conversations 번호
+        self.bucket_month = np.array([], dtype=np.int32)  # 묶음 -> 월 번호
+
+    def build(self, archive_manager):
+        self.archive_version = archive_manager.version
+        bucket_of = {}
+        rows, texts = [], []
+        for (_, source, conv_name, _, _), msg in iter_archive_messages(archive_manager):
+            if not msg.text:
+                continue
+            # 표시용 로컬 시각(YYYY-MM-DD ...)은 로드 시 미리 계산되어 있음
+            month = int(msg.display_time[:4]) * 12 + int(msg.display_time[5:7]) - 1
+            rows.append(bucket_of.setdefault((source, conv_name, month), len(bucket_of)))
+            texts.append(msg.text)
+        if not texts:
+            return self
+
+        vectorizer = CountVectorizer(tokenizer=tokenize, lowercase=False, token_pattern=None, min_df=self.min_df, dtype=np.int32)
+        try:
+            message_terms = vectorizer.fit_transform(texts)
+        except ValueError:  # 모든 메시지에 토큰이 없는 경우
+            return self
+        # 메시지 -> 묶음 지시 행렬과 곱해 묶음별 빈도로 합침
+        grouping = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (rows, np.arange(len(rows)))),
+            shape=(len(bucket_of), len(rows)),
+        )
+        self.counts = (grouping @ message_terms).tocsr()
+        self.terms = vectorizer.get_feature_names_out()
+        self.term_index = vectorizer.vocabulary_
+
+        self.conversations = sorted({(source, conv_name) for source, conv_name, _ in bucket_of})
+        conversation_code = {conv: code for code, conv in enumerate(self.conversations)}
+        self.bucket_conversation = np.array([conversation_code[(source, conv_name)] for source, conv_name, _ in bucket_of], dtype=np.int32)
+        self.bucket_month = np.array([month for _, _, month in bucket_of], dtype=np.int32)
+        return self
+
+    def get_months(self) -> List[int]:
+        return sorted(set(self.bucket_month.tolist()))
+
+    def _select_buckets(self, conversations: Optional[Sequence[Tuple[str, str]]] = None,
+                        start_month: Optional[int] = None, end_month: Optional[int] = None) -> np.ndarray:
+        """조건에 맞는 묶음 행 번호. conversations가 None이면 전체, 월 범위는 [start_month, end_month]"""
+        mask = np.ones(len(self.bucket_month), dtype=bool)
+        if conversations is not None:
+            selected = set(conversations)
+            codes = [i for i, conv in enumerate(self.conversations) if conv in selected]
+            mask &= np.isin(self.bucket_conversation, codes)
+        if start_month is not None:
+            mask &= self.bucket_month >= start_month
+        if end_month is not None:
+            mask &= self.bucket_month <= end_month
+        return np.flatnonzero(mask)
+
+    def _term_totals(self, buckets: np.ndarray) -> np.ndarray:
+        if self.counts is None or not len(buckets):
+            return np.zeros(len(self.terms), dtype=np.int64)
+        return np.asarray(self.counts[buckets].sum(axis=0)).ravel()
+
+    def top_terms(self, conversations=None, start_month=None, end_month=None, top_k=20) -> List[Tuple[str, int]]:
+        """기간/대화 범위에서 가장 많이 쓰인 단어 top_k개 (단어, 횟수)"""
+        totals = self._term_totals(self._select_buckets(conversations, start_month, end_month))
+        k = min(top_k, int(np.count_nonzero(totals)))
+        if k == 0:
+            return []
+        top = np.argpartition(-totals, k - 1)[:k]
+        # 같은 횟수면 긴 단어를 앞에 (한글 어절과 그 음절 bigram이 같은 횟수로 나오는 경우)
+        term_lengths = np.array([len(self.terms[i]) for i in top])
+        top = top[np.lexsort((-term_lengths, -totals[top]))]
+        return [(self.terms[i], int(totals[i])) for i in top]
+
+    def term_over_time(self, terms: Sequence[str], conversations=None, start_month=None, end_month=None) -> Tuple[List[int], Dict[str, List[int]]]:
+        """단어별 월간 사용 횟수. 반환: (연속된 월 번호 목록, 단어 -> 월별 횟수)"""
+        buckets = self._select_buckets(conversations, start_month, end_month)
+        if not len(buckets):
+            return [], {}
+        months = self.bucket_month[buckets]
+        first, last = int(months.min()), int(months.max())
+        offsets = months - first
+        series = {}
+        for term in terms:
+            column = self.term_index.get(term)
+            values = np.zeros(last - first + 1, dtype=np.int64)
+            if column is not None:
+                term_counts = self.counts[buckets, column].toarray().ravel()
+                values = np.bincount(offsets, weights=term_counts, minlength=last - first + 1).astype(np.int64)
+            series[term] = values.tolist()
+        return list(range(first, last + 1)), series
+
+    def rising_terms(self, month: int, window: int = 3, conversations=None, top_k=20, min_count=2) -> List[Tuple[str, int, float, float]]:
+        """
+        month의 사용 비율이 직전 window개월 평균 대비 가장 많이 늘어난 단어.
+        비율은 add-one 평활한 상대 빈도의 로그 비로 비교한다.
+        반환: (단어, 이번 달 횟수, 이전 월평균 횟수, 점수)
+        """
+        current = self._term_totals(self._select_buckets(conversations, month, month))
+        previous = self._term_totals(self._select_buckets(conversations, month - window, month - 1))
+        if not current.sum():
+            return []
+        vocabulary = len(self.terms)
+        current_rate = (current + 1) / (current.sum() + vocabulary)
+        previous_rate = (previous + 1) / (previous.sum() + vocabulary)
+        scores = np.log(current_rate / previous_rate)
+        scores[current < min_count] = -np.inf
+        k = min(top_k, int(np.count_nonzero(current >= min_count)))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.terms[i], int(current[i]), float(previous[i]) / window, float(scores[i])) for i in top if scores[i] > 0]
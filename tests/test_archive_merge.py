@@ -0,0 +1,82 @@
+import json
+import os
+
+from archive_merge import ArchiveMerger, _newer, merge_message_lists
+from data_models import Message, SlackArchiveManager, UserMapping
+
+
+def _message(ts, text, edited_ts=None, replies=None):
+    return Message(ts, "U1", text, replies=replies, edited_ts=edited_ts)
+
+
+def _write_day_file(root, channel, day, messages):
+    folder = os.path.join(root, "channels", channel)
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, f"{day}.json"), "w", encoding="utf-8") as f:
+        if isinstance(messages, str):
+            f.write(messages)
+        else:
+            json.dump(messages, f)
+
+
+def _raw(ts, text):
+    return {"ts": f"{ts:.6f}", "user": "U1", "text": text}
+
+
+def _manager(tmp_path):
+    return SlackArchiveManager(str(tmp_path / "channels"), str(tmp_path / "dms"), UserMapping(str(tmp_path / "user_mapping.json")))
+
+
+def test_newer_prefers_later_edit_then_later_export():
+    current, candidate = _message(1.0, "current", edited_ts=7.0), _message(1.0, "candidate", edited_ts=3.0)
+    assert _newer(current, candidate).text == "current"
+    current, candidate = _message(1.0, "current", edited_ts=3.0), _message(1.0, "candidate", edited_ts=3.0)
+    assert _newer(current, candidate).text == "candidate"
+
+
+def test_merge_message_lists_dedupes_by_ts_and_prefers_later_list():
+    older = [_message(1.0, "a-old"), _message(2.0, "b-old")]
+    newer = [_message(2.0, "b-new"), _message(3.0, "c")]
+    assert [msg.text for msg in merge_message_lists([older, newer])] == ["a-old", "b-new", "c"]
+
+
+def test_merge_message_lists_edit_time_wins_over_list_order():
+    edited = [_message(1.0, "edited", edited_ts=5.0)]
+    stale = [_message(1.0, "stale")]
+    assert [msg.text for msg in merge_message_lists([edited, stale])] == ["edited"]
+
+
+def test_merge_message_lists_unions_thread_replies():
+    older = [_message(1.0, "root", replies=[_message(1.5, "r1")])]
+    newer = [_message(1.0, "root", replies=[_message(1.5, "r1"), _message(1.7, "r2")])]
+    merged = merge_message_lists([older, newer])
+    assert [reply.text for reply in merged[0].replies] == ["r1", "r2"]
+
+
+def test_merger_reads_only_changed_files_on_rerun(tmp_path):
+    root = str(tmp_path / "a")
+    _write_day_file(root, "general", "2024-01-01", [_raw(1.0, "m0")])
+    _write_day_file(root, "general", "2024-01-02", [_raw(86401.0, "m1")])
+    state_dir = str(tmp_path / "merged")
+
+    assert ArchiveMerger(state_dir).merge(_manager(tmp_path), [root]) == {root: 2}
+    _write_day_file(root, "general", "2024-01-02", [_raw(86401.0, "m1"), _raw(86402.0, "m2")])
+    manager = _manager(tmp_path)
+    assert ArchiveMerger(state_dir).merge(manager, [root]) == {root: 1}
+    assert [msg.text for msg in manager.channels["general"].messages] == ["m0", "m1", "m2"]
+
+
+def test_retry_quarantined_does_not_duplicate_merged_messages(tmp_path):
+    messages = [_raw(1.0, "m0"), _raw(2.0, "m1"), _raw(3.0, "m2")]
+    root_a, root_b = str(tmp_path / "a"), str(tmp_path / "b")
+    _write_day_file(root_a, "general", "2024-01-01", messages)
+    _write_day_file(root_b, "general", "2024-01-01", "{broken")
+    manager = _manager(tmp_path)
+    ArchiveMerger(str(tmp_path / "merged")).merge(manager, [root_a, root_b])
+    manager.build_indexes()
+    assert len(manager.load_diagnostics.quarantine) == 1
+
+    # 손상된 사본을 고친 뒤 격리된 파일 다시 시도
+    _write_day_file(root_b, "general", "2024-01-01", messages)
+    assert manager.retry_quarantined() == 1
+    assert [msg.text for msg in manager.channels["general"].messages] == ["m0", "m1", "m2"]
@@ -0,0 +1,56 @@
+import gc
+import json
+import os
+
+from data_models import Conversation, SlackArchiveManager, UserMapping
+
+
+def _load(tmp_path, budget_bytes=0):
+    folder = tmp_path / "channels" / "dev"
+    os.makedirs(folder)
+    (folder / "2024-01-01.json").write_text(json.dumps([{"ts": "100.000000", "user": "U1", "text": "a"}, {"ts": "300.000000", "user": "U2", "text": "c"}]))
+    manager = SlackArchiveManager(str(tmp_path / "channels"), str(tmp_path / "dms"), UserMapping(str(tmp_path / "user_mapping.json")),
+                                  memory_budget_bytes=budget_bytes, spill_dir=str(tmp_path / "spill"))
+    manager.load_channels()
+    manager.build_indexes()
+    return manager
+
+
+def _publish_insert(manager):
+    # ts 200 메시지가 가운데에 끼워져 기존 메시지의 위치가 바뀜
+    old = manager.get_conversation("channel", "dev")
+    conv = Conversation(name="dev", conv_type="channel")
+    conv.messages = list(old.messages)
+    inserted = manager._parse_messages([{"ts": "200.000000", "user": "U3", "text": "b"}])[0]
+    conv.messages.insert(1, inserted)
+    manager.prepare_conversation(conv)
+    manager.publish_conversations({("channel", "dev"): conv})
+
+
+def test_reader_holding_old_snapshot_sees_matching_conversation_and_indexes(tmp_path):
+    manager = _load(tmp_path)
+    old = manager.snapshot
+    _publish_insert(manager)
+
+    # 이전 스냅샷의 posting은 이전 대화의 위치를 가리킴
+    posting = old.user_postings.postings["U2"][0]
+    assert old.resolve_posting(posting).text == "c"
+    assert [msg.text for msg in old.query_conversation("channel", "dev")] == ["a", "c"]
+    assert [old.resolve_posting(p).text for p in old.get_timeline_page(0, 10)] == ["a", "c"]
+
+    new = manager.snapshot
+    assert new.version == old.version + 1
+    assert new.resolve_posting(new.user_postings.postings["U2"][0]).text == "c"
+    assert [new.resolve_posting(p).text for p in manager.get_timeline_page(0, 10)] == ["a", "b", "c"]
+
+
+def test_superseded_conversation_is_removed_after_old_snapshot_is_released(tmp_path):
+    manager = _load(tmp_path)
+    old_key = manager.snapshot.store_keys[("channel", "dev")]
+    _publish_insert(manager)
+    assert old_key in manager.conversation_store  # 이전 스냅샷을 잡은 읽기가 있을 수 있으므로 남겨 둠
+
+    gc.collect()
+    _publish_insert(manager)  # 다음 저장 때 정리
+    assert old_key not in manager.conversation_store
+    assert manager.channels["dev"] is manager.conversation_store[manager.snapshot.store_keys[("channel", "dev")]]
@@ -0,0 +1,57 @@
+import json
+import zipfile
+
+from archive_sources import ZipArchiveSource
+from data_models import SlackArchiveManager, UserMapping
+
+
+def _write_official_zip(path):
+    """공식 Slack 내보내기 레이아웃: 최상위 폴더 아래 메타데이터와 <채널 이름>/, <DM ID>/, <mpim 이름>/ day-file"""
+    files = {
+        "users.json": [
+            {"id": "U1", "name": "alice", "profile": {"display_name": "Alice Z"}},
+            {"id": "U2", "name": "bob", "profile": {"real_name": "Bob"}},
+            {"id": "U3", "name": "gina", "profile": {"display_name": "Gina"}},
+        ],
+        "channels.json": [{"id": "C100", "name": "general"}],
+        "dms.json": [{"id": "D01", "members": ["U1", "U2"]}],
+        "mpims.json": [{"id": "G77", "name": "mpdm-alice--gina-1", "members": ["U1", "U3"]}],
+        "general/2024-01-01.json": [{"ts": "1704067200.000100", "user": "U1", "text": "안녕하세요"}],
+        "D01/2024-01-01.json": [{"ts": "1704067300.000100", "user": "U2", "text": "hi"}],
+        "mpdm-alice--gina-1/2024-01-01.json": [
+            {"ts": "1704067400.000100", "user": "U3", "text": "group"},
+            {"ts": "1704067500.000100", "user": "U1", "text": "reply"},
+        ],
+    }
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, content in files.items():
+            zf.writestr("export/" + name, json.dumps(content, ensure_ascii=False))
+
+
+def test_official_zip_conversation_files(tmp_path):
+    zip_path = tmp_path / "export.zip"
+    _write_official_zip(zip_path)
+    with ZipArchiveSource(str(zip_path)) as source:
+        keys = set(source.conversation_files())
+        assert source.dm_names(source.user_names()) == {"D01": "Alice Z, Bob", "G77": "Alice Z, Gina"}
+    assert keys == {("channel", "general", "channel"), ("dm", "D01", "dm_1to1"), ("dm", "G77", "dm_group")}
+
+
+def test_load_official_zip_dm_index(tmp_path):
+    zip_path = tmp_path / "export.zip"
+    _write_official_zip(zip_path)
+    manager = SlackArchiveManager(str(tmp_path / "channels"), str(tmp_path / "dms"), UserMapping(str(tmp_path / "user_mapping.json")))
+    manager.load_zip(str(zip_path))
+    manager.build_indexes()
+
+    assert manager.get_channel_names() == ["general"]
+    assert [len(manager.dms[dm_id].messages) for dm_id in ("D01", "G77")] == [1, 2]
+
+    # mpim(G로 시작)은 그룹 DM이고, 이름은 zip의 mpims.json/dms.json으로 만든 참여자 이름
+    group = manager.dm_index.get("G77")
+    assert group.conv_type == "dm_group"
+    assert group.display_name == "Alice Z, Gina"
+    assert [info.dm_id for info in manager.dm_index.get_group_dms()] == ["G77"]
+    assert manager.dm_index.get("D01").display_name == "Alice Z, Bob"
+    assert manager.dm_index.get_display_to_key() == {"Alice Z, Bob": "D01", "Alice Z, Gina": "G77"}
+    assert manager.dms["G77"].messages[0].display_name == "Gina"
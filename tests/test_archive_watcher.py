@@ -0,0 +1,51 @@
+import json
+import os
+
+from archive_watcher import ArchiveWatcher, WatcherRegistry
+from data_models import SlackArchiveManager, UserMapping
+
+
+def _write_day(folder, name, messages):
+    os.makedirs(folder, exist_ok=True)
+    (folder / name).write_text(json.dumps(messages))
+
+
+def _load(tmp_path):
+    manager = SlackArchiveManager(str(tmp_path / "channels"), str(tmp_path / "dms"), UserMapping(str(tmp_path / "user_mapping.json")))
+    manager.load_channels()
+    manager.build_indexes()
+    return manager
+
+
+def test_files_written_after_load_are_picked_up_by_the_watcher(tmp_path):
+    channels = tmp_path / "channels"
+    _write_day(channels / "dev", "2024-01-01.json", [{"ts": "100.000000", "user": "U1", "text": "a"}])
+    manager = _load(tmp_path)
+    # 로드가 끝난 뒤, 감시 스레드를 만들기 전에 동기화 작업이 쓴 파일
+    _write_day(channels / "dev", "2024-01-02.json", [{"ts": "200.000000", "user": "U2", "text": "b"}])
+    _write_day(channels / "ops", "2024-01-02.json", [{"ts": "300.000000", "user": "U3", "text": "c"}])
+
+    watcher = ArchiveWatcher(manager)
+
+    assert watcher.apply_changes(manager) == 2
+    assert [msg.ts for msg in manager.get_conversation("channel", "dev").messages] == [100.0, 200.0]
+    assert [msg.ts for msg in manager.get_conversation("channel", "ops").messages] == [300.0]
+    # 로드할 때 읽은 파일은 바뀌지 않았으므로 다시 읽지 않는다
+    assert watcher.apply_changes(manager) == 0
+
+
+def test_registry_stops_the_previous_watcher_when_the_archive_is_reloaded(tmp_path):
+    _write_day(tmp_path / "channels" / "dev", "2024-01-01.json", [{"ts": "100.000000", "user": "U1", "text": "a"}])
+    registry = WatcherRegistry()
+    old_manager = _load(tmp_path)
+    old_watcher = registry.ensure(old_manager, "main", poll_seconds=60)
+    try:
+        assert registry.ensure(old_manager, "main", poll_seconds=60) is old_watcher
+        # 캐시가 만료되어 다시 로드해도 이전 매니저가 살아 있으면 약한 참조만으로는 이전 스레드가 끝나지 않는다
+        new_watcher = registry.ensure(_load(tmp_path), "main", poll_seconds=60)
+        assert new_watcher is not old_watcher
+        old_watcher._thread.join(timeout=5)
+        assert not old_watcher._thread.is_alive()
+        assert new_watcher._thread.is_alive()
+    finally:
+        registry.stop_all()
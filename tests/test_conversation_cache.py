@@ -0,0 +1,64 @@
+import os
+
+from conversation_cache import ConversationStore, deep_sizeof
+
+
+def _conv(text):
+    return {"messages": [text] * 20}
+
+
+def _store(tmp_path, conversations=1, on_load=None):
+    # 대화 conversations개가 겨우 들어가는 예산
+    budget = deep_sizeof(_conv("channel-0")) * conversations
+    return ConversationStore(budget, str(tmp_path / "spill"), on_load=on_load)
+
+
+def test_least_recently_used_conversation_is_spilled_when_over_budget(tmp_path):
+    store = _store(tmp_path, conversations=2)
+    store[("channel", "a")] = _conv("channel-a")
+    store[("channel", "b")] = _conv("channel-b")
+    store[("channel", "a")]  # a를 최근에 사용
+    store[("channel", "c")] = _conv("channel-c")
+
+    assert not store.is_resident(("channel", "b"))
+    assert store.is_resident(("channel", "a")) and store.is_resident(("channel", "c"))
+    stats = store.get_stats()
+    assert stats["resident_bytes"] <= stats["budget_bytes"]
+    assert stats["evictions"] == 1
+    assert len(os.listdir(tmp_path / "spill")) == 1
+
+
+def test_spilled_conversation_reloads_transparently(tmp_path):
+    loaded = []
+    store = _store(tmp_path, on_load=loaded.append)
+    store[("channel", "a")] = _conv("channel-a")
+    store[("dm", "b")] = _conv("channel-b")
+
+    assert store[("channel", "a")] == _conv("channel-a")
+    assert loaded == [_conv("channel-a")]
+    assert not store.is_resident(("dm", "b"))
+    assert store[("dm", "b")] == _conv("channel-b")
+    stats = store.get_stats()
+    assert (stats["hits"], stats["misses"]) == (0, 2)
+    assert sorted(store) == [("channel", "a"), ("dm", "b")]
+
+
+def test_replacing_a_spilled_conversation_discards_its_stale_snapshot(tmp_path):
+    store = _store(tmp_path)
+    store[("channel", "a")] = _conv("channel-a")
+    store[("channel", "b")] = _conv("channel-b")  # a를 내보냄
+    store[("channel", "a")] = _conv("channel-A")  # b를 내보내고 a는 새 내용
+    store[("channel", "b")]  # a를 다시 내보냄 (새 내용으로 스냅샷을 다시 써야 함)
+
+    assert store[("channel", "a")] == _conv("channel-A")
+
+
+def test_deleting_a_spilled_conversation_removes_its_snapshot(tmp_path):
+    store = _store(tmp_path)
+    store[("channel", "a")] = _conv("channel-a")
+    store[("channel", "b")] = _conv("channel-b")
+    del store[("channel", "a")]
+
+    assert ("channel", "a") not in store
+    assert os.listdir(tmp_path / "spill") == []
+    assert store.get_stats()["total_conversations"] == 1
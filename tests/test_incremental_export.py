@@ -0,0 +1,98 @@
+import glob
+import json
+import os
+
+import pytest
+
+import incremental_export
+from incremental_export import IncrementalExporter
+from workspaces import workspace_specs_from_config
+
+
+def _write_day_file(root, channel, day, messages):
+    folder = os.path.join(root, "channels", channel)
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, f"{day}.json"), "w", encoding="utf-8") as f:
+        json.dump(messages, f)
+
+
+def _raw(ts, text, edited_ts=None):
+    msg = {"ts": f"{ts:.6f}", "user": "U1", "text": text}
+    if edited_ts is not None:
+        msg["edited"] = {"user": "U1", "ts": f"{edited_ts:.6f}"}
+    return msg
+
+
+def _exporter(tmp_path, batch_records=2):
+    root = str(tmp_path / "data")
+    spec = workspace_specs_from_config({"paths": {
+        "channel_root": os.path.join(root, "channels"),
+        "dm_root": os.path.join(root, "dms"),
+        "user_mapping_file": os.path.join(root, "user_mapping.json"),
+    }})[0]
+    return IncrementalExporter(spec, str(tmp_path / "out"), batch_records=batch_records)
+
+
+def _records(tmp_path):
+    records = []
+    for path in sorted(glob.glob(str(tmp_path / "out" / "batch_*.jsonl"))):
+        with open(path, encoding="utf-8") as f:
+            records.extend(json.loads(line) for line in f)
+    return records
+
+
+def _seed(tmp_path):
+    root = str(tmp_path / "data")
+    _write_day_file(root, "dev", "2024-01-01", [_raw(100.0, "a"), _raw(200.0, "b"), _raw(300.0, "c")])
+    _write_day_file(root, "general", "2024-01-01", [_raw(150.0, "x"), _raw(250.0, "y")])
+    return root
+
+
+def test_exports_back_inserted_and_edited_messages_once(tmp_path):
+    root = _seed(tmp_path)
+    assert len(_exporter(tmp_path).run(progress=lambda _: None)) == 3
+    assert _exporter(tmp_path).run(progress=lambda _: None) == []
+
+    # 이미 내보낸 파일 중간에 과거 ts 메시지가 들어오고 다른 메시지가 수정됨
+    _write_day_file(root, "dev", "2024-01-01", [_raw(100.0, "a"), _raw(150.0, "late"), _raw(200.0, "b2", edited_ts=400.0), _raw(300.0, "c")])
+    _exporter(tmp_path).run(progress=lambda _: None)
+    texts = [record["text"] for record in _records(tmp_path)]
+    assert sorted(texts) == ["a", "b", "b2", "c", "late", "x", "y"]
+    assert _exporter(tmp_path).run(progress=lambda _: None) == []
+
+
+def test_unchanged_conversation_state_is_not_rewritten(tmp_path):
+    root = _seed(tmp_path)
+    exporter = _exporter(tmp_path)
+    exporter.run(progress=lambda _: None)
+    general_shard = exporter._shard_path("channel/general")
+    before = os.stat(general_shard).st_mtime_ns
+
+    _write_day_file(root, "dev", "2024-01-02", [_raw(90000.0, "new")])
+    _exporter(tmp_path).run(progress=lambda _: None)
+    assert os.stat(general_shard).st_mtime_ns == before
+
+
+@pytest.mark.parametrize("crash_on", ["conversations", "state.json"])
+def test_rerun_after_crash_does_not_duplicate_records(tmp_path, monkeypatch, crash_on):
+    _seed(tmp_path)
+    original = incremental_export._write_atomic
+    calls = []
+
+    def crashing_write(path, text):
+        # 두 번째 대화(general)의 배치는 쓰고 그 상태 조각(또는 다음 배치 번호)을 저장하기 전에 중단
+        if crash_on in path:
+            calls.append(path)
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+        original(path, text)
+
+    monkeypatch.setattr(incremental_export, "_write_atomic", crashing_write)
+    with pytest.raises(KeyboardInterrupt):
+        _exporter(tmp_path).run(progress=lambda _: None)
+    monkeypatch.setattr(incremental_export, "_write_atomic", original)
+
+    _exporter(tmp_path).run(progress=lambda _: None)
+    ids = [record["id"] for record in _records(tmp_path)]
+    assert len(ids) == len(set(ids)) == 5
+    assert _exporter(tmp_path).run(progress=lambda _: None) == []
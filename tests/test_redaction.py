@@ -0,0 +1,34 @@
+from redaction import Redactor, TermMatcher
+
+
+def test_file_stem_hides_dm_keys_and_names():
+    redactor = Redactor({"U1": "사용자-0001"}, names={"alice": "사용자-0001"})
+    stem = redactor.file_stem("dm", "mpdm-alice--bob-1")
+    assert stem.startswith("dm-") and "alice" not in stem and "bob" not in stem
+    assert stem == redactor.file_stem("dm", "mpdm-alice--bob-1")
+    assert stem != redactor.file_stem("dm", "alice_D1")
+    assert redactor.file_stem("channel", "alice-project") == "사용자-0001-project"
+
+
+def test_term_matcher_finds_overlapping_terms_case_insensitively():
+    matcher = TermMatcher(["he", "she", "hers", "his"])
+    text = "uSHErs"
+    assert sorted(text[start:end].lower() for start, end in matcher.find_all(text)) == ["he", "hers", "she"]
+    assert TermMatcher(["프로젝트"]).find_all("비밀 프로젝트는") == [(3, 7)]
+
+
+def test_redactor_replaces_mentions_contacts_names_and_terms():
+    redactor = Redactor({"U1": "사용자-0001"}, names={"Alice": "사용자-0001"}, terms=["Project X", "토르"])
+    text = "<@U1|alice> <@U9> alice@example.com 010-1234-5678 alice가 project x를 토르에게 malice"
+    assert redactor.redact_text(text) == (
+        f"@사용자-0001 @{redactor.pseudonym('U9')} [이메일] [전화번호] 사용자-0001가 [삭제]를 [삭제]에게 malice"
+    )
+    assert redactor.pseudonym("U9").startswith("사용자-") and redactor.pseudonym("U9") == redactor.pseudonym("U9")
+
+
+def test_redact_rows_pseudonymizes_authors_and_replies():
+    redactor = Redactor({"U1": "사용자-0001", "U2": "사용자-0002"}, names={"bob": "사용자-0002"})
+    rows = [("2024-01-01 09:00:00", "U1", "hi bob", [("2024-01-01 09:01:00", "U2", "<@U1> hi")])]
+    assert redactor.redact_rows(rows) == [
+        ("2024-01-01 09:00:00", "사용자-0001", "hi 사용자-0002", [("2024-01-01 09:01:00", "사용자-0002", "@사용자-0001 hi")])
+    ]
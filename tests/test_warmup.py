@@ -0,0 +1,32 @@
+import json
+import os
+import shutil
+
+from data_models import SlackArchiveManager, UserMapping
+from warmup import _save_artifact, load_warmup_artifacts
+
+
+def test_artifact_carries_spilled_conversations_to_another_host(tmp_path):
+    for channel in ("dev", "ops", "qa"):
+        folder = tmp_path / "channels" / channel
+        os.makedirs(folder)
+        (folder / "2024-01-01.json").write_text(json.dumps([{"ts": "100.000000", "user": "U1", "text": f"{channel} " * 50}]))
+    spill_dir = tmp_path / "spill"
+    manager = SlackArchiveManager(str(tmp_path / "channels"), str(tmp_path / "dms"), UserMapping(str(tmp_path / "user_mapping.json")),
+                                  memory_budget_bytes=1, spill_dir=str(spill_dir))
+    manager.load_channels()
+    manager.build_indexes()
+    assert manager.get_cache_stats()["resident_conversations"] < 3
+    spec = {"name": "main"}
+    _save_artifact(str(tmp_path / "artifacts"), spec, manager, None, 0, None)
+
+    # 서버 호스트에는 warm-up 호스트의 spill_dir가 없다
+    shutil.rmtree(spill_dir)
+    sharded, _ = load_warmup_artifacts([spec], str(tmp_path / "artifacts"))
+    loaded = sharded.shards["main"]
+
+    for channel in ("dev", "ops", "qa"):
+        assert loaded.get_conversation("channel", channel).messages[0].text.startswith(channel)
+    # 메모리에 있던 대화도 다시 내보낼 때 이 호스트에 스냅샷을 쓴다
+    for channel in ("dev", "ops", "qa"):
+        assert loaded.get_conversation("channel", channel).messages[0].text.startswith(channel)
@@ -0,0 +1,128 @@
+import re
+from typing import List, Optional, Tuple, Iterator
+
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+from data_models import Message
+
+# Slack 마크업(<@U123>, <#C1|name>, <http://...|label>)은 토큰화 전에 제거
+_MARKUP_PATTERN = re.compile(r"<[^>]*>")
+# 한글 덩어리 또는 영문/숫자 덩어리
+_TOKEN_PATTERN = re.compile(r"[가-힣]+|[a-z0-9]+")
+_HANGUL_PATTERN = re.compile(r"[가-힣]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    한국어를 고려한 토크나이저.
+    한글 어절은 조사/어미가 붙어 있으므로 어절 자체와 음절 bigram을 함께 토큰으로 사용한다.
+    """
+    if not text:
+        return []
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(_MARKUP_PATTERN.sub(" ", text.lower())):
+        tokens.append(token)
+        if len(token) > 2 and _HANGUL_PATTERN.fullmatch(token):
+            tokens.extend(token[i:i + 2] for i in range(len(token) - 1))
+    return tokens
+
+
+def iter_archive_messages(archive_manager) -> Iterator[Tuple[tuple, Message]]:
+    """
+    아카이브의 모든 메시지(스레드 답글 포함)를 (posting, 메시지)로 순회.
+    posting은 UserPostingIndex와 같은 (ts, source, 대화 이름, 메시지 인덱스, 답글 인덱스) 형식
+    """
+    for source, conversations in (("channel", archive_manager.channels), ("dm", archive_manager.dms)):
+        for conv_name in list(conversations):
+            for msg_index, msg in enumerate(conversations[conv_name].messages):
+                yield (msg.ts, source, conv_name, msg_index, -1), msg
+                for reply_index, reply_msg in enumerate(msg.replies):
+                    yield (reply_msg.ts, source, conv_name, msg_index, reply_index), reply_msg
+
+
+class SimilarityIndex:
+    """
+    전체 메시지에 대한 TF-IDF(선택적으로 LSA 축소) 행렬.
+    외부 모델이나 서비스 없이 로컬에서만 빌드/질의한다.
+    행은 메시지 객체 대신 posting으로 기억하므로 대화가 메모리에서 내보내져도 인덱스가 붙잡지 않는다.
+    """
+    def __init__(self, n_components: int = 0, min_df: int = 1, max_features: Optional[int] = None):
+        self.n_components = n_components
+        self.min_df = min_df
+        self.max_features = max_features
+        self.archive_manager = None
+        self.archive_version = None  # 인덱스를 만든 아카이브 버전
+        self.refs: List[tuple] = []  # 행 번호 -> posting
+        self.row_of = {}  # (source, 대화 이름, ts) -> 행 번호
+        self.vectorizer = None
+        self.svd = None
+        self.matrix = None  # 행 단위로 L2 정규화된 문서 벡터
+
+    def build(self, archive_manager):
+        self.archive_manager = archive_manager
+        self.archive_version = archive_manager.version
+        self.refs, texts = [], []
+        for posting, msg in iter_archive_messages(archive_manager):
+            if msg.text:
+                self.refs.append(posting)
+                texts.append(msg.text)
+        self.row_of = {(source, conv_name, ts): row for row, (ts, source, conv_name, _, _) in enumerate(self.refs)}
+        if not self.refs:
+            return self
+
+        self.vectorizer = TfidfVectorizer(
+            tokenizer=tokenize,
+            lowercase=False,
+            token_pattern=None,
+            sublinear_tf=True,
+            min_df=self.min_df,
+            max_features=self.max_features,
+            dtype=np.float32,
+        )
+        try:
+            matrix = self.vectorizer.fit_transform(texts)
+        except ValueError:  # 모든 메시지에 토큰이 없는 경우
+            self.refs, self.row_of, self.vectorizer = [], {}, None
+            return self
+
+        # LSA 축소: 어휘 수보다 작은 차원만 의미가 있음
+        n_components = min(self.n_components, matrix.shape[1] - 1)
+        if n_components > 0:
+            self.svd = TruncatedSVD(n_components=n_components, random_state=0)
+            matrix = normalize(self.svd.fit_transform(matrix)).astype(np.float32)
+        self.matrix = matrix
+        return self
+
+    def _vectorize(self, text: str):
+        vec = self.vectorizer.transform([text])
+        if self.svd is not None:
+            vec = normalize(self.svd.transform(vec)).astype(np.float32)
+        return vec
+
+    def similar_to_text(self, text: str, top_k: int = 10, exclude_row: Optional[int] = None) -> List[Tuple[str, str, Message, float]]:
+        """주어진 텍스트와 코사인 유사도가 높은 메시지 top_k개 반환"""
+        if self.matrix is None or not text:
+            return []
+        scores = self.matrix @ self._vectorize(text).T
+        scores = scores.toarray().ravel() if hasattr(scores, "toarray") else np.asarray(scores).ravel()
+        if exclude_row is not None:
+            scores[exclude_row] = -1.0
+
+        # 전체 정렬 대신 argpartition으로 상위 k개만 선택
+        k = min(top_k, len(scores))
+        top_rows = np.argpartition(-scores, k - 1)[:k]
+        top_rows = top_rows[np.argsort(-scores[top_rows])]
+        results = []
+        for row in top_rows:
+            if scores[row] > 0:
+                posting = self.refs[row]
+                results.append((posting[1], posting[2], self.archive_manager.resolve_posting(posting), float(scores[row])))
+        return results
+
+    def similar_messages(self, source: str, conv_name: str, message: Message, top_k: int = 10) -> List[Tuple[str, str, Message, float]]:
+        """인덱스에 포함된 메시지와 비슷한 메시지 top_k개 반환 (자기 자신 제외)"""
+        row = self.row_of.get((source, conv_name, message.ts))
+        return self.similar_to_text(message.text, top_k=top_k, exclude_row=row)
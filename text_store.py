@@ -0,0 +1,92 @@
+import itertools
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+from typing import List, Optional
+
+_store_ids = itertools.count()
+
+
+class DecompressedBlockCache:
+    """압축 해제한 텍스트 블록의 LRU. 모든 CompressedTextStore가 함께 사용한다."""
+    def __init__(self, max_blocks: int = 256):
+        self.max_blocks = max_blocks
+        self._blocks: 'OrderedDict[tuple, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, store: 'CompressedTextStore', block_index: int) -> bytes:
+        key = (store.uid, block_index)
+        with self._lock:
+            data = self._blocks.get(key)
+            if data is not None:
+                self.hits += 1
+                self._blocks.move_to_end(key)
+                return data
+            self.misses += 1
+        data = zlib.decompress(store.blocks[block_index])
+        with self._lock:
+            self._blocks[key] = data
+            while len(self._blocks) > self.max_blocks:
+                self._blocks.popitem(last=False)
+        return data
+
+    def get_stats(self):
+        with self._lock:
+            return {"blocks": len(self._blocks), "max_blocks": self.max_blocks, "hits": self.hits, "misses": self.misses}
+
+
+block_cache = DecompressedBlockCache()
+
+
+class CompressedTextStore:
+    """
+    대화 하나의 메시지 텍스트를 연속된 block_size개씩 묶어 zlib으로 압축한 저장소.
+    슬롯(메시지 순번)별 블록 내 시작 위치를 offset 인덱스로 들고 있어,
+    텍스트를 읽을 때는 해당 슬롯이 들어 있는 블록 하나만 압축 해제한다(block_cache에 보관).
+    """
+    def __init__(self, texts: List[str], block_size: int = 64, level: int = 6):
+        self.uid = next(_store_ids)
+        self.block_size = block_size
+        self.count = len(texts)
+        self.blocks: List[bytes] = []
+        self.offsets = array('I')  # 슬롯 -> 블록 내 시작 바이트 위치
+        self.raw_bytes = 0
+        for block_start in range(0, len(texts), block_size):
+            encoded = [text.encode("utf-8") for text in texts[block_start:block_start + block_size]]
+            position = 0
+            for data in encoded:
+                self.offsets.append(position)
+                position += len(data)
+            self.raw_bytes += position
+            self.blocks.append(zlib.compress(b"".join(encoded), level))
+
+    def __setstate__(self, state):
+        # 다시 불러온 저장소는 새 uid를 받아 블록 캐시에서 다른 저장소와 섞이지 않게 함
+        self.__dict__.update(state)
+        self.uid = next(_store_ids)
+
+    @property
+    def compressed_bytes(self):
+        return sum(len(block) for block in self.blocks)
+
+    def get(self, slot: int) -> str:
+        block_index = slot // self.block_size
+        data = block_cache.get(self, block_index)
+        start = self.offsets[slot]
+        next_slot = slot + 1
+        end = self.offsets[next_slot] if next_slot < self.count and next_slot % self.block_size else len(data)
+        return data[start:end].decode("utf-8")
+
+
+def compress_messages(messages, block_size: int = 64, level: int = 6) -> Optional[CompressedTextStore]:
+    """메시지들의 텍스트를 하나의 압축 저장소로 옮기고 각 메시지가 저장소의 슬롯을 가리키게 한다"""
+    messages = [msg for msg in messages if isinstance(msg.text, str)]
+    if not messages:
+        return None
+    store = CompressedTextStore([msg.text for msg in messages], block_size=block_size, level=level)
+    for slot, msg in enumerate(messages):
+        msg.set_text_ref(store, slot)
+    return store
@@ -0,0 +1,53 @@
+import heapq
+from typing import Dict, Iterator, Optional, Sequence
+
+import numpy as np
+
+
+class TimelineIndex:
+    """
+    대화별 메인 메시지 ts 열 (np.float64, 행 = messages 인덱스). 메모리 예산으로 대화가 spill되어도 이 열은 항상 메모리에 있으므로
+    전체 타임라인은 대화를 불러오지 않고 ts 열만으로 합치고, 페이지에 들어간 posting의 대화만 resolve_posting에서 불러온다.
+    """
+    def __init__(self):
+        self.entries: Dict[tuple, np.ndarray] = {}  # (source, 대화 이름) -> ts 열
+
+    @staticmethod
+    def _timestamps(conv) -> np.ndarray:
+        return np.array([msg.ts for msg in conv.messages], dtype=np.float64)
+
+    def build(self, channels: Dict[str, 'Conversation'], dms: Dict[str, 'Conversation']):
+        entries = {}
+        for source, conversations in (("channel", channels), ("dm", dms)):
+            for conv_name in list(conversations):
+                entries[(source, conv_name)] = self._timestamps(conversations[conv_name])
+        self.entries = entries
+        return self
+
+    def updated(self, changed: Dict[tuple, 'Conversation']) -> 'TimelineIndex':
+        """일부 대화가 바뀐 새 인덱스를 반환 (바뀌지 않은 대화는 다시 읽지 않음)"""
+        index = TimelineIndex()
+        index.entries = dict(self.entries)
+        for key, conv in changed.items():
+            index.entries[key] = self._timestamps(conv)
+        return index
+
+    def iter_postings(self, start_ts=None, reverse=False, categories: Optional[Sequence[str]] = None,
+                      message_kinds: Optional['MessageKindIndex'] = None) -> Iterator[tuple]:
+        """
+        모든 대화의 메인 메시지 posting (ts, source, 대화 이름, 메시지 인덱스, -1)을 ts 순으로 생성.
+        reverse=False면 start_ts 이상을 오름차순, True면 start_ts 이하를 내림차순으로. categories를 주면 message_kinds의 비트맵으로 거른다.
+        """
+        def conversation_postings(source, conv_name, timestamps):
+            if reverse:
+                lo, hi = 0, len(timestamps) if start_ts is None else int(np.searchsorted(timestamps, start_ts, side="right"))
+            else:
+                lo, hi = 0 if start_ts is None else int(np.searchsorted(timestamps, start_ts, side="left")), len(timestamps)
+            kinds = message_kinds.entries.get((source, conv_name)) if categories is not None and message_kinds is not None else None
+            indexes = range(lo, hi) if kinds is None else kinds.select(lo, hi, categories).tolist()
+            if reverse:
+                indexes = reversed(indexes)
+            return ((float(timestamps[i]), source, conv_name, i, -1) for i in indexes)
+
+        streams = [conversation_postings(source, conv_name, timestamps) for (source, conv_name), timestamps in self.entries.items()]
+        return heapq.merge(*streams, reverse=reverse)
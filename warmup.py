@@ -0,0 +1,180 @@
+"""
+배포 후 첫 방문자가 파싱/인덱스 생성 비용을 치르지 않도록, 같은 Hydra 설정으로 미리 모든 산출물을 만드는 warm-up 작업.
+
+    python warmup.py                      # configs/config.yaml 사용
+    python warmup.py workspace_load=process similarity.n_components=100   # Hydra override
+
+워크스페이스마다 parse -> (similarity, term_stats, user_stats) -> save 단계를 의존성 그래프에 따라 병렬로 실행하고,
+결과를 warmup.artifact_dir에 워크스페이스별 파일로 저장한다. 서버는 warmup.use_artifacts가 켜져 있으면 이 파일만 로드한다.
+"""
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from term_stats import TermTrendIndex
+from text_index import SimilarityIndex
+from workspaces import ShardedArchive, load_workspace_manager, workspace_specs_from_config
+
+ARTIFACT_FORMAT = 9  # 메모리에서 내보낸 대화의 스냅샷(spill_files)을 함께 저장
+
+
+def artifact_path(artifact_dir, workspace_name):
+    return os.path.join(artifact_dir, f"{workspace_name}.pkl")
+
+
+def run_stage_graph(stages: Dict[str, Tuple[List[str], Callable[[Dict[str, Any]], Any]]], max_workers=None,
+                    progress: Callable[[str], None] = print) -> Tuple[Dict[str, Any], Dict[str, BaseException]]:
+    """
+    stages: 단계 이름 -> (선행 단계 이름 목록, 함수(지금까지의 결과 dict) -> 결과)
+    선행 단계가 모두 끝난 단계부터 스레드 풀에서 병렬로 실행한다. 실패한 단계에 의존하는 단계는 실행하지 않는다.
+    반환: (단계별 결과, 단계별 오류)
+    """
+    results, errors = {}, {}
+    remaining = dict(stages)
+    running = {}
+    started_at = {}
+    total = len(stages)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while remaining or running:
+            for name, (deps, func) in list(remaining.items()):
+                if any(dep in errors for dep in deps):
+                    errors[name] = RuntimeError(f"선행 단계 실패: {', '.join(dep for dep in deps if dep in errors)}")
+                    progress(f"[{len(results) + len(errors)}/{total}] {name} 건너뜀 (선행 단계 실패)")
+                    del remaining[name]
+                elif all(dep in results for dep in deps):
+                    started_at[name] = time.perf_counter()
+                    running[executor.submit(func, results)] = name
+                    del remaining[name]
+            if not running:
+                break
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                elapsed = time.perf_counter() - started_at[name]
+                try:
+                    results[name] = future.result()
+                    progress(f"[{len(results) + len(errors)}/{total}] {name} 완료 ({elapsed:.2f}초)")
+                except Exception as e:
+                    errors[name] = e
+                    progress(f"[{len(results) + len(errors)}/{total}] {name} 실패 ({elapsed:.2f}초): {e}")
+    return results, errors
+
+
+def _save_artifact(artifact_dir, spec, manager, similarity_index, n_components, term_index):
+    os.makedirs(artifact_dir, exist_ok=True)
+    path = artifact_path(artifact_dir, spec["name"])
+    # 임시 파일에 쓴 뒤 교체하여 서버가 반쯤 쓰인 파일을 읽지 않도록 함
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({
+            "format": ARTIFACT_FORMAT,
+            "spec": spec,
+            "built_at": time.time(),
+            "manager": manager,
+            # 메모리 예산을 넘어 내보낸 대화는 warm-up 호스트의 spill_dir에만 있으므로 산출물에 함께 담는다
+            "spill_files": manager.conversation_store.read_spill_files(),
+            "similarity_index": similarity_index,
+            "similarity_components": n_components,
+            "term_index": term_index,
+        }, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return path
+
+
+def build_warmup_stages(specs: List[Dict[str, Any]], artifact_dir, n_components=0, process_pool=None):
+    """워크스페이스별 단계와 의존성 그래프"""
+    stages = {}
+    for spec in specs:
+        name = spec["name"]
+
+        def parse(results, spec=spec):
+            # 파싱 + 스레드/사용자별 posting/DM 메타데이터 인덱스 (build_indexes까지)
+            if process_pool is not None:
+                return process_pool.submit(load_workspace_manager, spec).result()
+            return load_workspace_manager(spec)
+
+        def similarity(results, name=name):
+            return SimilarityIndex(n_components=n_components).build(results[f"parse:{name}"])
+
+        def term_stats(results, name=name):
+            return TermTrendIndex().build(results[f"parse:{name}"])
+
+        def user_stats(results, name=name):
+            results[f"parse:{name}"].build_user_stats()
+
+        def save(results, spec=spec, name=name):
+            return _save_artifact(artifact_dir, spec, results[f"parse:{name}"], results[f"similarity:{name}"], n_components,
+                                  results[f"term_stats:{name}"])
+
+        stages[f"parse:{name}"] = ([], parse)
+        stages[f"similarity:{name}"] = ([f"parse:{name}"], similarity)
+        stages[f"term_stats:{name}"] = ([f"parse:{name}"], term_stats)
+        stages[f"user_stats:{name}"] = ([f"parse:{name}"], user_stats)
+        stages[f"save:{name}"] = ([f"similarity:{name}", f"term_stats:{name}", f"user_stats:{name}"], save)
+    return stages
+
+
+def run_warmup(config: Dict[str, Any], progress: Callable[[str], None] = print) -> Dict[str, BaseException]:
+    """설정(dict)의 모든 워크스페이스에 대해 warm-up 산출물을 만든다. 반환: 실패한 단계와 오류"""
+    specs = workspace_specs_from_config(config)
+    warmup = config.get("warmup") or {}
+    artifact_dir = warmup.get("artifact_dir", "./data/cache/warmup")
+    n_components = (config.get("similarity") or {}).get("n_components", 0)
+    use_processes = config.get("workspace_load", "thread") == "process"
+
+    progress(f"warm-up 시작: 워크스페이스 {len(specs)}개 -> {artifact_dir}")
+    started = time.perf_counter()
+    process_pool = ProcessPoolExecutor(max_workers=len(specs)) if use_processes and len(specs) > 1 else None
+    try:
+        stages = build_warmup_stages(specs, artifact_dir, n_components, process_pool)
+        _, errors = run_stage_graph(stages, max_workers=warmup.get("max_workers"), progress=progress)
+    finally:
+        if process_pool is not None:
+            process_pool.shutdown()
+    progress(f"warm-up 종료: {time.perf_counter() - started:.2f}초, 실패 {len(errors)}개 단계")
+    return errors
+
+
+def load_warmup_artifacts(specs: List[Dict[str, Any]], artifact_dir) -> Tuple[ShardedArchive, Dict[str, Dict[str, Any]]]:
+    """
+    warm-up 산출물만 읽어 샤드 아카이브와 워크스페이스별로 미리 만든 인덱스
+    ({"similarity_index": SimilarityIndex, "term_index": TermTrendIndex})를 반환.
+    산출물이 없거나 지금 설정과 다른 설정으로 만들어졌으면 ValueError (서버에서 직접 빌드하지 않음)
+    """
+    shards, prebuilt = {}, {}
+    for spec in specs:
+        path = artifact_path(artifact_dir, spec["name"])
+        if not os.path.exists(path):
+            raise ValueError(f"warm-up 산출물이 없습니다: {path} (python warmup.py 를 먼저 실행하세요)")
+        with open(path, 'rb') as f:
+            artifact = pickle.load(f)
+        if artifact.get("format") != ARTIFACT_FORMAT or artifact.get("spec") != spec:
+            raise ValueError(f"warm-up 산출물이 현재 설정과 다릅니다: {path} (python warmup.py 를 다시 실행하세요)")
+        manager = artifact["manager"]
+        manager.conversation_store.restore_spill_files(artifact["spill_files"])
+        # 산출물을 만든 뒤 바뀐 user_mapping.json/dm_mapping.json을 반영 (오래된 매핑으로 파일을 덮어쓰지 않도록)
+        manager.reload_mappings()
+        shards[spec["name"]] = manager
+        prebuilt[spec["name"]] = {"similarity_index": artifact["similarity_index"], "term_index": artifact["term_index"]}
+    return ShardedArchive(shards), prebuilt
+
+
+def load_config_dict(overrides: Optional[List[str]] = None) -> Dict[str, Any]:
+    """main.py와 같은 Hydra 설정(configs/config.yaml)을 override와 함께 dict로 로드"""
+    from hydra import initialize, compose
+    from hydra.core.global_hydra import GlobalHydra
+    from omegaconf import OmegaConf
+
+    if GlobalHydra.instance().is_initialized():
+        GlobalHydra.instance().clear()
+    with initialize(config_path="configs", version_base=None):
+        cfg = compose(config_name="config", overrides=overrides or [])
+    return OmegaConf.to_container(cfg, resolve=True)
+
+
+if __name__ == "__main__":
+    failed = run_warmup(load_config_dict(sys.argv[1:]))
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,160 @@
+import heapq
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import List, Dict, Any, Callable, Optional, Tuple
+
+from archive_merge import ArchiveMerger
+from data_models import Message, UserMapping, SlackArchiveManager
+
+
+def load_workspace_manager(spec: Dict[str, Any]) -> SlackArchiveManager:
+    """
+    워크스페이스 하나를 로드하고 인덱스까지 생성.
+    spec: name, channel_root, dm_root, user_mapping_file, (선택) export_zip, archive_roots, merge_state_dir,
+          memory_budget_mb, spill_dir, query_cache_entries, text_block_size, track_footprint, read_workers, read_ahead_files
+    별도 프로세스에서도 실행할 수 있도록 모듈 최상위 함수로 둔다.
+    """
+    user_mapping = UserMapping(mapping_file=spec["user_mapping_file"])
+    manager = SlackArchiveManager(
+        channel_root=spec["channel_root"],
+        dm_root=spec["dm_root"],
+        user_mapping=user_mapping,
+        memory_budget_bytes=int((spec.get("memory_budget_mb") or 0) * 1024 * 1024),
+        spill_dir=os.path.join(spec.get("spill_dir") or "./data/cache/spill", spec["name"]),
+        query_cache_entries=spec.get("query_cache_entries", 256),
+        text_block_size=spec.get("text_block_size", 0),
+        track_footprint=spec.get("track_footprint", True),
+        read_workers=spec.get("read_workers", 16),
+        read_ahead_files=spec.get("read_ahead_files", 64),
+    )
+    if spec.get("archive_roots"):
+        # 여러 내보내기를 하나로 병합 (이전에 병합한 파일은 건너뜀)
+        ArchiveMerger(spec["merge_state_dir"]).merge(manager, list(spec["archive_roots"]))
+    elif spec.get("export_zip"):
+        # zip이 지정되면 압축 해제 없이 zip에서 직접 로드
+        manager.load_zip(spec["export_zip"])
+    else:
+        manager.load_channels()
+        manager.load_dms()
+    manager.build_indexes()
+    return manager
+
+
+# 이 환경 변수에 공백으로 구분한 Hydra override를 주면 앱(main.py)이 설정 파일에 더해 적용 (예: 부하 테스트가 세션마다 임시 매핑 파일을 지정)
+CONFIG_OVERRIDES_ENV = "SLACK_ARCHIVE_OVERRIDES"
+
+
+def workspace_specs_from_config(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    설정(dict)에서 워크스페이스 목록을 만든다.
+    workspaces가 비어 있으면 paths 설정으로 "default" 워크스페이스 하나를 만든다.
+    각 워크스페이스에서 빠진 값은 paths 설정을 기본값으로 사용한다.
+    """
+    paths = config.get("paths") or {}
+    memory = config.get("memory") or {}
+    query_cache = config.get("query_cache") or {}
+    text_store = config.get("text_store") or {}
+    read_ahead = config.get("read_ahead") or {}
+    defaults = {
+        "name": "default",
+        "channel_root": paths.get("channel_root", "./data/channels"),
+        "dm_root": paths.get("dm_root", "./data/dms"),
+        "user_mapping_file": paths.get("user_mapping_file", "./data/user_mapping.json"),
+        "export_zip": paths.get("export_zip"),
+        "archive_roots": list(paths.get("archive_roots") or []),
+        "merge_state_dir": paths.get("merge_state_dir", "./data/merged"),
+        "memory_budget_mb": memory.get("budget_mb", 0),
+        "spill_dir": memory.get("spill_dir", "./data/cache/spill"),
+        "track_footprint": memory.get("track_footprint", True),
+        "query_cache_entries": query_cache.get("max_entries", 256),
+        "text_block_size": text_store.get("block_messages", 64) if text_store.get("compress", False) else 0,
+        "read_workers": read_ahead.get("readers", 16),
+        "read_ahead_files": read_ahead.get("max_in_flight", 64),
+    }
+    workspaces = config.get("workspaces") or []
+    if not workspaces:
+        return [defaults]
+    # zip/병합 목록은 워크스페이스마다 다르므로 paths 값을 물려받지 않음
+    specs = []
+    for workspace in workspaces:
+        spec = dict(defaults, export_zip=None, archive_roots=[])
+        spec.update(workspace)
+        specs.append(spec)
+    return specs
+
+
+class ShardedArchive:
+    """
+    여러 Slack 워크스페이스를 샤드로 묶은 아카이브.
+    각 워크스페이스는 독립적으로(선택적으로 별도 프로세스에서) 로드되고 자체 매핑을 가진다.
+    검색/분석은 모든 샤드에 병렬로 보낸 뒤 ts 또는 점수 기준으로 합친다.
+    """
+    def __init__(self, shards: Optional[Dict[str, SlackArchiveManager]] = None):
+        self.shards: Dict[str, SlackArchiveManager] = shards or {}
+
+    @classmethod
+    def load(cls, workspace_specs: List[Dict[str, Any]], use_processes=False, max_workers=None) -> 'ShardedArchive':
+        """
+        워크스페이스들을 병렬로 로드.
+        use_processes=True이면 워크스페이스마다 별도 프로세스에서 JSON 파싱을 수행해 GIL 경합을 피한다.
+        """
+        if len(workspace_specs) == 1:
+            return cls({workspace_specs[0]["name"]: load_workspace_manager(workspace_specs[0])})
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with executor_class(max_workers=max_workers or len(workspace_specs)) as executor:
+            managers = executor.map(load_workspace_manager, workspace_specs)
+            return cls({spec["name"]: manager for spec, manager in zip(workspace_specs, managers)})
+
+    def get_workspace_names(self):
+        return list(self.shards.keys())
+
+    def fan_out(self, query: Callable[[str, SlackArchiveManager], Any]) -> Dict[str, Any]:
+        """query(워크스페이스 이름, 매니저)를 모든 샤드에 병렬로 실행하고 워크스페이스별 결과를 반환"""
+        if len(self.shards) <= 1:
+            return {name: query(name, manager) for name, manager in self.shards.items()}
+        with ThreadPoolExecutor(max_workers=len(self.shards)) as executor:
+            futures = {name: executor.submit(query, name, manager) for name, manager in self.shards.items()}
+            return {name: future.result() for name, future in futures.items()}
+
+    def search(self, keyword: str, source: Optional[str] = None, categories=None) -> List[Tuple[float, str, str, str, Message]]:
+        """
+        모든 워크스페이스의 대화에서 키워드 검색.
+        source: "channel", "dm" 또는 None(전체)
+        categories: 메시지 분류 필터 (예: ("human",), None이면 전체)
+        반환: ts 순으로 합친 (ts, 워크스페이스, source, 대화 이름, 메시지)
+        """
+        def search_shard(workspace, manager):
+            results = []
+            for conv_source, conversations in (("channel", manager.channels), ("dm", manager.dms)):
+                if source is not None and conv_source != source:
+                    continue
+                for conv_name in list(conversations):
+                    messages = manager.query_conversation(conv_source, conv_name, keyword, categories=categories)
+                    results.extend((msg.ts, workspace, conv_source, conv_name, msg) for msg in messages)
+            results.sort(key=lambda result: result[0])
+            return results
+
+        return list(heapq.merge(*self.fan_out(search_shard).values(), key=lambda result: result[0]))
+
+    def similar_to_text(self, similarity_indexes: Dict[str, Any], text: str, top_k: int = 10) -> List[Tuple[str, str, str, Message, float]]:
+        """
+        워크스페이스별 SimilarityIndex에 같은 텍스트로 질의하고 점수 기준 상위 top_k개를 합친다.
+        반환: (워크스페이스, source, 대화 이름, 메시지, 점수)
+        """
+        def similar_in_shard(workspace, manager):
+            index = similarity_indexes.get(workspace)
+            return [(workspace, *result) for result in index.similar_to_text(text, top_k=top_k)] if index else []
+
+        results = [result for shard_results in self.fan_out(similar_in_shard).values() for result in shard_results]
+        return heapq.nlargest(top_k, results, key=lambda result: result[-1])
+
+    def message_counts(self) -> Dict[str, Dict[str, int]]:
+        """워크스페이스별 채널/DM 수와 메시지 수 (스레드 답글 포함)"""
+        def count_shard(workspace, manager):
+            conversations = list(manager.channels.values()) + list(manager.dms.values())
+            return {
+                "channels": len(manager.channels),
+                "dms": len(manager.dms),
+                "messages": sum(len(conv.messages) + sum(len(msg.replies) for msg in conv.messages) for conv in conversations),
+            }
+        return self.fan_out(count_shard)